@@ -210,6 +210,153 @@ NEO4J_URI = os.getenv('NEO4J_URI', 'bolt://localhost:7687')
 NEO4J_USER = os.getenv('NEO4J_USER', 'neo4j')
 NEO4J_PASSWORD = os.getenv('NEO4J_PASSWORD', 'neo4jpass123')
 
+# Connection pool (one driver/pool per event loop: the upload task loop and the request bridge loop)
+NEO4J_MAX_CONNECTION_POOL_SIZE = int(os.getenv('NEO4J_MAX_CONNECTION_POOL_SIZE', '50'))
+# Seconds to wait for a free pooled connection before failing
+NEO4J_CONNECTION_ACQUISITION_TIMEOUT = float(os.getenv('NEO4J_CONNECTION_ACQUISITION_TIMEOUT', '60'))
+# Seconds after which pooled connections are retired
+NEO4J_MAX_CONNECTION_LIFETIME = float(os.getenv('NEO4J_MAX_CONNECTION_LIFETIME', '3600'))
+# Seconds a write transaction failing with transient errors (deadlocks, leader switches,
+# unavailable servers) is retried, with jittered exponential backoff, before failing
+NEO4J_MAX_TRANSACTION_RETRY_TIME = float(os.getenv('NEO4J_MAX_TRANSACTION_RETRY_TIME', '30'))
+# Concurrent Neo4j calls from synchronous API views (run on one shared background loop)
+NEO4J_REQUEST_CONCURRENCY = int(os.getenv('NEO4J_REQUEST_CONCURRENCY', '8'))
+
+# Schema provisioning: a (dataset_id, id) index is created per node label on first upload.
+# When enabled, a composite uniqueness constraint is tried first (falls back to a plain index).
+NEO4J_CREATE_UNIQUENESS_CONSTRAINTS = os.getenv('NEO4J_CREATE_UNIQUENESS_CONSTRAINTS', 'True') == 'True'
+
+# ==============================================================================
+# Query Execution
+# ==============================================================================
+
+# Buffered query execution returns at most this many rows (use mode=stream/cursor for more)
+QUERY_RESULT_MAX_ROWS = int(os.getenv('QUERY_RESULT_MAX_ROWS', '10000'))
+# Rows pulled from Neo4j per round trip when streaming NDJSON
+QUERY_STREAM_CHUNK_SIZE = int(os.getenv('QUERY_STREAM_CHUNK_SIZE', '500'))
+# Server-side cursors: open cursor limit (LRU eviction), idle TTL in seconds and rows kept per cursor
+QUERY_MAX_OPEN_CURSORS = int(os.getenv('QUERY_MAX_OPEN_CURSORS', '50'))
+QUERY_CURSOR_TTL = float(os.getenv('QUERY_CURSOR_TTL', '300'))
+QUERY_CURSOR_MAX_BUFFERED_ROWS = int(os.getenv('QUERY_CURSOR_MAX_BUFFERED_ROWS', '10000'))
+
+# Result cache for read-only queries (saved/dashboard queries); invalidated when uploads finish,
+# datasets are deleted or a writing query is run through the query API.
+# The default LocMemCache is per process and evicts least recently used entries: invalidation
+# only reaches the process that triggered it, so with several server workers (gunicorn --workers,
+# uvicorn --workers) the others serve stale results for up to QUERY_CACHE_TTL seconds. Set
+# QUERY_CACHE_REDIS_URL (e.g. redis://localhost:6379/1) to share the cache between workers, or
+# disable it.
+QUERY_CACHE_ENABLED = os.getenv('QUERY_CACHE_ENABLED', 'True') == 'True'
+QUERY_CACHE_ALIAS = 'query_results'
+QUERY_CACHE_REDIS_URL = os.getenv('QUERY_CACHE_REDIS_URL', '')
+# Results with more rows than this are not cached
+QUERY_CACHE_MAX_ROWS = int(os.getenv('QUERY_CACHE_MAX_ROWS', '5000'))
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    QUERY_CACHE_ALIAS: {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': QUERY_CACHE_REDIS_URL,
+        'TIMEOUT': int(os.getenv('QUERY_CACHE_TTL', '600')),
+    } if QUERY_CACHE_REDIS_URL else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'query-results',
+        'TIMEOUT': int(os.getenv('QUERY_CACHE_TTL', '600')),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.getenv('QUERY_CACHE_MAX_ENTRIES', '500')),
+        },
+    },
+}
+
+# ==============================================================================
+# Dataset Export
+# ==============================================================================
+
+# Nodes (or relationship source nodes) per keyset page, and rows per CSV chunk / Neo4j fetch
+EXPORT_PAGE_SIZE = int(os.getenv('EXPORT_PAGE_SIZE', '5000'))
+EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', '1000'))
+
+# ==============================================================================
+# Upload Task Execution
+# ==============================================================================
+
+# Upload tasks run on one long-lived background event loop; at most this many run at once,
+# the rest wait in a queue.
+UPLOAD_TASK_CONCURRENCY = int(os.getenv('UPLOAD_TASK_CONCURRENCY', '2'))
+# Seconds to wait for running tasks on shutdown before cancelling them (they are re-queued on restart).
+UPLOAD_TASK_SHUTDOWN_TIMEOUT = float(os.getenv('UPLOAD_TASK_SHUTDOWN_TIMEOUT', '30'))
+# Re-queue pending/processing upload tasks when the development server starts. Multi-worker
+# servers (gunicorn, uvicorn, daphne) do not sweep on startup: run
+# `python manage.py requeue_upload_tasks` from one process (e.g. a release step) instead.
+UPLOAD_TASK_REQUEUE_ON_STARTUP = os.getenv('UPLOAD_TASK_REQUEUE_ON_STARTUP', 'True') == 'True'
+# A running task refreshes its heartbeat every UPLOAD_TASK_HEARTBEAT_INTERVAL seconds; a pending or
+# processing task without one for UPLOAD_TASK_STALE_AFTER seconds is considered abandoned (its
+# process died) and may be re-queued or resumed.
+UPLOAD_TASK_HEARTBEAT_INTERVAL = float(os.getenv('UPLOAD_TASK_HEARTBEAT_INTERVAL', '30'))
+UPLOAD_TASK_STALE_AFTER = float(os.getenv('UPLOAD_TASK_STALE_AFTER', '120'))
+# Re-queued and resumed tasks continue from their last checkpoint (byte offset and row of the
+# last committed batch) instead of the first row.
+UPLOAD_TASK_CHECKPOINTS = os.getenv('UPLOAD_TASK_CHECKPOINTS', 'True') == 'True'
+# Rows Neo4j refuses to write are saved per task as CSV here (download: GET tasks/<id>/?download=rejects)
+UPLOAD_REJECTS_DIR = Path(os.getenv('UPLOAD_REJECTS_DIR', str(BASE_DIR / 'rejects')))
+
+# Ingestion pipeline: batches are parsed/converted while earlier batches are being written.
+# Converted batches waiting for a writer (bounds memory per task).
+INGEST_QUEUE_SIZE = int(os.getenv('INGEST_QUEUE_SIZE', '4'))
+# Concurrent write transactions per task. Node MERGEs are safe to overlap when the
+# (dataset_id, id) uniqueness constraint exists; relationship writes lock both endpoint
+# nodes and are prone to deadlocks when overlapped, so they default to one writer.
+INGEST_NODE_WRITERS = int(os.getenv('INGEST_NODE_WRITERS', '2'))
+INGEST_RELATIONSHIP_WRITERS = int(os.getenv('INGEST_RELATIONSHIP_WRITERS', '1'))
+# Relationship batches are instead written by INGEST_RELATIONSHIP_LANES concurrent lanes
+# partitioned by source id; targets with at least INGEST_HUB_DEGREE rows in a batch go to
+# one extra, serial lane (see core.relationship_lanes). 1 disables lanes.
+INGEST_RELATIONSHIP_LANES = int(os.getenv('INGEST_RELATIONSHIP_LANES', '4'))
+INGEST_HUB_DEGREE = int(os.getenv('INGEST_HUB_DEGREE', '50'))
+# Endpoint ids resolved to element ids and kept per label for the rest of a relationship
+# upload: integer ids below this bound in an array, other ids in an LRU of this size.
+INGEST_ENDPOINT_CACHE_SIZE = int(os.getenv('INGEST_ENDPOINT_CACHE_SIZE', '200000'))
+# Relationship write statement: 'auto' uses CREATE while the type has no relationships in
+# the dataset and no (source, target) pair repeats in the file, MERGE otherwise; 'merge'
+# always uses MERGE.
+INGEST_RELATIONSHIP_STRATEGY = os.getenv('INGEST_RELATIONSHIP_STRATEGY', 'auto').lower()
+# Adaptive batch sizing: rows per write transaction start at INGEST_BATCH_INITIAL_SIZE and
+# move within [INGEST_BATCH_MIN_SIZE, INGEST_BATCH_MAX_SIZE] toward transactions of about
+# INGEST_BATCH_TARGET_SECONDS with at most INGEST_BATCH_MAX_BYTES of parameters; memory
+# errors halve the size. Disabled, every transaction has the fixed BATCH_SIZE rows.
+INGEST_ADAPTIVE_BATCHING = os.getenv('INGEST_ADAPTIVE_BATCHING', 'True') == 'True'
+INGEST_BATCH_INITIAL_SIZE = int(os.getenv('INGEST_BATCH_INITIAL_SIZE', '500'))
+INGEST_BATCH_MIN_SIZE = int(os.getenv('INGEST_BATCH_MIN_SIZE', '50'))
+INGEST_BATCH_MAX_SIZE = int(os.getenv('INGEST_BATCH_MAX_SIZE', '5000'))
+INGEST_BATCH_TARGET_SECONDS = float(os.getenv('INGEST_BATCH_TARGET_SECONDS', '1.0'))
+INGEST_BATCH_MAX_BYTES = int(os.getenv('INGEST_BATCH_MAX_BYTES', str(16 * 1024 * 1024)))
+# Nodes/relationships deleted per transaction by chunked deletes (sync re-uploads, dataset purge)
+NEO4J_DELETE_CHUNK_SIZE = int(os.getenv('NEO4J_DELETE_CHUNK_SIZE', '10000'))
+# Files of at least CSV_PARALLEL_MIN_BYTES are parsed and converted in CSV_PARALLEL_WORKERS
+# processes, in record-aligned chunks of about CSV_PARALLEL_CHUNK_BYTES (1 disables it).
+CSV_PARALLEL_WORKERS = int(os.getenv('CSV_PARALLEL_WORKERS', str(min(8, os.cpu_count() or 1))))
+CSV_PARALLEL_MIN_BYTES = int(os.getenv('CSV_PARALLEL_MIN_BYTES', str(64 * 1024 * 1024)))
+CSV_PARALLEL_CHUNK_BYTES = int(os.getenv('CSV_PARALLEL_CHUNK_BYTES', str(4 * 1024 * 1024)))
+# Profile every column of uploaded files (type over the whole file, null ratio, min/max,
+# approximate distinct count) in a pass before ingestion; rows are converted with these
+# types and the profile is stored on the upload task. Disabled, types are detected from
+# the validated prefix of the file only.
+CSV_PROFILE_COLUMNS = os.getenv('CSV_PROFILE_COLUMNS', 'True') == 'True'
+# Ingestion backend: 'bolt' sends rows as UNWIND batches, 'load_csv' stages the file in the
+# Neo4j import directory and runs LOAD CSV ... IN TRANSACTIONS server-side, 'auto' uses
+# LOAD CSV for files of at least LOAD_CSV_MIN_BYTES. LOAD CSV needs NEO4J_IMPORT_DIR: the
+# Neo4j import directory (/var/lib/neo4j/import in the container) as seen by the backend;
+# without it, Bolt is used. Node files synced to a cascade_delete dataset are stamped with
+# their upload generation by the LOAD CSV statement as well.
+INGEST_BACKEND = os.getenv('INGEST_BACKEND', 'bolt')
+NEO4J_IMPORT_DIR = os.getenv('NEO4J_IMPORT_DIR', '')
+LOAD_CSV_MIN_BYTES = int(os.getenv('LOAD_CSV_MIN_BYTES', str(256 * 1024 * 1024)))
+LOAD_CSV_ROWS_PER_TRANSACTION = int(os.getenv('LOAD_CSV_ROWS_PER_TRANSACTION', '10000'))
+# Seconds between progress polls while a LOAD CSV statement or a sync delete (single scan) runs
+LOAD_CSV_PROGRESS_INTERVAL = float(os.getenv('LOAD_CSV_PROGRESS_INTERVAL', '2'))
+
 # ==============================================================================
 # Logging Configuration
 # ==============================================================================
@@ -23,4 +23,5 @@ urlpatterns = [
     path('api/datasets/', include('datasets.urls')),
     path('api/queries/', include('queries.urls')),
     path('api/schema/', SchemaView.as_view(), name='schema'),
+    path('api/core/', include('core.urls')),
 ]
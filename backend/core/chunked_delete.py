@@ -0,0 +1,150 @@
+"""
+Chunked deletion for Neo4j.
+
+Deleting a large part of the graph in one statement builds the whole change set in
+transaction memory and holds its locks until commit. Here a delete is repeated as
+``MATCH ... WITH x LIMIT $chunk_size DELETE x`` until a chunk comes back short, so
+every transaction is bounded, progress can be reported after each one, and an
+interrupted delete is resumed simply by running it again.
+
+Each such chunk scans the match from the start, though, including the entities it
+keeps: when the MATCH filters out most of what it reads (stale nodes among the current
+ones), delete_in_transactions runs ``CALL { ... } IN TRANSACTIONS`` over a single scan
+instead and reports progress by polling a count, as LOAD CSV ingestion does.
+
+The engines only needs a coroutine executing a query and returning its records, so it
+works with Neo4jClient.execute_query as well as a bare driver session (see
+clear_databases.py); it does not depend on Django.
+"""
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+Execute = Callable[[str, Dict[str, Any]], Awaitable[List[Dict[str, Any]]]]
+
+DEFAULT_CHUNK_SIZE = 10000
+DEFAULT_POLL_INTERVAL = 2.0
+
+
+def quote_name(name: str) -> str:
+    """Quote a label, relationship type, property key or schema object name for use in Cypher."""
+    return f"`{name.replace('`', '``')}`"
+
+
+def relationships_match(relationship_type: Optional[str] = None, where: str = '') -> str:
+    """MATCH clause binding relationships (of a type, if given) to x."""
+    rel_type = f':{quote_name(relationship_type)}' if relationship_type else ''
+    return f"MATCH ()-[x{rel_type}]->(){f' WHERE {where}' if where else ''}"
+
+
+def nodes_match(label: Optional[str] = None, where: str = '') -> str:
+    """MATCH clause binding nodes (of a label, if given) to x."""
+    node_label = f':{quote_name(label)}' if label else ''
+    return f"MATCH (x{node_label}){f' WHERE {where}' if where else ''}"
+
+
+async def delete_in_chunks(
+    execute: Execute,
+    match: str,
+    parameters: Optional[Dict[str, Any]] = None,
+    detach: bool = False,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    on_progress: Optional[Callable[[int], Awaitable[None]]] = None
+) -> int:
+    """
+    Delete everything bound to x by a MATCH clause, chunk_size entities per transaction.
+
+    Args:
+        execute: Coroutine function execute(query, parameters) returning records as dicts;
+            each call must run in its own (auto-commit) transaction
+        match: MATCH ... [WHERE ...] clause binding the entities to delete to x
+        parameters: Parameters of the MATCH clause
+        detach: DETACH DELETE nodes (their remaining relationships are deleted in the
+            same transaction, so delete large relationship sets first)
+        chunk_size: Entities deleted per transaction
+        on_progress: Optional coroutine function on_progress(deleted_so_far), awaited
+            after every non-empty chunk
+
+    Returns:
+        Number of entities deleted
+    """
+    chunk_size = max(1, int(chunk_size))
+    query = f"{match} WITH x LIMIT $chunk_size {'DETACH ' if detach else ''}DELETE x RETURN count(*) AS deleted"
+    parameters = {**(parameters or {}), 'chunk_size': chunk_size}
+    total = 0
+    while True:
+        records = await execute(query, parameters)
+        deleted = records[0]['deleted'] if records else 0
+        total += deleted
+        if deleted and on_progress is not None:
+            await on_progress(total)
+        if deleted < chunk_size:
+            return total
+
+
+async def delete_in_transactions(
+    execute: Execute,
+    match: str,
+    parameters: Optional[Dict[str, Any]] = None,
+    detach: bool = False,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    on_progress: Optional[Callable[[int], Awaitable[None]]] = None,
+    poll_interval: float = DEFAULT_POLL_INTERVAL
+) -> int:
+    """
+    Delete everything bound to x by a MATCH clause in one scan, chunk_size entities per
+    inner transaction (CALL { } IN TRANSACTIONS, so execute must use auto-commit
+    transactions).
+
+    Nothing comes back until the statement finishes, so while it runs the entities still
+    matched are counted every poll_interval seconds (with a separate execute call) and
+    on_progress(deleted_so_far) is awaited with the decrease.
+
+    Args:
+        execute: Coroutine function execute(query, parameters) returning records as dicts
+        match: MATCH ... [WHERE ...] clause binding the entities to delete to x
+        parameters: Parameters of the MATCH clause
+        detach: DETACH DELETE nodes
+        chunk_size: Entities deleted per inner transaction
+        on_progress: Optional coroutine function on_progress(deleted_so_far)
+        poll_interval: Seconds between progress polls
+
+    Returns:
+        Number of entities deleted
+    """
+    chunk_size = max(1, int(chunk_size))
+    parameters = dict(parameters or {})
+    query = (
+        f"{match} CALL {{ WITH x {'DETACH ' if detach else ''}DELETE x }} "
+        f"IN TRANSACTIONS OF {chunk_size} ROWS RETURN count(*) AS deleted"
+    )
+    count_query = f"{match} RETURN count(x) AS remaining"
+
+    async def remaining() -> int:
+        records = await execute(count_query, parameters)
+        return records[0]['remaining'] if records else 0
+
+    baseline = await remaining() if on_progress is not None else 0
+    delete = asyncio.create_task(execute(query, parameters))
+    try:
+        while True:
+            done, _ = await asyncio.wait([delete], timeout=poll_interval)
+            if done:
+                break
+            if on_progress is None:
+                continue
+            try:
+                await on_progress(max(0, baseline - await remaining()))
+            except Exception as e:
+                logger.warning(f"Delete progress poll failed: {e}")
+    finally:
+        if not delete.done():
+            delete.cancel()
+            await asyncio.gather(delete, return_exceptions=True)
+    records = delete.result()
+    deleted = records[0]['deleted'] if records else 0
+    if deleted and on_progress is not None:
+        await on_progress(deleted)
+    return deleted
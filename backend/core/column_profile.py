@@ -0,0 +1,303 @@
+"""
+Vectorized column type inference and profiling for CSV files.
+
+Columns are processed in blocks. For each block the candidate types are checked with
+one regular expression scan over the newline-joined values (instead of calling int(),
+float() or strptime() per value), numeric bounds are computed with NumPy, and values
+are hashed into a K-minimum-values sketch for an approximate distinct count.
+
+A column keeps the set of types that every block so far satisfied, so types are
+promoted as more rows are seen (integer -> float -> string). The date and datetime
+formats are detected once per column from its first values. Profiles are mergeable,
+so byte ranges parsed in different processes can be profiled independently.
+"""
+import hashlib
+import re
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+# Type bits, in detection priority order
+INTEGER = 1
+FLOAT = 2
+BOOLEAN = 4
+DATE = 8
+DATETIME = 16
+ALL_TYPES = INTEGER | FLOAT | BOOLEAN | DATE | DATETIME
+TYPE_NAMES = ((INTEGER, 'integer'), (FLOAT, 'float'), (BOOLEAN, 'boolean'), (DATE, 'date'), (DATETIME, 'datetime'))
+
+PROFILE_BLOCK_SIZE = 4096
+DISTINCT_SKETCH_SIZE = 1024
+FORMAT_DETECTION_VALUES = 20  # Values used to pick a column's date/datetime format
+HASH_MAX_CHARS = 64  # Longer values are hashed one by one instead of as a NumPy matrix
+
+INTEGER_PATTERN = re.compile(r'^[+-]?\d+$', re.MULTILINE)
+FLOAT_PATTERN = re.compile(
+    r'^[+-]?(?:(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?|inf(?:inity)?|nan)$',
+    re.MULTILINE | re.IGNORECASE
+)
+BOOLEAN_PATTERN = re.compile(r'^(?:true|false|1|0|yes|no)$', re.MULTILINE | re.IGNORECASE)
+
+_DATE = r'\d{4}-\d{1,2}-\d{1,2}'
+_TIME = r'\d{1,2}:\d{1,2}:\d{1,2}'
+DATE_FORMATS = {
+    '%Y-%m-%d': _DATE,
+    '%m/%d/%Y': r'\d{1,2}/\d{1,2}/\d{4}',
+    '%d/%m/%Y': r'\d{1,2}/\d{1,2}/\d{4}',
+    '%Y/%m/%d': r'\d{4}/\d{1,2}/\d{1,2}',
+}
+DATETIME_FORMATS = {
+    '%Y-%m-%d %H:%M:%S': f'{_DATE} {_TIME}',
+    '%Y-%m-%dT%H:%M:%S': f'{_DATE}T{_TIME}',
+    '%Y-%m-%d %H:%M:%S.%f': rf'{_DATE} {_TIME}\.\d{{1,6}}',
+    '%Y-%m-%dT%H:%M:%S.%f': rf'{_DATE}T{_TIME}\.\d{{1,6}}',
+    '%m/%d/%Y %H:%M:%S': rf'\d{{1,2}}/\d{{1,2}}/\d{{4}} {_TIME}',
+}
+_FORMAT_PATTERNS = {
+    fmt: re.compile(f'^{pattern}$', re.MULTILINE)
+    for fmt, pattern in list(DATE_FORMATS.items()) + list(DATETIME_FORMATS.items())
+}
+# Formats whose text sorts chronologically, so lexical min/max are meaningful
+ISO_FORMATS = {'%Y-%m-%d', '%Y-%m-%d %H:%M:%S', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%d %H:%M:%S.%f', '%Y-%m-%dT%H:%M:%S.%f'}
+
+_FNV_OFFSET = np.uint64(0xcbf29ce484222325)
+_FNV_PRIME = np.uint64(0x100000001b3)
+
+
+def _detect_format(values: List[str], formats: Dict[str, str]) -> Optional[str]:
+    """First format that parses all of the given values, or None."""
+    for fmt in formats:
+        try:
+            for value in values:
+                datetime.strptime(value, fmt)
+            return fmt
+        except ValueError:
+            continue
+    return None
+
+
+def _all_match(pattern: re.Pattern, joined: str, count: int) -> bool:
+    return len(pattern.findall(joined)) == count
+
+
+def hash_values(values: List[str]) -> np.ndarray:
+    """
+    Deterministic 64-bit hashes of strings (FNV-1a over code points plus a final mix).
+
+    Python's hash() is salted per process, which would make sketches from different
+    worker processes incomparable.
+    """
+    if not values:
+        return np.empty(0, dtype=np.uint64)
+    width = max(map(len, values))
+    if width > HASH_MAX_CHARS:
+        return np.fromiter(
+            (int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'little') for value in values),
+            dtype=np.uint64,
+            count=len(values)
+        )
+    width = max(width, 1)
+    codes = np.array(values, dtype=f'<U{width}').view(np.uint32).reshape(len(values), width).astype(np.uint64)
+    lengths = np.fromiter(map(len, values), dtype=np.int64, count=len(values))
+    hashes = np.full(len(values), _FNV_OFFSET, dtype=np.uint64)
+    for column in range(width):
+        # Padding past the end of shorter values must not affect their hash
+        hashes = np.where(lengths > column, (hashes ^ codes[:, column]) * _FNV_PRIME, hashes)
+    # splitmix64 finalizer: FNV alone mixes short, similar values (e.g. ids) poorly
+    hashes ^= hashes >> np.uint64(30)
+    hashes *= np.uint64(0xbf58476d1ce4e5b9)
+    hashes ^= hashes >> np.uint64(27)
+    hashes *= np.uint64(0x94d049bb133111eb)
+    hashes ^= hashes >> np.uint64(31)
+    return hashes
+
+
+class ColumnProfiler:
+    """Incremental type inference and statistics for one column."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.count = 0
+        self.nulls = 0
+        self.types = ALL_TYPES
+        self.date_format: Optional[str] = None
+        self.datetime_format: Optional[str] = None
+        self._formats_detected = False
+        self.min_number: Optional[float] = None
+        self.max_number: Optional[float] = None
+        self.min_text: Optional[str] = None
+        self.max_text: Optional[str] = None
+        self.sample_value: Optional[str] = None
+        self._sketch = np.empty(0, dtype=np.uint64)
+
+    def update(self, cells: List[Optional[str]]) -> None:
+        """Add a block of raw cell values (None or blank counts as null)."""
+        values = [cell.strip() for cell in cells if cell and not cell.isspace()]
+        self.count += len(cells)
+        self.nulls += len(cells) - len(values)
+        if not values:
+            return
+        if self.sample_value is None:
+            self.sample_value = values[0]
+        if not self._formats_detected:
+            head = values[:FORMAT_DETECTION_VALUES]
+            self.date_format = _detect_format(head, DATE_FORMATS)
+            self.datetime_format = _detect_format(head, DATETIME_FORMATS)
+            self._formats_detected = True
+            if self.date_format is None:
+                self.types &= ~DATE
+            if self.datetime_format is None:
+                self.types &= ~DATETIME
+
+        self.types &= self._block_types(values)
+        self._update_bounds(values)
+        sketch = np.unique(np.concatenate((self._sketch, hash_values(values))))
+        self._sketch = sketch[:DISTINCT_SKETCH_SIZE]
+
+    def _block_types(self, values: List[str]) -> int:
+        joined = '\n'.join(values)
+        if joined.count('\n') != len(values) - 1:
+            return 0  # Multi-line values can only be strings
+        count = len(values)
+        types = 0
+        if self.types & INTEGER and _all_match(INTEGER_PATTERN, joined, count):
+            types |= INTEGER | FLOAT
+        elif self.types & FLOAT and _all_match(FLOAT_PATTERN, joined, count):
+            types |= FLOAT
+        if self.types & BOOLEAN and _all_match(BOOLEAN_PATTERN, joined, count):
+            types |= BOOLEAN
+        if self.types & DATE and _all_match(_FORMAT_PATTERNS[self.date_format], joined, count):
+            types |= DATE
+        if self.types & DATETIME and _all_match(_FORMAT_PATTERNS[self.datetime_format], joined, count):
+            types |= DATETIME
+        return types
+
+    def _update_bounds(self, values: List[str]) -> None:
+        low, high = min(values), max(values)
+        self.min_text = low if self.min_text is None else min(self.min_text, low)
+        self.max_text = high if self.max_text is None else max(self.max_text, high)
+        if not self.types & FLOAT:
+            return
+        try:
+            if self.types & INTEGER:
+                numbers = np.array(values, dtype=np.int64)
+                low, high = int(numbers.min()), int(numbers.max())
+            else:
+                numbers = np.array(values, dtype=np.float64)
+                if np.isnan(numbers).all():
+                    return
+                low, high = float(np.nanmin(numbers)), float(np.nanmax(numbers))
+        except (OverflowError, ValueError):
+            # Beyond int64 (or not parseable by NumPy): fall back to Python numbers
+            numbers = [int(value) if self.types & INTEGER else float(value) for value in values]
+            low, high = min(numbers), max(numbers)
+        self.min_number = low if self.min_number is None else min(self.min_number, low)
+        self.max_number = high if self.max_number is None else max(self.max_number, high)
+
+    def merge(self, other: 'ColumnProfiler') -> None:
+        """Combine with the profile of another part of the same column."""
+        if other.count - other.nulls > 0:
+            if self.count - self.nulls == 0:
+                self.date_format = other.date_format
+                self.datetime_format = other.datetime_format
+                self._formats_detected = other._formats_detected
+                self.sample_value = other.sample_value
+            else:
+                if self.date_format != other.date_format:
+                    self.types &= ~DATE
+                if self.datetime_format != other.datetime_format:
+                    self.types &= ~DATETIME
+            self.types &= other.types
+            for attr, pick in (('min_number', min), ('max_number', max), ('min_text', min), ('max_text', max)):
+                mine, theirs = getattr(self, attr), getattr(other, attr)
+                setattr(self, attr, theirs if mine is None else mine if theirs is None else pick(mine, theirs))
+            self._sketch = np.unique(np.concatenate((self._sketch, other._sketch)))[:DISTINCT_SKETCH_SIZE]
+        self.count += other.count
+        self.nulls += other.nulls
+
+    @property
+    def data_type(self) -> str:
+        """Narrowest type all non-null values satisfy ('unknown' if there are none)."""
+        if self.count - self.nulls == 0:
+            return 'unknown'
+        for bit, name in TYPE_NAMES:
+            if self.types & bit:
+                return name
+        return 'string'
+
+    @property
+    def approx_distinct(self) -> int:
+        """K-minimum-values estimate of the number of distinct non-null values."""
+        if len(self._sketch) < DISTINCT_SKETCH_SIZE:
+            return int(len(self._sketch))
+        kth = float(self._sketch[DISTINCT_SKETCH_SIZE - 1]) / 2.0 ** 64
+        return int((DISTINCT_SKETCH_SIZE - 1) / kth) if kth > 0 else int(len(self._sketch))
+
+    def profile(self) -> Dict[str, Any]:
+        data_type = self.data_type
+        if data_type in ('integer', 'float'):
+            low, high = self.min_number, self.max_number
+        elif (data_type == 'date' and self.date_format in ISO_FORMATS) or \
+                (data_type == 'datetime' and self.datetime_format in ISO_FORMATS):
+            low, high = self.min_text, self.max_text
+        else:
+            low = high = None
+        return {
+            'type': data_type,
+            'count': self.count,
+            'null_ratio': round(self.nulls / self.count, 4) if self.count else 0.0,
+            'min': low,
+            'max': high,
+            'approx_distinct': self.approx_distinct,
+            'date_format': self.date_format if data_type == 'date' else
+                self.datetime_format if data_type == 'datetime' else None,
+        }
+
+
+class TableProfiler:
+    """
+    Profile every column of a CSV file from raw rows (lists of strings in header order).
+
+    Rows are buffered and profiled PROFILE_BLOCK_SIZE at a time; call flush() (or use
+    profile()/data_types(), which flush) after the last rows.
+    """
+
+    def __init__(self, header: List[str], block_size: int = PROFILE_BLOCK_SIZE):
+        self.header = list(header)
+        self.block_size = block_size
+        self.columns = [ColumnProfiler(name) for name in self.header]
+        self._pending: List[List[str]] = []
+
+    def add_rows(self, rows: List[List[str]]) -> None:
+        self._pending.extend(rows)
+        if len(self._pending) >= self.block_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._pending:
+            return
+        width = len(self.header)
+        rows = [row if len(row) >= width else row + [''] * (width - len(row)) for row in self._pending]
+        self._pending = []
+        for column, cells in zip(self.columns, zip(*rows)):
+            column.update(list(cells))
+
+    def merge(self, other: 'TableProfiler') -> None:
+        other.flush()
+        self.flush()
+        for column, other_column in zip(self.columns, other.columns):
+            column.merge(other_column)
+
+    def data_types(self) -> Dict[str, str]:
+        self.flush()
+        return {column.name: column.data_type for column in self.columns}
+
+    def sample_values(self) -> Dict[str, Optional[str]]:
+        self.flush()
+        return {column.name: column.sample_value for column in self.columns}
+
+    def profile(self) -> Dict[str, Dict[str, Any]]:
+        """Column name -> type, count, null_ratio, min, max, approx_distinct, date_format."""
+        self.flush()
+        return {column.name: column.profile() for column in self.columns}
@@ -6,11 +6,17 @@ functionality for both node and relationship CSV files with proper error handlin
 and performance optimizations.
 """
 import csv
+import io
 import logging
-from typing import Dict, List, Optional, Any, Tuple
+import multiprocessing
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, List, Optional, Any, Tuple, Iterator, BinaryIO, Callable
 from pathlib import Path
 from datetime import datetime
 
+from core.column_profile import TableProfiler
+
 logger = logging.getLogger(__name__)
 
 # Constants
@@ -34,6 +40,8 @@ class CSVValidator:
         self.warnings = []
         self.missing_required_columns = []  # Track missing columns from header validation
         self.is_relationship_file = False  # Track if file has relationship columns
+        self.header: List[str] = []
+        self.row_count = 0  # Non-empty data rows seen by validate_row
     
     def validate(self) -> Tuple[bool, List[str], List[str]]:
         """
@@ -59,21 +67,9 @@ class CSVValidator:
                 reader = csv.reader(f)
                 header = next(reader, None)
                 
-                if not header:
-                    self.errors.append("First row MUST contain column headers (property names)")
-                    return False, self.errors, self.warnings
-                
-                # Validate header format
-                if not all(col.strip() for col in header):
-                    self.errors.append("First row MUST contain column headers (property names)")
+                if not self.validate_header(header):
                     return False, self.errors, self.warnings
                 
-                # Detect file type and validate required columns
-                self._validate_required_columns(header)
-                
-                # Validate header for duplicates
-                self._validate_header_duplicates(header)
-                
                 # Validate rows
                 self._validate_rows(reader, header)
         
@@ -87,6 +83,39 @@ class CSVValidator:
             self.errors.append(f"Error reading CSV file: {e}")
             return False, self.errors, self.warnings
         
+        return self.finish()
+    
+    def validate_header(self, header: Optional[List[str]]) -> bool:
+        """
+        Validate the header row: presence, required columns and duplicates.
+        
+        Returns:
+            False if the header is unusable (rows cannot be validated), True otherwise
+        """
+        # First row MUST contain column headers
+        if not header or not all(col.strip() for col in header):
+            self.errors.append("First row MUST contain column headers (property names)")
+            return False
+        
+        self.header = header
+        
+        # Detect file type and validate required columns
+        self._validate_required_columns(header)
+        
+        # Validate header for duplicates
+        self._validate_header_duplicates(header)
+        return True
+    
+    def finish(self) -> Tuple[bool, List[str], List[str]]:
+        """
+        Finalize validation after all rows have been passed to validate_row.
+        
+        Returns:
+            Tuple of (is_valid, errors, warnings)
+        """
+        if self.header and self.row_count == 0:
+            self.warnings.append("No data rows found")
+        
         # Consolidate similar errors before returning
         self._consolidate_errors()
         
@@ -187,42 +216,45 @@ class CSVValidator:
         For very large files, validation is limited to first MAX_ROW_VALIDATION rows
         to prevent performance issues.
         """
-        row_count = 0
-        expected_col_count = len(header)
+        for row_num, row in enumerate(reader, start=2):  # Start at 2 (header is row 1)
+            self.validate_row(row, row_num)
+    
+    def validate_row(self, row: List[str], row_num: int) -> None:
+        """
+        Validate one data row (row_num is the 1-based line of the record, header is row 1).
+        
+        Only the first MAX_ROW_VALIDATION non-empty rows are checked.
+        """
+        # Skip completely empty rows (trailing newlines)
+        if not row or all(not cell.strip() for cell in row):
+            return
+        
+        self.row_count += 1
         validation_limit = MAX_ROW_VALIDATION
         
-        for row_num, row in enumerate(reader, start=2):  # Start at 2 (header is row 1)
-            # Skip completely empty rows (trailing newlines)
-            if not row or all(not cell.strip() for cell in row):
-                continue
-            
-            row_count += 1
-            
-            # Limit validation for very large files
-            if row_count > validation_limit:
-                if row_count == validation_limit + 1:
-                    self.warnings.append(
-                        f"File has more than {validation_limit} rows. "
-                        f"Validation limited to first {validation_limit} rows."
-                    )
-                continue
-            
-            # All rows must have the same number of columns
-            if len(row) != expected_col_count:
-                self.errors.append(
-                    f"Row {row_num}: All rows must have the same number of columns "
-                    f"({len(row)} vs {expected_col_count})"
+        # Limit validation for very large files
+        if self.row_count > validation_limit:
+            if self.row_count == validation_limit + 1:
+                self.warnings.append(
+                    f"File has more than {validation_limit} rows. "
+                    f"Validation limited to first {validation_limit} rows."
                 )
-                continue
-            
-            # Validate CSV escaping for special characters
-            self._validate_csv_escaping(row, row_num)
-            
-            # Validate row data
-            self._validate_row_data(row, header, row_num)
+            return
         
-        if row_count == 0:
-            self.warnings.append("No data rows found")
+        # All rows must have the same number of columns
+        expected_col_count = len(self.header)
+        if len(row) != expected_col_count:
+            self.errors.append(
+                f"Row {row_num}: All rows must have the same number of columns "
+                f"({len(row)} vs {expected_col_count})"
+            )
+            return
+        
+        # Validate CSV escaping for special characters
+        self._validate_csv_escaping(row, row_num)
+        
+        # Validate row data
+        self._validate_row_data(row, self.header, row_num)
     
     def _validate_csv_escaping(self, row: List[str], row_num: int) -> None:
         """Validate proper CSV escaping for special characters."""
@@ -360,6 +392,370 @@ class RelationshipCSVValidator(CSVValidator):
             self.warnings.append(f"Row {row_num}: The source and target IDs are the same. This creates a self-referencing relationship.")
 
 
+class ByteCountingLineReader:
+    """
+    Iterate a binary file as decoded text lines while tracking the byte offset consumed.
+    
+    csv.reader pulls whole lines from this iterator (and keeps pulling for quoted
+    fields spanning several lines), so `position` always sits on a record boundary
+    between rows.
+    """
+    
+    def __init__(self, file_obj: BinaryIO, encoding: str = 'utf-8'):
+        self._file = file_obj
+        self.encoding = encoding
+        self.position = file_obj.tell()
+    
+    def __iter__(self) -> 'ByteCountingLineReader':
+        return self
+    
+    def __next__(self) -> str:
+        line = self._file.readline()
+        if not line:
+            raise StopIteration
+        self.position += len(line)
+        return line.decode(self.encoding)
+
+
+def _parse_boolean(value: str) -> bool:
+    return value.lower() in ('true', '1', 'yes')
+
+
+def _parse_date(value: str) -> Any:
+    # Try common date formats; return as string if parsing fails
+    for fmt in ('%Y-%m-%d', '%m/%d/%Y', '%d/%m/%Y'):
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    return value
+
+
+def _parse_datetime(value: str) -> Any:
+    # Try common datetime formats; return as string if parsing fails
+    for fmt in ('%Y-%m-%d %H:%M:%S', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%d %H:%M:%S.%f'):
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    return value
+
+
+# Parsers by detected data type (strings have none). They may raise ValueError/TypeError.
+VALUE_PARSERS = {
+    'integer': int,
+    'float': float,
+    'boolean': _parse_boolean,
+    'date': _parse_date,
+    'datetime': _parse_datetime,
+}
+
+
+def _int_or_value(value: str) -> Any:
+    try:
+        return int(value)
+    except (ValueError, TypeError):
+        return value
+
+
+def _float_or_value(value: str) -> Any:
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return value
+
+
+def _id_value(value: str) -> Any:
+    """Relationship endpoint ids: integer-looking strings become ints to match node ids."""
+    if value.isdigit() or (value.startswith('-') and value[1:].isdigit()):
+        return int(value)
+    return value
+
+
+# Converters applied during ingestion (dates are stored as strings). Unlike
+# VALUE_PARSERS they never raise: unparseable values are kept as they are.
+INGEST_CONVERTERS = {
+    'integer': _int_or_value,
+    'float': _float_or_value,
+    'boolean': _parse_boolean,
+}
+
+
+# Raising counterparts of INGEST_CONVERTERS, used for the all-valid fast path
+STRICT_INGEST_PARSERS = {
+    _int_or_value: int,
+    _float_or_value: float,
+}
+
+
+class NodeRowConverter:
+    """
+    Convert raw node CSV rows (see CSVProcessor.iter_batches(raw=True)) to property dicts.
+    
+    The per-column plan (property name and converter) is compiled once per file, so
+    converting a row is a single pass over its cells with no type lookups. Instances
+    only hold module-level functions and plain data, so they can be pickled.
+    
+    Args:
+        header: CSV header
+        data_types: Detected type per column (metadata['data_types'])
+        id_column: Column converted to int regardless of its detected type
+        constants: Properties added to every row (e.g. dataset_id)
+    """
+    
+    def __init__(
+        self,
+        header: List[str],
+        data_types: Dict[str, str],
+        id_column: Optional[str] = None,
+        constants: Optional[Dict[str, Any]] = None
+    ):
+        self.width = len(header)
+        self.names = tuple(header)
+        converters = {name: INGEST_CONVERTERS.get(data_types.get(name, 'string')) for name in header}
+        if id_column is not None:
+            converters[id_column] = _int_or_value
+        # Only typed columns are visited per row; string columns are copied by zip()
+        self.converted = tuple(
+            (index, name, converters[name]) for index, name in enumerate(header)
+            if converters[name] is not None
+        )
+        self.constants = dict(constants or {})
+    
+    def __call__(self, row: List[str]) -> Dict[str, Any]:
+        if len(row) < self.width:
+            row = row + [''] * (self.width - len(row))
+        values = [value.strip() if value else None for value in row]
+        props = dict(zip(self.names, values))
+        for index, name, convert in self.converted:
+            value = values[index]
+            if value:
+                props[name] = convert(value)
+        props.update(self.constants)
+        return props
+    
+    def convert_batch(self, rows: List[List[str]]) -> List[Dict[str, Any]]:
+        """
+        Convert a batch column by column: each typed column is first parsed with a
+        single map(int/float, ...) and only falls back to per-value conversion when
+        that fails (empty or malformed cells).
+        """
+        width = self.width
+        table = [
+            [value.strip() if value else None for value in (row if len(row) >= width else row + [''] * (width - len(row)))]
+            for row in rows
+        ]
+        names = self.names
+        records = [dict(zip(names, values)) for values in table]
+        for index, name, convert in self.converted:
+            column = [values[index] for values in table]
+            parse = STRICT_INGEST_PARSERS.get(convert)
+            try:
+                if parse is None:
+                    raise ValueError
+                converted = list(map(parse, column))
+            except (ValueError, TypeError):
+                converted = [convert(value) if value else value for value in column]
+            for record, value in zip(records, converted):
+                record[name] = value
+        if self.constants:
+            for record in records:
+                record.update(self.constants)
+        return records
+
+
+class RelationshipRowConverter:
+    """
+    Convert raw relationship CSV rows to {'source_id', 'target_id', 'properties'} dicts.
+    
+    The source and target id columns are resolved once from the header: either
+    ``Label:source_id`` / ``Label:target_id`` for the given labels or plain
+    ``source_id`` / ``target_id`` (the last matching column wins). Every other column
+    becomes a property; empty values are stored as None.
+    
+    Args:
+        header: CSV header
+        data_types: Detected type per column (metadata['data_types'])
+        source_label: Label of the source nodes
+        target_label: Label of the target nodes
+        constants: Properties added to every relationship (e.g. dataset_id)
+    """
+    
+    def __init__(
+        self,
+        header: List[str],
+        data_types: Dict[str, str],
+        source_label: Optional[str],
+        target_label: Optional[str],
+        constants: Optional[Dict[str, Any]] = None
+    ):
+        self.width = len(header)
+        self.source_index: Optional[int] = None
+        self.target_index: Optional[int] = None
+        properties = []
+        for index, name in enumerate(header):
+            key = name.lower().strip()
+            if ':' in name:
+                label_part, id_part = (part.strip() for part in name.split(':', 1))
+                id_part = id_part.lower()
+                if id_part == 'source_id' and label_part == source_label:
+                    self.source_index = index
+                elif id_part == 'target_id' and label_part == target_label:
+                    self.target_index = index
+            elif key == 'source_id':
+                self.source_index = index
+            elif key == 'target_id':
+                self.target_index = index
+            if key not in ('source_id', 'target_id'):
+                properties.append((index, name, INGEST_CONVERTERS.get(data_types.get(name, 'string'))))
+        self.properties = tuple((index, name) for index, name, _ in properties)
+        self.converted = tuple(column for column in properties if column[2] is not None)
+        self.constants = dict(constants or {})
+    
+    def __call__(self, row: List[str]) -> Optional[Dict[str, Any]]:
+        """Return the relationship for a row, or None if its source or target id is missing."""
+        if len(row) < self.width:
+            row = row + [''] * (self.width - len(row))
+        source_id = row[self.source_index].strip() if self.source_index is not None else ''
+        target_id = row[self.target_index].strip() if self.target_index is not None else ''
+        if not source_id or not target_id:
+            return None
+        values = [value.strip() for value in row]
+        props = {name: values[index] or None for index, name in self.properties}
+        for index, name, convert in self.converted:
+            value = values[index]
+            if value:
+                props[name] = convert(value)
+        props.update(self.constants)
+        return {
+            'source_id': _id_value(source_id),
+            'target_id': _id_value(target_id),
+            'properties': props,
+        }
+    
+    def convert_batch(self, rows: List[List[str]]) -> List[Optional[Dict[str, Any]]]:
+        """Convert a batch; the result has one entry per row (None for rows without ids)."""
+        return [self(row) for row in rows]
+
+
+def _last_record_end(block: bytes, quoted: bool) -> Optional[int]:
+    """
+    Offset just past the last newline in block that ends a record, or None.
+    
+    A newline ends a record when it is outside a quoted field, i.e. when an even
+    number of quote characters precede it (an escaped quote "" counts twice, so it
+    never changes the parity). ``quoted`` is the parity at the start of the block.
+    """
+    parity = (int(quoted) + block.count(b'"')) % 2
+    pos = len(block)
+    while True:
+        newline = block.rfind(b'\n', 0, pos)
+        if newline < 0:
+            return None
+        parity ^= block.count(b'"', newline, pos) % 2
+        if not parity:
+            return newline + 1
+        pos = newline
+
+
+def iter_record_ranges(file_path: str, start: int, end: int, chunk_bytes: int) -> Iterator[Tuple[int, int]]:
+    """
+    Split bytes [start, end) of a CSV file into ranges of about chunk_bytes that each
+    begin and end on a record boundary, so they can be parsed independently.
+    
+    Quoted fields containing newlines are kept whole by tracking quote parity; this
+    relies on quotes only appearing as field delimiters or doubled inside quoted
+    fields (see CSVValidator._validate_csv_escaping). A record longer than chunk_bytes
+    simply makes its range longer.
+    """
+    with open(file_path, 'rb') as f:
+        range_start = position = start
+        quoted = False
+        f.seek(start)
+        while position < end:
+            block = f.read(min(chunk_bytes, end - position))
+            if not block:
+                break
+            if position + len(block) >= end:
+                break
+            split = _last_record_end(block, quoted)
+            if split is None:
+                quoted ^= bool(block.count(b'"') % 2)
+                position += len(block)
+                continue
+            yield range_start, position + split
+            range_start = position = position + split
+            quoted = False
+            f.seek(position)
+        if range_start < end:
+            yield range_start, end
+
+
+def convert_byte_range(
+    file_path: str,
+    start: int,
+    end: int,
+    converter: Callable[[List[List[str]]], List[Any]],
+    batch_size: int,
+    encoding: str = 'utf-8'
+) -> List[List[Any]]:
+    """
+    Parse and convert one record-aligned byte range (worker process entry point).
+    
+    Completely empty rows are skipped, as in CSVProcessor.iter_batches().
+    
+    Args:
+        converter: Picklable object with convert_batch(rows), e.g. NodeRowConverter
+        
+    Returns:
+        Converted batches of at most batch_size rows
+    """
+    with open(file_path, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    try:
+        reader = csv.reader(io.StringIO(data.decode(encoding), newline=''))
+        batches = []
+        batch = []
+        for row in reader:
+            if not row or all(not cell.strip() for cell in row):
+                continue
+            batch.append(row)
+            if len(batch) >= batch_size:
+                batches.append(converter.convert_batch(batch))
+                batch = []
+        if batch:
+            batches.append(converter.convert_batch(batch))
+        return batches
+    except (csv.Error, UnicodeDecodeError) as e:
+        raise CSVProcessingError(f"Failed to parse CSV file (bytes {start}-{end}): {e}")
+
+
+def profile_byte_range(
+    file_path: str,
+    start: int,
+    end: int,
+    header: List[str],
+    encoding: str = 'utf-8'
+) -> TableProfiler:
+    """
+    Profile the rows of one record-aligned byte range (worker process entry point).
+    
+    Completely empty rows are skipped, as in convert_byte_range().
+    """
+    with open(file_path, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    try:
+        reader = csv.reader(io.StringIO(data.decode(encoding), newline=''))
+        profiler = TableProfiler(header)
+        profiler.add_rows([row for row in reader if row and any(cell.strip() for cell in row)])
+        profiler.flush()
+        return profiler
+    except (csv.Error, UnicodeDecodeError) as e:
+        raise CSVProcessingError(f"Failed to parse CSV file (bytes {start}-{end}): {e}")
+
+
 class CSVProcessor:
     """CSV file processor for parsing and type detection."""
     
@@ -373,6 +769,371 @@ class CSVProcessor:
             'data_types': {},
             'sample_values': {}
         }
+        # Streaming state (see open_stream / iter_batches)
+        self.sample_rows: List[Dict[str, Any]] = []
+        self.validation: Optional[Tuple[bool, List[str], List[str]]] = None
+        self._prefix_rows: List[List[str]] = []
+        self.file_size = 0
+        self._stream_file: Optional[BinaryIO] = None
+        self._line_reader: Optional[ByteCountingLineReader] = None
+        self._csv_reader = None
+        self._prefix_end = 0  # Byte offset after the buffered prefix
+        self._parallel_bytes_read: Optional[int] = None
+        # (byte offset, rows) after the last yielded batch that is safe to resume from
+        self._checkpoint: Optional[Tuple[Optional[int], int]] = None
+        # Whole-file column profile, filled by profile_columns()
+        self.column_profiler: Optional[TableProfiler] = None
+    
+    def __enter__(self) -> 'CSVProcessor':
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+    
+    @property
+    def bytes_read(self) -> int:
+        """Bytes consumed from the file so far by the streaming reader."""
+        if self._parallel_bytes_read is not None:
+            return self._parallel_bytes_read
+        return self._line_reader.position if self._line_reader else 0
+    
+    @property
+    def checkpoint(self) -> Optional[Tuple[Optional[int], int]]:
+        """
+        Resume point after the batches yielded so far: (byte offset, rows).
+        
+        rows counts the data rows before the resume point. The offset is None while
+        the point lies inside the buffered prefix, which is re-read on resume and
+        skipped by row count. In parallel mode it only advances at the end of byte
+        ranges, so it may lag behind the last yielded batch. Pass it to skip_to().
+        """
+        return self._checkpoint
+    
+    def skip_to(self, offset: Optional[int], rows: int) -> None:
+        """
+        Continue streaming from a checkpoint taken on an earlier run over the same file.
+        
+        Must be called after open_stream() and before iter_batches() /
+        iter_parallel_batches(). metadata['row_count'] starts at rows, so row counts
+        and checkpoints stay absolute.
+        
+        Raises:
+            CSVProcessingError: If the checkpoint does not fit this file
+        """
+        if rows <= 0:
+            return
+        if offset is None:
+            if rows > len(self._prefix_rows):
+                raise CSVProcessingError(f"Checkpoint row {rows} is past the buffered prefix and has no byte offset")
+            self._prefix_rows = self._prefix_rows[rows:]
+        else:
+            if self._stream_file is None or offset > self.file_size:
+                raise CSVProcessingError(f"Checkpoint offset {offset} is outside the file ({self.file_size} bytes)")
+            self._prefix_rows = []
+            self._stream_file.seek(offset)
+            self._line_reader = ByteCountingLineReader(self._stream_file)
+            self._csv_reader = csv.reader(self._line_reader)
+        self.metadata['row_count'] = rows
+        self._checkpoint = (offset, rows)
+        logger.info(f"Resuming {self.file_path.name} at row {rows} (byte offset {offset})")
+    
+    @property
+    def buffered_row_count(self) -> int:
+        """Rows read into the validated prefix by open_stream and not yet yielded."""
+        return len(self._prefix_rows)
+    
+    def _row_to_dict(self, row: List[str]) -> Dict[str, Any]:
+        """Map a raw CSV row to a header-keyed dict, converting empty strings to None."""
+        return {
+            key: (value.strip() if value else None)
+            for key, value in zip(self.header, row + [None] * (len(self.header) - len(row)))
+        }
+    
+    def open_stream(self, validator: Optional[CSVValidator] = None) -> Dict[str, Any]:
+        """
+        Open the file for streaming ingestion.
+        
+        Reads the header and a bounded prefix of rows, detects column types on the first
+        TYPE_DETECTION_SAMPLE_SIZE rows, and leaves the file positioned after the prefix.
+        Rows are then consumed with iter_batches(), so memory stays O(batch) regardless of
+        file size. Types inferred from the prefix can be replaced by whole-file types with
+        profile_columns().
+        
+        When a validator is given, the header and the first MAX_ROW_VALIDATION rows are
+        validated during the same scan (the prefix is extended to cover them), and the
+        outcome is stored in self.validation before any row is handed to the caller.
+        
+        Args:
+            validator: Optional NodeCSVValidator / RelationshipCSVValidator
+            
+        Returns:
+            File metadata (same shape as get_metadata())
+        """
+        prefix_size = TYPE_DETECTION_SAMPLE_SIZE
+        if validator is not None:
+            # One row past the limit so the "validation limited" warning can be raised
+            prefix_size = max(prefix_size, MAX_ROW_VALIDATION + 1)
+        
+        try:
+            self.file_size = self.file_path.stat().st_size
+            self._stream_file = open(self.file_path, 'rb')
+            self._line_reader = ByteCountingLineReader(self._stream_file)
+            self._csv_reader = csv.reader(self._line_reader)
+            header = next(self._csv_reader, None)
+            
+            if validator is not None:
+                if self.file_size == 0:
+                    validator.errors.append("Empty file")
+                    self.validation = (False, validator.errors, validator.warnings)
+                    self.close()
+                    return self.get_metadata()
+                if not validator.validate_header(header):
+                    self.validation = (False, validator.errors, validator.warnings)
+                    self.close()
+                    return self.get_metadata()
+            
+            self.header = header or []
+            self.metadata['column_count'] = len(self.header)
+            
+            self._prefix_rows = []
+            row_num = 1  # Header is row 1
+            for row in self._csv_reader:
+                row_num += 1
+                if validator is not None:
+                    validator.validate_row(row, row_num)
+                if not row or all(not cell.strip() for cell in row):
+                    continue
+                self._prefix_rows.append(row)
+                if len(self._prefix_rows) >= prefix_size:
+                    break
+            self._prefix_end = self._line_reader.position
+            
+            self.sample_rows = [
+                self._row_to_dict(row) for row in self._prefix_rows[:TYPE_DETECTION_SAMPLE_SIZE]
+            ]
+            # Types are inferred from the whole buffered prefix, not just the sample rows
+            self._detect_column_types(self._prefix_rows)
+            if validator is not None:
+                self.validation = validator.finish()
+            return self.get_metadata()
+        except (csv.Error, UnicodeDecodeError) as e:
+            self.close()
+            if validator is None:
+                logger.error(f"Error opening CSV stream: {e}")
+                raise CSVProcessingError(f"Failed to parse CSV file: {e}")
+            if isinstance(e, csv.Error):
+                validator.errors.append(f"CSV parsing error: {e}")
+            else:
+                validator.errors.append(f"File encoding error: {e}")
+            self.validation = (False, validator.errors, validator.warnings)
+            return self.get_metadata()
+        except Exception as e:
+            self.close()
+            logger.error(f"Error opening CSV stream: {e}")
+            if validator is not None:
+                validator.errors.append(f"Error reading CSV file: {e}")
+                self.validation = (False, validator.errors, validator.warnings)
+                return self.get_metadata()
+            raise CSVProcessingError(f"Failed to parse CSV file: {e}")
+    
+    def profile_columns(self, workers: int = 1, chunk_bytes: int = 4 * 1024 * 1024) -> Dict[str, Any]:
+        """
+        Profile every column over the whole file and detect column types from it.
+        
+        open_stream() only sees the buffered prefix, so a float far down an "integer"
+        column would be converted as text. This pass reads the file once more, in
+        record-aligned byte ranges (profiled in worker processes when workers > 1 and
+        merged here), without moving the streaming position. Call it after open_stream()
+        and before skip_to(): a resumed run then converts with the same types as the
+        first one.
+        
+        Args:
+            workers: Number of worker processes (1: profile in the calling thread)
+            chunk_bytes: Approximate size of a byte range
+            
+        Returns:
+            File metadata with the whole-file data types and column profile
+        """
+        profiler = TableProfiler(self.header)
+        profiler.add_rows(self._prefix_rows)
+        ranges = iter_record_ranges(str(self.file_path), self._prefix_end, self.file_size, chunk_bytes)
+        if workers > 1 and self._prefix_end < self.file_size:
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+                futures = [
+                    pool.submit(profile_byte_range, str(self.file_path), start, end, self.header)
+                    for start, end in ranges
+                ]
+                for future in futures:
+                    profiler.merge(future.result())
+        else:
+            for start, end in ranges:
+                profiler.merge(profile_byte_range(str(self.file_path), start, end, self.header))
+        
+        self.column_profiler = profiler
+        self.metadata['data_types'] = profiler.data_types()
+        self.metadata['sample_values'] = profiler.sample_values()
+        self.metadata['column_profile'] = profiler.profile()
+        return self.get_metadata()
+    
+    def _emit(self, batch: List[List[str]], raw: bool, offset: Optional[int] = None) -> List[Any]:
+        self.metadata['row_count'] += len(batch)
+        self._checkpoint = (offset, self.metadata['row_count'])
+        return batch if raw else [self._row_to_dict(row) for row in batch]
+    
+    def iter_batches(self, batch_size: int, raw: bool = False) -> Iterator[List[Any]]:
+        """
+        Yield rows in batches of batch_size, starting with the buffered prefix.
+        
+        Completely empty rows are skipped. metadata['row_count'] counts the rows yielded
+        so far; it equals the total row count once the generator is exhausted. The file
+        is closed at the end.
+        
+        Args:
+            batch_size: Number of rows per batch
+            raw: Yield the unprocessed CSV rows (lists of strings in header order, for a
+                NodeRowConverter / RelationshipRowConverter) instead of header-keyed dicts
+        """
+        if self._csv_reader is None and not self._prefix_rows:
+            self.open_stream()
+        
+        try:
+            batch = []
+            prefix_rows, self._prefix_rows = self._prefix_rows, []
+            for row in prefix_rows:
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    yield self._emit(batch, raw)
+                    batch = []
+            del prefix_rows
+            
+            streamed = False
+            if self._csv_reader is not None:
+                for row in self._csv_reader:
+                    streamed = True
+                    if not row or all(not cell.strip() for cell in row):
+                        continue
+                    batch.append(row)
+                    if len(batch) >= batch_size:
+                        yield self._emit(batch, raw, self._line_reader.position)
+                        batch = []
+            
+            if batch:
+                yield self._emit(batch, raw, self._line_reader.position if streamed else None)
+            
+            logger.info(
+                f"Streamed CSV file: {self.metadata['row_count']} rows, "
+                f"{self.metadata['column_count']} columns"
+            )
+        except (csv.Error, UnicodeDecodeError) as e:
+            logger.error(f"Error streaming CSV file: {e}")
+            raise CSVProcessingError(f"Failed to parse CSV file: {e}")
+        finally:
+            self.close()
+    
+    def iter_parallel_batches(
+        self,
+        batch_size: int,
+        converter: Any,
+        workers: int,
+        chunk_bytes: int = 4 * 1024 * 1024,
+        ordered: bool = True
+    ) -> Iterator[List[Any]]:
+        """
+        Yield converted batches, parsing the remainder of the file in worker processes.
+        
+        The buffered prefix is converted here; the rest of the file (after the prefix) is
+        split into record-aligned byte ranges that are parsed and converted by a
+        ProcessPoolExecutor, with at most 2 * workers ranges in flight.
+        
+        Args:
+            batch_size: Maximum rows per batch
+            converter: Picklable NodeRowConverter / RelationshipRowConverter
+            workers: Number of worker processes
+            chunk_bytes: Approximate size of a byte range
+            ordered: Yield batches in file order; if False, ranges are yielded as they
+                complete (only for callers that do not depend on row order)
+        """
+        if self._csv_reader is None and not self._prefix_rows:
+            self.open_stream()
+        
+        start = self._line_reader.position if self._line_reader else 0
+        end = self.file_size
+        self.close()
+        
+        prefix_rows, self._prefix_rows = self._prefix_rows, []
+        for offset in range(0, len(prefix_rows), batch_size):
+            rows = prefix_rows[offset:offset + batch_size]
+            batch = converter.convert_batch(rows)
+            self.metadata['row_count'] += len(batch)
+            self._checkpoint = (None, self.metadata['row_count'])
+            yield batch
+        del prefix_rows
+        
+        self._parallel_bytes_read = start
+        if start >= end:
+            return
+        
+        # Ranges may complete out of order: the checkpoint only covers the ranges that,
+        # together with everything before them, have been yielded
+        finished_ranges: Dict[int, Tuple[int, int]] = {}
+        next_range = 0
+        contiguous = (start, self.metadata['row_count'])
+        
+        # Spawned (not forked) workers: the parent runs event loop and executor threads
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+        ranges = enumerate(iter_record_ranges(str(self.file_path), start, end, chunk_bytes))
+        pending = deque()
+        try:
+            while True:
+                while len(pending) < 2 * workers:
+                    index, byte_range = next(ranges, (None, None))
+                    if byte_range is None:
+                        break
+                    future = pool.submit(
+                        convert_byte_range, str(self.file_path), byte_range[0], byte_range[1],
+                        converter, batch_size
+                    )
+                    pending.append((future, index, byte_range))
+                if not pending:
+                    break
+                
+                if ordered:
+                    completed = [pending.popleft()]
+                else:
+                    done, _ = wait([item[0] for item in pending], return_when=FIRST_COMPLETED)
+                    completed = [item for item in pending if item[0] in done]
+                    for item in completed:
+                        pending.remove(item)
+                
+                for future, index, (range_start, range_end) in completed:
+                    batches = future.result()
+                    self._parallel_bytes_read += range_end - range_start
+                    finished_ranges[index] = (range_end, sum(len(batch) for batch in batches))
+                    while next_range in finished_ranges:
+                        range_end, range_rows = finished_ranges.pop(next_range)
+                        contiguous = (range_end, contiguous[1] + range_rows)
+                        next_range += 1
+                    if not batches:
+                        self._checkpoint = contiguous
+                    for batch_index, batch in enumerate(batches):
+                        self.metadata['row_count'] += len(batch)
+                        if batch_index == len(batches) - 1:
+                            self._checkpoint = contiguous
+                        yield batch
+            
+            logger.info(
+                f"Streamed CSV file with {workers} worker processes: {self.metadata['row_count']} rows, "
+                f"{self.metadata['column_count']} columns"
+            )
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+    
+    def close(self) -> None:
+        """Close the streaming file handle, if open."""
+        if self._stream_file is not None:
+            self._stream_file.close()
+            self._stream_file = None
+            self._csv_reader = None
     
     def parse(self) -> List[Dict[str, Any]]:
         """
@@ -397,7 +1158,7 @@ class CSVProcessor:
                     self.metadata['row_count'] += 1
                 
                 # Detect data types
-                self._detect_data_types()
+                self._detect_data_types(self.data)
                 
                 logger.info(
                     f"Parsed CSV file: {self.metadata['row_count']} rows, "
@@ -410,122 +1171,22 @@ class CSVProcessor:
             logger.error(f"Error parsing CSV file: {e}")
             raise CSVProcessingError(f"Failed to parse CSV file: {e}")
     
-    def _detect_data_types(self) -> None:
-        """Detect data types for each column using optimized list comprehension."""
-        if not self.data:
-            return
-        
-        # Pre-extract non-null values for all columns at once for better performance
-        for col in self.header:
-            # Use generator expression for memory efficiency
-            values = [row[col] for row in self.data if row.get(col) is not None]
-            
-            if not values:
-                self.metadata['data_types'][col] = 'unknown'
-                self.metadata['sample_values'][col] = None
-                continue
-            
-            # Store sample value
-            self.metadata['sample_values'][col] = values[0]
-            
-            # Detect type
-            detected_type = self._detect_column_type(values)
-            self.metadata['data_types'][col] = detected_type
+    def _detect_data_types(self, rows: List[Dict[str, Any]]) -> None:
+        """Detect data types for each column of header-keyed rows."""
+        self._detect_column_types([[row.get(col) for col in self.header] for row in rows])
     
-    def _detect_column_type(self, values: List[str]) -> str:
+    def _detect_column_types(self, rows: List[List[str]]) -> None:
         """
-        Detect the data type of a column based on sample values.
-        
-        Uses early return pattern for performance optimization.
-        
-        Returns:
-            Type string: 'integer', 'float', 'boolean', 'date', 'datetime', 'string'
+        Detect data types for each column of raw rows with a TableProfiler (vectorized,
+        with type promotion over all given rows) and keep its profile in the metadata.
         """
-        if not values:
-            return 'string'
-        
-        # Sample values for type detection (optimize for large files)
-        sample = values[:TYPE_DETECTION_SAMPLE_SIZE]
-        
-        # Check for integers (most common, check first)
-        if all(self._is_integer(v) for v in sample):
-            return 'integer'
-        
-        # Check for floats
-        if all(self._is_float(v) for v in sample):
-            return 'float'
-        
-        # Check for booleans
-        if all(self._is_boolean(v) for v in sample):
-            return 'boolean'
-        
-        # Check for dates/datetimes
-        if all(self._is_date(v) for v in sample):
-            return 'date'
-        
-        if all(self._is_datetime(v) for v in sample):
-            return 'datetime'
-        
-        # Default to string
-        return 'string'
-    
-    @staticmethod
-    def _is_integer(value: str) -> bool:
-        """Check if value is an integer."""
-        try:
-            int(value)
-            return True
-        except (ValueError, TypeError):
-            return False
-    
-    @staticmethod
-    def _is_float(value: str) -> bool:
-        """Check if value is a float."""
-        try:
-            float(value)
-            return True
-        except (ValueError, TypeError):
-            return False
-    
-    @staticmethod
-    def _is_boolean(value: str) -> bool:
-        """Check if value is a boolean."""
-        return value.lower() in ['true', 'false', '1', '0', 'yes', 'no']
-    
-    @staticmethod
-    def _is_date(value: str) -> bool:
-        """Check if value is a date."""
-        date_formats = [
-            '%Y-%m-%d',
-            '%m/%d/%Y',
-            '%d/%m/%Y',
-            '%Y/%m/%d',
-        ]
-        for fmt in date_formats:
-            try:
-                datetime.strptime(value, fmt)
-                return True
-            except ValueError:
-                continue
-        return False
-    
-    @staticmethod
-    def _is_datetime(value: str) -> bool:
-        """Check if value is a datetime."""
-        datetime_formats = [
-            '%Y-%m-%d %H:%M:%S',
-            '%Y-%m-%dT%H:%M:%S',
-            '%Y-%m-%d %H:%M:%S.%f',
-            '%Y-%m-%dT%H:%M:%S.%f',
-            '%m/%d/%Y %H:%M:%S',
-        ]
-        for fmt in datetime_formats:
-            try:
-                datetime.strptime(value, fmt)
-                return True
-            except ValueError:
-                continue
-        return False
+        if not rows:
+            return
+        profiler = TableProfiler(self.header)
+        profiler.add_rows(rows)
+        self.metadata['data_types'] = profiler.data_types()
+        self.metadata['sample_values'] = profiler.sample_values()
+        self.metadata['column_profile'] = profiler.profile()
     
     def convert_value(self, value: str, data_type: str) -> Any:
         """
@@ -541,31 +1202,11 @@ class CSVProcessor:
         if value is None or value == '':
             return None
         
+        parser = VALUE_PARSERS.get(data_type)
+        if parser is None:
+            return value  # String type
         try:
-            if data_type == 'integer':
-                return int(value)
-            elif data_type == 'float':
-                return float(value)
-            elif data_type == 'boolean':
-                return value.lower() in ['true', '1', 'yes']
-            elif data_type == 'date':
-                # Try common date formats
-                for fmt in ['%Y-%m-%d', '%m/%d/%Y', '%d/%m/%Y']:
-                    try:
-                        return datetime.strptime(value, fmt).date()
-                    except ValueError:
-                        continue
-                return value  # Return as string if parsing fails
-            elif data_type == 'datetime':
-                # Try common datetime formats
-                for fmt in ['%Y-%m-%d %H:%M:%S', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%d %H:%M:%S.%f']:
-                    try:
-                        return datetime.strptime(value, fmt)
-                    except ValueError:
-                        continue
-                return value  # Return as string if parsing fails
-            else:
-                return value  # String type
+            return parser(value)
         except (ValueError, TypeError) as e:
             logger.warning(f"Failed to convert value '{value}' to {data_type}: {e}")
             return value  # Return original value if conversion fails
@@ -580,6 +1221,7 @@ class CSVProcessor:
             'columns': self.header,
             'data_types': self.metadata['data_types'],
             'sample_values': self.metadata['sample_values'],
+            'column_profile': self.metadata.get('column_profile', {}),
         }
 
 
@@ -613,6 +1255,57 @@ def validate_relationship_csv(file_path: str, relationship_type: Optional[str] =
     return validator.validate()
 
 
+def detect_file_type_from_header(header: Optional[List[str]]) -> str:
+    """
+    Detect if a CSV header belongs to a node or relationship file.
+    
+    Args:
+        header: List of column names (None or empty defaults to 'node')
+        
+    Returns:
+        'node' or 'relationship'
+    """
+    if not header:
+        # Default to node if we can't read header
+        return 'node'
+    
+    header_lower = [col.lower().strip() for col in header]
+    
+    # Check if it has relationship indicators (old format: source_id/target_id)
+    has_source_id = 'source_id' in header_lower
+    has_target_id = 'target_id' in header_lower
+    
+    # Check for new format: Label:source_id or Label:target_id
+    has_label_format = any(':' in col and ('source_id' in col.lower() or 'target_id' in col.lower()) for col in header)
+    
+    if (has_source_id and has_target_id) or has_label_format:
+        return 'relationship'
+    
+    # Default to node
+    return 'node'
+
+
+def sniff_csv_header(head: bytes) -> Optional[List[str]]:
+    """
+    Parse the header row from the leading bytes of an upload.
+    
+    Lets the upload views classify a file from the chunk they are already writing,
+    instead of re-opening the temp file.
+    
+    Args:
+        head: Leading bytes of the file (must contain the whole first line)
+        
+    Returns:
+        List of column names, or None if the bytes are empty or not valid UTF-8
+    """
+    first_line, _, _ = head.partition(b'\n')
+    try:
+        text = first_line.decode('utf-8')
+    except UnicodeDecodeError:
+        return None
+    return next(csv.reader([text]), None)
+
+
 def detect_file_type(file_path: str) -> str:
     """
     Detect if a CSV file is a node or relationship file by examining its header.
@@ -626,26 +1319,7 @@ def detect_file_type(file_path: str) -> str:
     try:
         with open(file_path, 'r', encoding='utf-8') as f:
             reader = csv.reader(f)
-            header = next(reader, None)
-            
-            if not header:
-                # Default to node if we can't read header
-                return 'node'
-            
-            header_lower = [col.lower().strip() for col in header]
-            
-            # Check if it has relationship indicators (old format: source_id/target_id)
-            has_source_id = 'source_id' in header_lower
-            has_target_id = 'target_id' in header_lower
-            
-            # Check for new format: Label:source_id or Label:target_id
-            has_label_format = any(':' in col and ('source_id' in col.lower() or 'target_id' in col.lower()) for col in header)
-            
-            if (has_source_id and has_target_id) or has_label_format:
-                return 'relationship'
-            
-            # Default to node
-            return 'node'
+            return detect_file_type_from_header(next(reader, None))
     except Exception as e:
         logger.warning(f"Error detecting file type for {file_path}: {e}")
         # Default to node on error
@@ -721,6 +1395,54 @@ def parse_relationship_header(header: List[str]) -> Tuple[Optional[str], Optiona
     return source_label, target_label, source_col, target_col, errors
 
 
+def stream_csv(file_path: str) -> Tuple[CSVProcessor, Dict[str, Any]]:
+    """
+    Open a CSV file for streaming ingestion.
+    
+    Type detection runs on the first TYPE_DETECTION_SAMPLE_SIZE rows only; rows are
+    then read with processor.iter_batches(batch_size). open_validated_stream buffers
+    (and therefore type-checks) the first MAX_ROW_VALIDATION rows instead.
+    
+    Args:
+        file_path: Path to CSV file
+        
+    Returns:
+        Tuple of (processor, metadata)
+    """
+    processor = CSVProcessor(file_path)
+    metadata = processor.open_stream()
+    return processor, metadata
+
+
+def open_validated_stream(
+    file_path: str,
+    validator: CSVValidator,
+) -> Tuple[CSVProcessor, Dict[str, Any], Tuple[bool, List[str], List[str]]]:
+    """
+    Open a CSV file for single-pass ingestion: header sniffing, validation and typed
+    batches all come from one scan of the file.
+    
+    The header and first MAX_ROW_VALIDATION rows are validated while they are buffered,
+    so the validation outcome (same errors/warnings structure as validator.validate())
+    is known before any row is written. Rows are then read with
+    processor.iter_batches(batch_size), continuing from where validation stopped.
+    
+    Args:
+        file_path: Path to CSV file
+        validator: NodeCSVValidator or RelationshipCSVValidator for the file
+        
+    Returns:
+        Tuple of (processor, metadata, (is_valid, errors, warnings))
+    """
+    if not Path(file_path).exists():
+        validator.errors.append(f"File not found: {Path(file_path).name}")
+        return CSVProcessor(file_path), {}, (False, validator.errors, validator.warnings)
+    
+    processor = CSVProcessor(file_path)
+    metadata = processor.open_stream(validator)
+    return processor, metadata, processor.validation
+
+
 def parse_csv(file_path: str) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
     """
     Parse a CSV file and return data with metadata.
@@ -0,0 +1,104 @@
+"""
+Endpoint resolution for relationship ingestion.
+
+Matching the endpoints of every relationship by (label, id, dataset_id) costs two index
+seeks per row inside Neo4j, even when the same node is the endpoint of thousands of rows.
+EndpointResolver resolves the distinct ids of a batch to element ids in one query per
+label, keeps them for the rest of the upload, and relationships are then written with
+``MATCH (n) WHERE elementId(n) = ...`` (see Neo4jClient.create_relationships_batch).
+
+Integer ids in [0, capacity) are kept in an array indexed by the id, other ids in an
+LRU bounded to capacity entries. Ids that do not exist are not cached, so nodes created
+while the upload runs are found by the next batch.
+"""
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional
+from django.conf import settings
+
+from core.neo4j_client import neo4j_client
+
+logger = logging.getLogger(__name__)
+
+
+class EndpointResolver:
+    """
+    Cache of id -> element id for the nodes of one label in one dataset.
+
+    Args:
+        label: Node label
+        dataset_id: Dataset id stored on the nodes
+        capacity: Size of the integer id array and maximum number of other ids kept
+            (default INGEST_ENDPOINT_CACHE_SIZE)
+        id_property: Node id property
+    """
+
+    def __init__(self, label: str, dataset_id: int, capacity: Optional[int] = None, id_property: str = 'id'):
+        self.label = label
+        self.dataset_id = dataset_id
+        self.capacity = max(1, capacity or settings.INGEST_ENDPOINT_CACHE_SIZE)
+        self.id_property = id_property
+        self._dense: List[Optional[str]] = []  # Grown on demand up to capacity
+        self._lru: 'OrderedDict[Any, str]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.queries = 0
+
+    def _is_dense(self, node_id: Any) -> bool:
+        return type(node_id) is int and 0 <= node_id < self.capacity
+
+    def _get(self, node_id: Any) -> Optional[str]:
+        if self._is_dense(node_id):
+            return self._dense[node_id] if node_id < len(self._dense) else None
+        element_id = self._lru.get(node_id)
+        if element_id is not None:
+            self._lru.move_to_end(node_id)
+        return element_id
+
+    def _put(self, node_id: Any, element_id: str) -> None:
+        if self._is_dense(node_id):
+            if node_id >= len(self._dense):
+                self._dense.extend([None] * (node_id + 1 - len(self._dense)))
+            self._dense[node_id] = element_id
+            return
+        self._lru[node_id] = element_id
+        self._lru.move_to_end(node_id)
+        if len(self._lru) > self.capacity:
+            self._lru.popitem(last=False)
+
+    async def resolve(self, ids: Iterable[Any]) -> Dict[Any, str]:
+        """
+        Element ids of the given node ids, querying Neo4j for the ones not cached.
+
+        Returns:
+            Dict of id -> element id for the ids that exist
+        """
+        resolved = {}
+        missing = []
+        for node_id in set(ids):
+            element_id = self._get(node_id)
+            if element_id is None:
+                missing.append(node_id)
+            else:
+                resolved[node_id] = element_id
+        self.hits += len(resolved)
+        self.misses += len(missing)
+        if missing:
+            self.queries += 1
+            found = await neo4j_client.resolve_node_element_ids(
+                self.label, missing, self.dataset_id, self.id_property
+            )
+            for node_id, element_id in found.items():
+                self._put(node_id, element_id)
+            resolved.update(found)
+        return resolved
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'label': self.label,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': round(self.hits / lookups, 3) if lookups else 0.0,
+            'queries': self.queries,
+        }
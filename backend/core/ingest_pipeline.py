@@ -0,0 +1,164 @@
+"""
+Producer/consumer pipeline for CSV ingestion.
+
+Reading and converting a batch is CPU work, writing it is a Neo4j round trip. Done
+one after the other, the database waits while the next batch is prepared and the
+worker waits while the transaction runs. Here a producer reads and converts batches
+in a worker thread and puts them on a bounded queue, while a configurable number of
+writers drain the queue with one transaction each, so both sides stay busy and memory
+is bounded by the queue size.
+
+Batches may finish out of order when there is more than one writer. Progress is
+therefore reported as a low-watermark: the number of rows in the longest prefix of
+batches that have all been written. The reader's resume position taken with each batch
+follows the same watermark, so it can be persisted as a checkpoint.
+"""
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+
+class BatchWriteError(Exception):
+    """A write failed; carries the zero-based number of the batch that failed."""
+
+    def __init__(self, batch_num: int, error: Exception):
+        super().__init__(str(error))
+        self.batch_num = batch_num
+        self.error = error
+
+
+class IngestPipeline:
+    """
+    Run convert() in a worker thread and write() on the event loop, concurrently.
+
+    Args:
+        batches: Iterator of row batches (e.g. CSVProcessor.iter_batches())
+        convert: Turns a raw batch into the payload handed to write(); runs in a thread,
+            one batch at a time and in file order
+        write: Coroutine function write(batch_num, payload) performing the Neo4j write
+        writers: Number of write transactions allowed in flight at once
+        queue_size: Maximum number of converted batches waiting for a writer
+        on_progress: Optional coroutine function on_progress(batch_num, processed_rows),
+            awaited (never concurrently) whenever the low-watermark advances
+        position: Optional callable returning the reader's resume position (e.g.
+            CSVProcessor.checkpoint); called right after each batch is read, and the value
+            of the last batch below the watermark is available as self.position
+    """
+
+    def __init__(
+        self,
+        batches: Iterator[List[Dict[str, Any]]],
+        convert: Callable[[List[Dict[str, Any]]], Any],
+        write: Callable[[int, Any], Awaitable[None]],
+        writers: int = 1,
+        queue_size: int = 4,
+        on_progress: Optional[Callable[[int, int], Awaitable[None]]] = None,
+        position: Optional[Callable[[], Any]] = None
+    ):
+        self.batches = batches
+        self.convert = convert
+        self.write = write
+        self.writers = max(1, writers)
+        self.queue_size = max(1, queue_size)
+        self.on_progress = on_progress
+        self.get_position = position
+        self.position: Any = None  # Resume position after the batches below the watermark
+        self.processed = 0  # Rows in completed batches below the watermark
+        self.batches_written = 0
+        self._next_batch = 0  # First batch number not yet written (the watermark)
+        self._finished: Dict[int, Tuple[int, Any]] = {}  # Written batch number -> (row count, position), above the watermark
+        self._progress_lock = asyncio.Lock()
+        self._written = asyncio.Condition(self._progress_lock)
+        self._read_future: Optional[asyncio.Future] = None
+
+    def _read_next(self):
+        # Runs in a worker thread: the generator is only ever advanced by one thread at a time
+        batch = next(self.batches, None)
+        if batch is None:
+            return None
+        position = self.get_position() if self.get_position is not None else None
+        return len(batch), self.convert(batch), position
+
+    async def _produce(self, queue: asyncio.Queue) -> None:
+        loop = asyncio.get_running_loop()
+        batch_num = 0
+        while True:
+            self._read_future = loop.run_in_executor(None, self._read_next)
+            # Shielded so that cancelling the producer never abandons a thread mid-read
+            item = await asyncio.shield(self._read_future)
+            if item is None:
+                break
+            row_count, payload, position = item
+            await queue.put((batch_num, row_count, payload, position))
+            batch_num += 1
+        for _ in range(self.writers):
+            await queue.put(_DONE)
+
+    async def _consume(self, queue: asyncio.Queue) -> None:
+        while True:
+            item = await queue.get()
+            if item is _DONE:
+                return
+            batch_num, row_count, payload, position = item
+            try:
+                await self.write(batch_num, payload)
+            except Exception as e:
+                raise BatchWriteError(batch_num, e) from e
+            await self._advance(batch_num, row_count, position)
+
+    async def _advance(self, batch_num: int, row_count: int, position: Any = None) -> None:
+        async with self._progress_lock:
+            self.batches_written += 1
+            self._finished[batch_num] = (row_count, position)
+            advanced = False
+            while self._next_batch in self._finished:
+                row_count, position = self._finished.pop(self._next_batch)
+                self.processed += row_count
+                if position is not None:
+                    self.position = position
+                self._next_batch += 1
+                advanced = True
+            if advanced:
+                self._written.notify_all()
+                if self.on_progress is not None:
+                    await self.on_progress(self._next_batch - 1, self.processed)
+
+    async def wait_written(self, batch_num: int) -> None:
+        """Wait until every batch before batch_num has been written (e.g. from within write())."""
+        async with self._written:
+            await self._written.wait_for(lambda: self._next_batch >= batch_num)
+
+    async def run(self) -> int:
+        """
+        Process all batches.
+
+        Returns:
+            Total number of rows written
+
+        Raises:
+            BatchWriteError: On the first failed write; other writers are cancelled
+            Exception: Whatever reading or converting a batch raised
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        tasks = [asyncio.create_task(self._produce(queue))]
+        tasks += [asyncio.create_task(self._consume(queue)) for _ in range(self.writers)]
+        try:
+            done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+            for task in done:
+                if task.exception() is not None:
+                    raise task.exception()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if self._read_future is not None and not self._read_future.done():
+                await asyncio.wait([self._read_future])
+            # Release the reader (file handle, worker processes) if it was not exhausted
+            close = getattr(self.batches, 'close', None)
+            if close is not None:
+                await asyncio.to_thread(close)
+        return self.processed
@@ -0,0 +1,248 @@
+"""
+Server-side CSV ingestion with LOAD CSV.
+
+Instead of sending every row through Bolt as UNWIND parameters, the validated file is
+staged into the Neo4j import directory (shared with the backend through the
+``neo4j_import`` volume, mounted at ``NEO4J_IMPORT_DIR``) and Neo4j reads it itself with
+``LOAD CSV WITH HEADERS ... CALL { ... } IN TRANSACTIONS OF N ROWS``.
+
+Type coercion is expressed in Cypher from the column types CSVProcessor inferred, so
+the stored values match the Bolt path (see NodeRowConverter / RelationshipRowConverter).
+Nothing comes back until the statement finishes, so progress is reported by polling the
+number of nodes or relationships of the dataset from a second session.
+"""
+import asyncio
+import logging
+import os
+import shutil
+import uuid
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from django.conf import settings
+
+from core.chunked_delete import quote_name
+from core.csv_processor import RelationshipRowConverter
+from core.neo4j_client import neo4j_client
+
+logger = logging.getLogger(__name__)
+
+# Same literals as the Bolt converters accept (_int_or_value, _float_or_value, _parse_boolean)
+INTEGER_PATTERN = '[+-]?[0-9]+'
+FLOAT_PATTERN = '[+-]?([0-9]+[.]?[0-9]*|[.][0-9]+)([eE][+-]?[0-9]+)?'
+ID_PATTERN = '-?[0-9]+'
+TRUE_VALUES = "['true', '1', 'yes']"
+
+
+def import_dir() -> Optional[Path]:
+    """Local path of the Neo4j import directory, or None if it is not configured or not writable."""
+    if not settings.NEO4J_IMPORT_DIR:
+        return None
+    path = Path(settings.NEO4J_IMPORT_DIR)
+    if not path.is_dir() or not os.access(path, os.W_OK):
+        return None
+    return path
+
+
+def is_available() -> bool:
+    return import_dir() is not None
+
+
+def stage_file(source: str, task_id: int) -> str:
+    """
+    Place a copy of the upload in the import directory.
+
+    A hard link is used when the upload directory and the import volume share a
+    filesystem; otherwise the file is copied.
+
+    Returns:
+        File name relative to the import directory
+    """
+    name = f'upload_{task_id}_{uuid.uuid4().hex}.csv'
+    target = import_dir() / name
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copyfile(source, target)
+    logger.info(f"Staged {source} for LOAD CSV as {target}")
+    return name
+
+
+def remove_staged(name: str) -> None:
+    directory = import_dir()
+    if directory is None:
+        return
+    try:
+        (directory / name).unlink(missing_ok=True)
+    except OSError as e:
+        logger.warning(f"Could not remove staged file {name}: {e}")
+
+
+def file_url(name: str) -> str:
+    return f'file:///{name}'
+
+
+def _coerce(cell: str, data_type: Optional[str]) -> str:
+    """Cypher expression converting a trimmed cell (string or null) like the Bolt converters do."""
+    if data_type == 'integer':
+        return f"CASE WHEN {cell} =~ '{INTEGER_PATTERN}' THEN toInteger({cell}) ELSE {cell} END"
+    if data_type == 'float':
+        return f"CASE WHEN {cell} =~ '{FLOAT_PATTERN}' THEN toFloat({cell}) ELSE {cell} END"
+    if data_type == 'boolean':
+        return f"CASE WHEN {cell} IS NULL THEN null ELSE toLower({cell}) IN {TRUE_VALUES} END"
+    return cell
+
+
+def _id_expression(cell: str, pattern: str = ID_PATTERN) -> str:
+    return f"CASE WHEN {cell} =~ '{pattern}' THEN toInteger({cell}) ELSE {cell} END"
+
+
+def _map_literal(entries: List[Tuple[str, str]]) -> str:
+    return '{' + ', '.join(f'{quote_name(key)}: {value}' for key, value in entries) + '}'
+
+
+# Cells of the current row in header order: trimmed, empty strings become null
+_CELLS = (
+    "WITH [column IN $columns | CASE trim(coalesce(row[column], '')) WHEN '' THEN null "
+    "ELSE trim(row[column]) END] AS cells"
+)
+
+
+def _load_query(body: str, rows_per_transaction: int) -> str:
+    return (
+        "LOAD CSV WITH HEADERS FROM $url AS row "
+        "CALL { "
+        f"WITH row {_CELLS} "
+        f"{body} "
+        f"}} IN TRANSACTIONS OF {int(rows_per_transaction)} ROWS "
+        "RETURN count(*) AS rows, sum(loaded) AS count"
+    )
+
+
+def node_load_query(
+    label: str,
+    header: List[str],
+    data_types: Dict[str, str],
+    id_column: str,
+    constants: Optional[Dict[str, Any]] = None
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    LOAD CSV statement merging one node per row on (id_column, dataset_id).
+
+    constants are extra properties set on every node (as NodeRowConverter does), e.g.
+    the upload generation of a sync; dataset_id always comes from $dataset_id.
+
+    Returns:
+        Tuple of (query, parameters without $url)
+    """
+    properties = []
+    id_expression = None
+    for index, name in enumerate(header):
+        cell = f'cells[{index}]'
+        if name == id_column:
+            # Node ids are converted like integer columns (_int_or_value), whatever their type
+            id_expression = _id_expression(cell, INTEGER_PATTERN)
+            properties.append((name, 'node_id'))
+        else:
+            properties.append((name, _coerce(cell, data_types.get(name))))
+    constants = {key: value for key, value in (constants or {}).items() if key != 'dataset_id'}
+    properties += [(key, f'$constants.{quote_name(key)}') for key in constants]
+    properties.append(('dataset_id', '$dataset_id'))
+    body = (
+        f"WITH cells, {id_expression} AS node_id WHERE node_id IS NOT NULL "
+        f"MERGE (n:{quote_name(label)} {{{quote_name(id_column)}: node_id, dataset_id: $dataset_id}}) "
+        f"SET n = {_map_literal(properties)} "
+        "RETURN count(n) AS loaded"
+    )
+    return _load_query(body, settings.LOAD_CSV_ROWS_PER_TRANSACTION), {'columns': list(header), 'constants': constants}
+
+
+def relationship_load_query(
+    header: List[str],
+    data_types: Dict[str, str],
+    source_label: str,
+    target_label: str,
+    relationship_type: str
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    LOAD CSV statement merging one relationship per row between existing endpoints.
+
+    Id and property columns are resolved by RelationshipRowConverter. Rows without both
+    ids, or whose endpoints do not exist in the dataset, load nothing.
+
+    Returns:
+        Tuple of (query, parameters without $url)
+    """
+    def endpoint(index: Optional[int]) -> str:
+        return _id_expression(f'cells[{index}]') if index is not None else 'null'
+
+    converter = RelationshipRowConverter(header, data_types, source_label, target_label)
+    properties = [
+        (name, _coerce(f'cells[{index}]', data_types.get(name))) for index, name in converter.properties
+    ]
+    properties.append(('dataset_id', '$dataset_id'))
+    body = (
+        f"WITH cells, {endpoint(converter.source_index)} AS source_id, {endpoint(converter.target_index)} AS target_id "
+        "WHERE source_id IS NOT NULL AND target_id IS NOT NULL "
+        f"MATCH (source:{quote_name(source_label)} {{id: source_id, dataset_id: $dataset_id}}) "
+        f"MATCH (target:{quote_name(target_label)} {{id: target_id, dataset_id: $dataset_id}}) "
+        f"MERGE (source)-[r:{quote_name(relationship_type)}]->(target) "
+        f"SET r = {_map_literal(properties)} "
+        "RETURN count(r) AS loaded"
+    )
+    return _load_query(body, settings.LOAD_CSV_ROWS_PER_TRANSACTION), {'columns': list(header)}
+
+
+def node_count_query(label: str) -> str:
+    return f"MATCH (n:{quote_name(label)}) WHERE n.dataset_id = $dataset_id RETURN count(n) AS count"
+
+
+def relationship_count_query(relationship_type: str) -> str:
+    return f"MATCH ()-[r:{quote_name(relationship_type)}]->() WHERE r.dataset_id = $dataset_id RETURN count(r) AS count"
+
+
+async def _count(query: str, dataset_id: int) -> int:
+    records = await neo4j_client.execute_query(query, {'dataset_id': dataset_id})
+    return records[0]['count'] if records else 0
+
+
+async def run_load_csv(
+    query: str,
+    parameters: Dict[str, Any],
+    count_query: str,
+    dataset_id: int,
+    on_progress: Optional[Callable[[int], Awaitable[None]]] = None
+) -> Tuple[int, int]:
+    """
+    Run a LOAD CSV statement, reporting progress while it runs.
+
+    Every LOAD_CSV_PROGRESS_INTERVAL seconds count_query is run in its own session and
+    on_progress(loaded) is awaited with the growth since the statement started. Rows
+    that update existing entities do not change the count, so progress can lag behind
+    on re-uploads; it is an estimate either way.
+
+    Returns:
+        Tuple of (rows read from the file, entities merged)
+    """
+    parameters = {**parameters, 'dataset_id': dataset_id}
+    baseline = await _count(count_query, dataset_id) if on_progress is not None else 0
+    # CALL { } IN TRANSACTIONS needs an auto-commit transaction, which execute_query uses
+    load = asyncio.create_task(neo4j_client.execute_query(query, parameters))
+    try:
+        while True:
+            done, _ = await asyncio.wait([load], timeout=settings.LOAD_CSV_PROGRESS_INTERVAL)
+            if done:
+                break
+            if on_progress is None:
+                continue
+            try:
+                await on_progress(max(0, await _count(count_query, dataset_id) - baseline))
+            except Exception as e:
+                logger.warning(f"LOAD CSV progress poll failed: {e}")
+    finally:
+        if not load.done():
+            load.cancel()
+            await asyncio.gather(load, return_exceptions=True)
+    records = load.result()
+    if not records:
+        return 0, 0
+    return records[0]['rows'] or 0, records[0]['count'] or 0
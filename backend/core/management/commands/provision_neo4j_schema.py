@@ -0,0 +1,62 @@
+"""
+Backfill Neo4j indexes for node labels and relationship types that already exist.
+
+Usage:
+    python manage.py provision_neo4j_schema
+    python manage.py provision_neo4j_schema --label Person --relationship-type FOLLOWS
+"""
+import asyncio
+from django.core.management.base import BaseCommand, CommandError
+
+from core.neo4j_client import neo4j_client
+from core.neo4j_schema import schema_provisioner
+
+
+class Command(BaseCommand):
+    help = 'Create (dataset_id, id) node indexes and dataset_id relationship indexes for existing data.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--label',
+            action='append',
+            dest='labels',
+            help='Node label to provision (repeatable). Defaults to every label in the database.',
+        )
+        parser.add_argument(
+            '--relationship-type',
+            action='append',
+            dest='relationship_types',
+            help='Relationship type to provision (repeatable). Defaults to every type in the database.',
+        )
+
+    def handle(self, *args, **options):
+        labels = options.get('labels')
+        relationship_types = options.get('relationship_types')
+
+        async def run():
+            try:
+                return await schema_provisioner.backfill(
+                    labels=labels,
+                    relationship_types=relationship_types,
+                )
+            finally:
+                await neo4j_client.close()
+
+        try:
+            report = asyncio.run(run())
+        except Exception as e:
+            raise CommandError(f'Schema provisioning failed: {e}')
+
+        for entity in ('nodes', 'relationships'):
+            section = report[entity]
+            for name in section['created']:
+                self.stdout.write(self.style.SUCCESS(f'  ✓ {entity[:-1]} {name}: index created'))
+            for name in section['skipped']:
+                self.stdout.write(f'  - {entity[:-1]} {name}: already provisioned')
+            for name in section['failed']:
+                self.stdout.write(self.style.ERROR(f'  ✗ {entity[:-1]} {name}: failed (see logs)'))
+
+        failed = len(report['nodes']['failed']) + len(report['relationships']['failed'])
+        if failed:
+            raise CommandError(f'{failed} label(s)/type(s) could not be provisioned')
+        self.stdout.write(self.style.SUCCESS('Neo4j schema provisioning complete'))
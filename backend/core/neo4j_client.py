@@ -1,23 +1,302 @@
 """
 Neo4j async client for graph database operations.
 
-This module provides a thread-safe singleton wrapper around the Neo4j async driver,
-ensuring proper connection management and avoiding event loop conflicts.
+This module provides a thread-safe singleton wrapper around the Neo4j async driver.
+An async driver is bound to the event loop it was created on, so one driver (and
+connection pool) is kept per live event loop; drivers whose loop has been closed are
+reaped and their sockets closed. Pool sizing comes from settings and live pool metrics are exposed for monitoring.
 """
+import asyncio
 import logging
 import threading
-from typing import Dict, List, Optional, Any
-from neo4j import AsyncGraphDatabase, AsyncDriver
+import time
+import weakref
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional, Any, Awaitable, Callable, Iterable, Set, AsyncIterator, Tuple
+from neo4j import AsyncGraphDatabase, AsyncDriver, AsyncSession, AsyncManagedTransaction
+from neo4j.exceptions import ServiceUnavailable, SessionExpired, TransientError
 from django.conf import settings
 
+from core.chunked_delete import delete_in_chunks, delete_in_transactions, nodes_match, quote_name, relationships_match
+from core.relationship_lanes import LaneStats, partition_relationships
+
 logger = logging.getLogger(__name__)
 
 
+# Node property holding the upload (task id) that last wrote the node, for sync re-uploads
+UPLOAD_GENERATION_PROPERTY = 'upload_generation'
+
+
+class PoolMetrics:
+    """Connection acquisition statistics for one driver."""
+    
+    def __init__(self):
+        self.acquisitions = 0
+        self.acquisition_failures = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+    
+    def record(self, wait: float, failed: bool = False) -> None:
+        self.acquisitions += 1
+        if failed:
+            self.acquisition_failures += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+    
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'acquisitions': self.acquisitions,
+            'acquisition_failures': self.acquisition_failures,
+            'avg_acquisition_wait_ms': round(self.total_wait / self.acquisitions * 1000, 3) if self.acquisitions else 0.0,
+            'max_acquisition_wait_ms': round(self.max_wait * 1000, 3),
+        }
+
+
+def is_memory_error(error: Exception) -> bool:
+    """Whether a failed transaction ran out of (transaction or heap) memory on the server."""
+    code = getattr(error, 'code', None) or ''
+    return 'OutOfMemory' in code or 'MemoryLimit' in code or 'MemoryPool' in code
+
+
+def classify_write_error(error: Exception) -> str:
+    """
+    Classify a failed write transaction.
+    
+    Returns:
+        'resize' for memory errors (retry with fewer rows), 'transient' for errors the
+        same transaction may not hit again (deadlocks, leader switches, unavailable
+        servers), 'permanent' otherwise (the data itself is rejected)
+    """
+    if is_memory_error(error):
+        return 'resize'
+    if isinstance(error, (TransientError, ServiceUnavailable, SessionExpired)):
+        return 'transient'
+    return 'permanent'
+
+
+class _BatchTooLarge(Exception):
+    """Memory error raised out of a managed transaction, so the driver does not retry it as is."""
+    
+    def __init__(self, error: Exception):
+        super().__init__(str(error))
+        self.error = error
+
+
+# on_reject(index, error): a row of a batch write that cannot be written, by its index in the input list
+RejectHandler = Callable[[int, Exception], None]
+
+
+def _value_size(value: Any) -> int:
+    if isinstance(value, dict):
+        return sum(len(str(key)) + _value_size(item) for key, item in value.items())
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    if isinstance(value, (list, tuple)):
+        return sum(_value_size(item) for item in value)
+    return 8
+
+
+def estimate_payload_bytes(rows: List[Dict[str, Any]], sample_size: int = 8) -> int:
+    """Approximate parameter size of a batch, extrapolated from its first rows."""
+    sample = rows[:sample_size]
+    if not sample:
+        return 0
+    return sum(_value_size(row) for row in sample) * len(rows) // len(sample)
+
+
+class AdaptiveBatchSizer:
+    """
+    Chooses the number of rows per write transaction.
+    
+    After every transaction the time and payload bytes per row are folded into moving
+    averages, and the next size is the one expected to take target_seconds, capped so
+    the payload stays under max_bytes and kept within [min_size, max_size]. Growth is
+    limited to doubling per transaction; shrinking is immediate. A transaction that
+    runs out of memory on the server halves the size, and the size that failed becomes
+    a ceiling for later growth.
+    
+    One sizer can be shared by concurrent writers of the same file; writers whose
+    transactions wait on each other (relationship lanes) should each have their own,
+    see spawn() and combined_stats().
+    
+    Args:
+        initial_size: Rows in the first transaction
+        min_size: Lower bound (a memory error at this size is raised)
+        max_size: Upper bound
+        target_seconds: Transaction duration to aim for
+        max_bytes: Approximate payload bound per transaction (None: unbounded)
+    """
+    
+    SMOOTHING = 0.3
+    
+    def __init__(
+        self,
+        initial_size: int,
+        min_size: int,
+        max_size: int,
+        target_seconds: float = 1.0,
+        max_bytes: Optional[int] = None
+    ):
+        self.min_size = max(1, min_size)
+        self.max_size = max(self.min_size, max_size)
+        self.target_seconds = target_seconds
+        self.max_bytes = max_bytes
+        self.initial_size = min(max(initial_size, self.min_size), self.max_size)
+        self._size = self.initial_size
+        self._ceiling = self.max_size
+        self._seconds_per_row: Optional[float] = None
+        self._bytes_per_row: Optional[float] = None
+        self.transactions = 0
+        self.rows = 0
+        self.seconds = 0.0
+        self.backoffs = 0
+        self.smallest = self._size
+        self.largest = self._size
+    
+    @classmethod
+    def from_settings(cls) -> 'AdaptiveBatchSizer':
+        return cls(
+            settings.INGEST_BATCH_INITIAL_SIZE,
+            settings.INGEST_BATCH_MIN_SIZE,
+            settings.INGEST_BATCH_MAX_SIZE,
+            settings.INGEST_BATCH_TARGET_SECONDS,
+            settings.INGEST_BATCH_MAX_BYTES or None
+        )
+    
+    @classmethod
+    def fixed(cls, size: int) -> 'AdaptiveBatchSizer':
+        """A sizer that never changes size (memory errors are raised)."""
+        return cls(size, size, size)
+    
+    def spawn(self) -> 'AdaptiveBatchSizer':
+        """A new sizer with the same bounds and target, starting from initial_size."""
+        return AdaptiveBatchSizer(self.initial_size, self.min_size, self.max_size, self.target_seconds, self.max_bytes)
+    
+    @property
+    def size(self) -> int:
+        return self._size
+    
+    def _average(self, current: Optional[float], sample: float) -> float:
+        return sample if current is None else current + self.SMOOTHING * (sample - current)
+    
+    def _resize(self, size: int) -> None:
+        self._size = max(self.min_size, min(self.max_size, self._ceiling, size))
+        self.smallest = min(self.smallest, self._size)
+        self.largest = max(self.largest, self._size)
+    
+    def record(self, rows: int, seconds: float, payload_bytes: int = 0) -> None:
+        """Account for a committed transaction and pick the next size."""
+        self.transactions += 1
+        self.rows += rows
+        self.seconds += seconds
+        if rows <= 0 or self.min_size == self.max_size:
+            return
+        self._seconds_per_row = self._average(self._seconds_per_row, max(seconds, 1e-6) / rows)
+        if payload_bytes:
+            self._bytes_per_row = self._average(self._bytes_per_row, payload_bytes / rows)
+        target = self.target_seconds / self._seconds_per_row
+        if self.max_bytes and self._bytes_per_row:
+            target = min(target, self.max_bytes / self._bytes_per_row)
+        self._resize(int(min(target, self._size * 2)))
+    
+    def back_off(self, error: Exception) -> bool:
+        """
+        React to a failed transaction.
+        
+        Returns:
+            True if the error was a memory error and the size was reduced (retry the
+            rows with the new size), False if the error should be raised
+        """
+        if not is_memory_error(error) or self._size <= self.min_size:
+            return False
+        self.backoffs += 1
+        self._ceiling = max(self.min_size, self._size * 3 // 4)
+        self._resize(self._size // 2)
+        logger.warning(f"Transaction ran out of memory; batch size reduced to {self._size}: {error}")
+        return True
+    
+    def stats(self) -> Dict[str, Any]:
+        """Summary of the sizes used, for tuning (stored on the upload task)."""
+        return {
+            'initial_size': self.initial_size,
+            'final_size': self._size,
+            'smallest_size': self.smallest,
+            'largest_size': self.largest,
+            'mean_size': round(self.rows / self.transactions, 1) if self.transactions else 0,
+            'transactions': self.transactions,
+            'rows': self.rows,
+            'avg_transaction_ms': round(self.seconds / self.transactions * 1000, 1) if self.transactions else 0.0,
+            'bytes_per_row': round(self._bytes_per_row) if self._bytes_per_row else None,
+            'backoffs': self.backoffs,
+            'bounds': [self.min_size, self.max_size],
+            'target_seconds': self.target_seconds,
+        }
+    
+    @staticmethod
+    def combined_stats(sizers: List['AdaptiveBatchSizer']) -> Dict[str, Any]:
+        """
+        stats() over several sizers of one upload (sizers without transactions are left
+        out), with 'final_sizes' listing the final size of each.
+        """
+        used = [sizer for sizer in sizers if sizer.transactions]
+        if len(used) <= 1:
+            return (used or sizers)[0].stats()
+        transactions = sum(sizer.transactions for sizer in used)
+        rows = sum(sizer.rows for sizer in used)
+        bytes_per_row = [sizer._bytes_per_row for sizer in used if sizer._bytes_per_row]
+        return {
+            'initial_size': used[0].initial_size,
+            'final_size': round(sum(sizer.size for sizer in used) / len(used)),
+            'final_sizes': [sizer.size for sizer in used],
+            'smallest_size': min(sizer.smallest for sizer in used),
+            'largest_size': max(sizer.largest for sizer in used),
+            'mean_size': round(rows / transactions, 1),
+            'transactions': transactions,
+            'rows': rows,
+            'avg_transaction_ms': round(sum(sizer.seconds for sizer in used) / transactions * 1000, 1),
+            'bytes_per_row': round(sum(bytes_per_row) / len(bytes_per_row)) if bytes_per_row else None,
+            'backoffs': sum(sizer.backoffs for sizer in used),
+            'bounds': [used[0].min_size, used[0].max_size],
+            'target_seconds': used[0].target_seconds,
+        }
+
+
+def _kill_pool_connections(driver: AsyncDriver) -> Tuple[int, int]:
+    """
+    Synchronously close the pooled connections of a driver whose event loop is closed.
+
+    driver.close() cannot run any more: the connections are asyncio streams of the closed
+    loop, and closing a stream schedules a callback on it. The raw sockets are closed
+    instead, which ends the server-side sessions right away (driver internals: if they
+    change, the connections are counted as failed and left to the garbage collector).
+
+    Returns:
+        Tuple of (connections closed, connections that could not be closed)
+    """
+    closed = failed = 0
+    pool = getattr(driver, '_pool', None)
+    connections = getattr(pool, 'connections', None) or {}
+    for address in list(connections):
+        for connection in list(connections.get(address, ())):
+            try:
+                transport_socket = connection.socket._socket
+                getattr(transport_socket, '_sock', transport_socket).close()
+                connection._closed = True
+                closed += 1
+            except Exception as e:
+                logger.debug(f"Could not close Neo4j connection to {address}: {e}")
+                failed += 1
+    if hasattr(connections, 'clear'):
+        connections.clear()
+    return closed, failed
+
+
 class Neo4jClient:
     """Async Neo4j client wrapper."""
     
     _instance = None
     _drivers = None
+    _metrics = None
     _lock = None
     
     def __new__(cls):
@@ -25,40 +304,151 @@ class Neo4jClient:
         if cls._instance is None:
             cls._instance = super(Neo4jClient, cls).__new__(cls)
             cls._lock = threading.Lock()
-            cls._drivers: Dict[int, Optional[AsyncDriver]] = {}
+            # Keyed weakly by event loop: a garbage-collected loop drops its entry too
+            cls._drivers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncDriver]" = weakref.WeakKeyDictionary()
+            cls._metrics: "weakref.WeakKeyDictionary[AsyncDriver, PoolMetrics]" = weakref.WeakKeyDictionary()
+            cls._session_owner: Dict[int, AsyncSession] = {}
         return cls._instance
     
     def __init__(self):
         """Initialize Neo4j client."""
         pass
     
+    def _create_driver(self) -> AsyncDriver:
+        """Create a driver configured from settings and instrument its pool."""
+        driver = AsyncGraphDatabase.driver(
+            settings.NEO4J_URI,
+            auth=(settings.NEO4J_USER, settings.NEO4J_PASSWORD),
+            max_connection_pool_size=settings.NEO4J_MAX_CONNECTION_POOL_SIZE,
+            connection_acquisition_timeout=settings.NEO4J_CONNECTION_ACQUISITION_TIMEOUT,
+            max_connection_lifetime=settings.NEO4J_MAX_CONNECTION_LIFETIME,
+            max_transaction_retry_time=settings.NEO4J_MAX_TRANSACTION_RETRY_TIME,
+        )
+        metrics = PoolMetrics()
+        self._metrics[driver] = metrics
+        
+        # Time connection acquisition by wrapping the pool's acquire (driver internals:
+        # if they change, metrics are simply not collected)
+        pool = getattr(driver, '_pool', None)
+        acquire = getattr(pool, 'acquire', None)
+        if acquire is not None:
+            async def timed_acquire(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    connection = await acquire(*args, **kwargs)
+                except Exception:
+                    metrics.record(time.perf_counter() - started, failed=True)
+                    raise
+                metrics.record(time.perf_counter() - started)
+                return connection
+            pool.acquire = timed_acquire
+        return driver
+    
+    def _reap_closed_loops(self) -> None:
+        """Drop drivers whose event loop has been closed, closing their sockets (must hold self._lock)."""
+        for loop in [loop for loop in self._drivers.keys() if loop.is_closed()]:
+            driver = self._drivers.pop(loop, None)
+            if driver is None:
+                continue
+            closed, failed = _kill_pool_connections(driver)
+            if failed:
+                logger.warning(
+                    f"Neo4j driver reaped: its event loop was closed without closing the driver; "
+                    f"{closed} connection(s) closed, {failed} left to the garbage collector"
+                )
+            else:
+                logger.info(f"Neo4j driver reaped: its event loop was closed, {closed} connection(s) closed")
+    
     def get_driver(self) -> AsyncDriver:
         """
-        Get or create the Neo4j driver for the current thread.
-        Each thread gets its own driver to avoid event loop conflicts.
+        Get or create the Neo4j driver for the running event loop.
+        Each event loop gets its own driver to avoid event loop conflicts.
         """
-        thread_id = threading.get_ident()
+        loop = asyncio.get_running_loop()
         
-        if thread_id not in self._drivers or self._drivers[thread_id] is None:
+        driver = self._drivers.get(loop)
+        if driver is None:
             with self._lock:
                 # Double-check after acquiring lock
-                if thread_id not in self._drivers or self._drivers[thread_id] is None:
-                    self._drivers[thread_id] = AsyncGraphDatabase.driver(
-                        settings.NEO4J_URI,
-                        auth=(settings.NEO4J_USER, settings.NEO4J_PASSWORD)
+                driver = self._drivers.get(loop)
+                if driver is None:
+                    self._reap_closed_loops()
+                    driver = self._create_driver()
+                    self._drivers[loop] = driver
+                    logger.info(
+                        f"Neo4j driver initialized for event loop in thread {threading.current_thread().name} "
+                        f"({len(self._drivers)} live driver(s))"
                     )
-                    logger.info(f"Neo4j driver initialized for thread {threading.current_thread().name} (ID: {thread_id})")
         
-        return self._drivers[thread_id]
+        return driver
+    
+    @asynccontextmanager
+    async def session(self) -> AsyncIterator[AsyncSession]:
+        """
+        Open a session, or reuse the one already opened by the current asyncio task.
+        
+        Wrapping several client calls in ``async with neo4j_client.session():`` makes
+        them share one session (and its pooled connection) instead of opening one each.
+        Sessions are never shared between tasks, since a session is not concurrency-safe.
+        """
+        task = asyncio.current_task()
+        key = id(task)
+        current = self._session_owner.get(key)
+        if current is not None:
+            yield current
+            return
+        
+        async with self.get_driver().session() as session:
+            self._session_owner[key] = session
+            try:
+                yield session
+            finally:
+                self._session_owner.pop(key, None)
+    
+    def pool_metrics(self) -> List[Dict[str, Any]]:
+        """
+        Report live pool metrics for every driver.
+        
+        Returns:
+            One entry per driver with in-use/idle connection counts, the configured
+            pool size and connection acquisition wait statistics
+        """
+        with self._lock:
+            self._reap_closed_loops()
+            drivers = list(self._drivers.items())
+        
+        report = []
+        for loop, driver in drivers:
+            in_use = idle = 0
+            pool = getattr(driver, '_pool', None)
+            for connections in list(getattr(pool, 'connections', {}).values()):
+                for connection in list(connections):
+                    if getattr(connection, 'in_use', False):
+                        in_use += 1
+                    else:
+                        idle += 1
+            entry = {
+                'loop_id': id(loop),
+                'loop_running': loop.is_running(),
+                'in_use': in_use,
+                'idle': idle,
+                'max_pool_size': settings.NEO4J_MAX_CONNECTION_POOL_SIZE,
+            }
+            metrics = self._metrics.get(driver)
+            if metrics is not None:
+                entry.update(metrics.as_dict())
+            report.append(entry)
+        return report
     
     async def close(self):
-        """Close the driver connection for the current thread."""
-        thread_id = threading.get_ident()
+        """Close the driver for the running event loop."""
+        loop = asyncio.get_running_loop()
         
-        if thread_id in self._drivers and self._drivers[thread_id] is not None:
-            await self._drivers[thread_id].close()
-            self._drivers[thread_id] = None
-            logger.info(f"Neo4j driver closed for thread {threading.current_thread().name}")
+        with self._lock:
+            driver = self._drivers.pop(loop, None)
+        if driver is not None:
+            await driver.close()
+            logger.info(f"Neo4j driver closed for event loop in thread {threading.current_thread().name}")
     
     async def verify_connectivity(self) -> bool:
         """Verify connection to Neo4j database."""
@@ -90,8 +480,7 @@ class Neo4jClient:
             parameters = {}
         
         try:
-            driver = self.get_driver()
-            async with driver.session() as session:
+            async with self.session() as session:
                 result = await session.run(query, parameters)
                 records = await result.data()
                 logger.debug(f"Query executed successfully: {len(records)} records returned")
@@ -100,6 +489,40 @@ class Neo4jClient:
             logger.error(f"Query execution failed: {e}")
             raise
     
+    async def stream_query(
+        self,
+        query: str,
+        parameters: Optional[Dict[str, Any]] = None,
+        fetch_size: int = 1000
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Execute a Cypher query and yield records one by one as they arrive.
+        
+        Records are pulled from the server in batches of fetch_size, so memory use is
+        bounded by the batch rather than the whole result set. The generator owns its
+        session (it may be resumed from different asyncio tasks), so it must be consumed
+        or closed with aclose() on the event loop it was started on.
+        
+        Args:
+            query: Cypher query string
+            parameters: Query parameters dictionary
+            fetch_size: Number of records requested from the server per round trip
+            
+        Yields:
+            Result records as dictionaries
+        """
+        if parameters is None:
+            parameters = {}
+        
+        try:
+            async with self.get_driver().session(fetch_size=fetch_size) as session:
+                result = await session.run(query, parameters)
+                async for record in result:
+                    yield record.data()
+        except Exception as e:
+            logger.error(f"Streaming query failed: {e}")
+            raise
+    
     async def create_node(
         self,
         label: str,
@@ -135,8 +558,7 @@ class Neo4jClient:
                 query = f"CREATE (n:{label} $props) RETURN n"
                 parameters = {'props': properties}
             
-            driver = self.get_driver()
-            async with driver.session() as session:
+            async with self.session() as session:
                 result = await session.run(query, parameters)
                 record = await result.single()
                 if record:
@@ -149,12 +571,108 @@ class Neo4jClient:
             logger.error(f"Node creation failed: {e}")
             raise
     
+    async def _execute_write(self, session: AsyncSession, query: str, parameters: Dict[str, Any]) -> int:
+        """
+        Run a write query returning ``count`` in a managed transaction.
+        
+        The driver retries transient failures with jittered exponential backoff for up to
+        NEO4J_MAX_TRANSACTION_RETRY_TIME seconds; memory errors are not retried as is.
+        """
+        async def work(tx: AsyncManagedTransaction) -> int:
+            try:
+                result = await tx.run(query, parameters)
+                record = await result.single()
+            except Exception as e:
+                if is_memory_error(e):
+                    raise _BatchTooLarge(e) from e
+                raise
+            return record['count'] if record else 0
+        
+        try:
+            return await session.execute_write(work)
+        except _BatchTooLarge as e:
+            raise e.error
+    
+    async def _write_in_transactions(
+        self,
+        query: str,
+        rows: List[Any],
+        parameters: Callable[[List[Any]], Dict[str, Any]],
+        sizer: AdaptiveBatchSizer,
+        on_reject: Optional[RejectHandler] = None
+    ) -> int:
+        """
+        Write rows with one managed transaction per sizer.size rows.
+        
+        Memory errors shrink the transactions (see AdaptiveBatchSizer.back_off). If a
+        transaction fails permanently and on_reject is given, its rows are bisected until
+        the failing rows are isolated: every other row is written and on_reject(index,
+        error) is called for each failing one. Otherwise the error is raised.
+        
+        Args:
+            query: Write query returning a ``count`` column
+            rows: Rows to write
+            parameters: Builds the query parameters of a slice of rows
+            sizer: Chooses the number of rows per transaction
+            on_reject: Optional handler of rows that cannot be written
+            
+        Returns:
+            Sum of the ``count`` returned by the transactions
+        """
+        written = 0
+        async with self.session() as session:
+            offset = 0
+            while offset < len(rows):
+                batch = rows[offset:offset + sizer.size]
+                batch_parameters = parameters(batch)
+                started = time.perf_counter()
+                try:
+                    written += await self._execute_write(session, query, batch_parameters)
+                except Exception as e:
+                    if sizer.back_off(e):
+                        continue
+                    if on_reject is None or classify_write_error(e) == 'transient':
+                        raise
+                    logger.warning(f"Write of {len(batch)} rows failed ({e}); isolating the failing rows")
+                    written += await self._bisect_write(session, query, batch, offset, parameters, on_reject, e)
+                else:
+                    sizer.record(len(batch), time.perf_counter() - started, estimate_payload_bytes(batch))
+                offset += len(batch)
+        return written
+    
+    async def _bisect_write(
+        self,
+        session: AsyncSession,
+        query: str,
+        rows: List[Any],
+        start: int,
+        parameters: Callable[[List[Any]], Dict[str, Any]],
+        on_reject: RejectHandler,
+        error: Exception
+    ) -> int:
+        """Write the halves of rows that failed with error, recursing into failing halves."""
+        if len(rows) == 1:
+            on_reject(start, error)
+            return 0
+        middle = len(rows) // 2
+        written = 0
+        for part, part_start in ((rows[:middle], start), (rows[middle:], start + middle)):
+            try:
+                written += await self._execute_write(session, query, parameters(part))
+            except Exception as e:
+                if classify_write_error(e) == 'transient':
+                    raise
+                written += await self._bisect_write(session, query, part, part_start, parameters, on_reject, e)
+        return written
+    
     async def create_nodes_batch(
         self,
         label: str,
         nodes: List[Dict[str, Any]],
         unique_id: Optional[str] = None,
-        batch_size: int = 1000
+        batch_size: int = 1000,
+        sizer: Optional[AdaptiveBatchSizer] = None,
+        on_reject: Optional[RejectHandler] = None
     ) -> int:
         """
         Create multiple nodes in batches.
@@ -164,89 +682,200 @@ class Neo4jClient:
             nodes: List of node property dictionaries
             unique_id: Optional unique identifier property name
             batch_size: Number of nodes per batch
+            sizer: Adaptive batch sizer choosing the size of each transaction (replaces batch_size)
+            on_reject: Optional on_reject(index, error) for nodes that cannot be written; the
+                rest of their transaction is still written (without it the error is raised)
             
         Returns:
             Number of nodes created
         """
-        created_count = 0
+        if not nodes:
+            return 0
+        if sizer is None:
+            sizer = AdaptiveBatchSizer.fixed(batch_size)
+        
+        if unique_id and nodes[0].get('dataset_id') is not None:
+            # MERGE on the (dataset_id, id) key backed by the provisioned index/constraint
+            query = f"""
+            UNWIND $nodes AS node
+            MERGE (n:{label} {{{unique_id}: node.{unique_id}, dataset_id: node.dataset_id}})
+            SET n = node
+            RETURN count(n) as count
+            """
+        elif unique_id:
+            # Use UNWIND with MERGE for batch creation with uniqueness
+            # Note: unique_id is inserted as a literal in the f-string
+            query = f"""
+            UNWIND $nodes AS node
+            MERGE (n:{label} {{{unique_id}: node.{unique_id}}})
+            SET n = node
+            RETURN count(n) as count
+            """
+        else:
+            # Use UNWIND with CREATE for batch creation
+            query = f"""
+            UNWIND $nodes AS node
+            CREATE (n:{label})
+            SET n = node
+            RETURN count(n) as count
+            """
         
         try:
-            for i in range(0, len(nodes), batch_size):
-                batch = nodes[i:i + batch_size]
-                
-                if unique_id:
-                    # Use UNWIND with MERGE for batch creation with uniqueness
-                    # Note: unique_id is inserted as a literal in the f-string
-                    query = f"""
-                    UNWIND $nodes AS node
-                    MERGE (n:{label} {{{unique_id}: node.{unique_id}}})
-                    SET n = node
-                    RETURN count(n) as count
-                    """
-                else:
-                    # Use UNWIND with CREATE for batch creation
-                    query = f"""
-                    UNWIND $nodes AS node
-                    CREATE (n:{label})
-                    SET n = node
-                    RETURN count(n) as count
-                    """
-                
-                driver = self.get_driver()
-                async with driver.session() as session:
-                    result = await session.run(query, {'nodes': batch})
-                    record = await result.single()
-                    if record:
-                        created_count += record['count']
-                
-                logger.debug(f"Batch {i//batch_size + 1}: Created {len(batch)} nodes")
-            
+            created_count = await self._write_in_transactions(
+                query, nodes, lambda batch: {'nodes': batch}, sizer, on_reject
+            )
             logger.info(f"Created {created_count} nodes of type {label}")
             return created_count
         except Exception as e:
             logger.error(f"Batch node creation failed: {e}")
             raise
 
-    async def delete_nodes_not_in_set(
+    async def delete_stale_nodes(
         self,
         label: str,
         dataset_id: int,
-        id_property: str,
-        ids_in_file: List[Any],
+        generation: int,
+        chunk_size: Optional[int] = None,
+        on_progress: Optional[Callable[[int], Awaitable[None]]] = None,
     ) -> int:
         """
-        Delete nodes of the given label and dataset_id whose id is not in ids_in_file.
-        Used when re-uploading a node file with "sync": removes nodes no longer in the file.
-        Uses DETACH DELETE so relationships are also removed.
+        Delete nodes of the given label and dataset_id not written by the given upload generation.
+        Used when re-uploading a node file with "sync": the upload stamps every node it writes
+        with UPLOAD_GENERATION_PROPERTY, so nodes no longer in the file are the ones with an
+        older (or no) stamp. Uses DETACH DELETE so relationships are also removed, in
+        transactions of chunk_size nodes: memory and transaction size do not depend on the
+        size of the file or of the label. The label is scanned once (CALL { } IN
+        TRANSACTIONS): chunks repeating the MATCH would re-read every kept node each time.
 
         Args:
             label: Node label (e.g. 'Person')
             dataset_id: Dataset id stored on nodes
-            id_property: Property name for the node id (e.g. 'id')
-            ids_in_file: List of id values that are in the uploaded file (keep these)
+            generation: Generation stamped on the nodes of the current upload (keep these)
+            chunk_size: Nodes deleted per transaction (default NEO4J_DELETE_CHUNK_SIZE)
+            on_progress: Optional coroutine function on_progress(deleted_so_far)
 
         Returns:
             Number of nodes deleted
         """
         try:
-            driver = self.get_driver()
-            # Cypher: match nodes of this label+dataset whose id is not in the keep list
+            deleted = await delete_in_transactions(
+                self.execute_query,
+                nodes_match(
+                    label,
+                    f"x.dataset_id = $dataset_id AND (x.{UPLOAD_GENERATION_PROPERTY} IS NULL "
+                    f"OR x.{UPLOAD_GENERATION_PROPERTY} <> $generation)"
+                ),
+                {'dataset_id': dataset_id, 'generation': generation},
+                detach=True,
+                chunk_size=chunk_size or settings.NEO4J_DELETE_CHUNK_SIZE,
+                on_progress=on_progress,
+                poll_interval=settings.LOAD_CSV_PROGRESS_INTERVAL,
+            )
+            logger.info(f"Sync nodes: deleted {deleted} nodes of type {label} (dataset_id={dataset_id}) older than generation {generation}")
+            return deleted
+        except Exception as e:
+            logger.error(f"delete_stale_nodes failed: {e}")
+            raise
+
+    async def resolve_node_element_ids(
+        self,
+        label: str,
+        ids: Iterable[Any],
+        dataset_id: int,
+        id_property: str = 'id',
+    ) -> Dict[Any, str]:
+        """
+        Resolve ids of nodes of a label in a dataset to their element ids.
+        Used by relationship ingestion (through EndpointResolver) to validate endpoints with
+        one round trip per batch, and to then match them by element id instead of by index.
+
+        Args:
+            label: Node label (e.g. 'Person')
+            ids: Candidate id values (duplicates are ignored)
+            dataset_id: Dataset id stored on nodes
+            id_property: Property name for the node id (e.g. 'id')
+
+        Returns:
+            Dict of id value -> element id, for the ids that exist
+        """
+        unique_ids = list(set(ids))
+        if not unique_ids:
+            return {}
+
+        try:
             query = f"""
-            MATCH (n:{label})
-            WHERE n.dataset_id = $dataset_id AND NOT n.{id_property} IN $ids
-            DETACH DELETE n
+            UNWIND $ids AS node_id
+            MATCH (n:{quote_name(label)} {{{quote_name(id_property)}: node_id}})
+            WHERE n.dataset_id = $dataset_id
+            RETURN n.{quote_name(id_property)} AS id, elementId(n) AS element_id
             """
-            async with driver.session() as session:
-                result = await session.run(
-                    query,
-                    {'dataset_id': dataset_id, 'ids': ids_in_file}
+            async with self.session() as session:
+                result = await session.run(query, {'ids': unique_ids, 'dataset_id': dataset_id})
+                resolved = {record['id']: record['element_id'] async for record in result}
+            logger.debug(f"Resolved {len(resolved)}/{len(unique_ids)} ids for label {label} (dataset_id={dataset_id})")
+            return resolved
+        except Exception as e:
+            logger.error(f"resolve_node_element_ids failed: {e}")
+            raise
+
+    async def count_id_labels(
+        self,
+        ids: Iterable[Any],
+        dataset_id: int,
+        labels: Optional[List[str]] = None,
+        id_property: str = 'id',
+    ) -> Dict[str, int]:
+        """
+        Count, per node label, how many of the given ids exist in a dataset, in one query.
+        Used to infer the endpoint labels of a relationship file from a sample of its ids.
+
+        With candidate labels, the query is a UNION ALL of one index-backed branch per label
+        (as in _get_counts); without, ids are matched on all nodes and grouped by labels(n).
+
+        Args:
+            ids: Sample id values (duplicates are ignored)
+            dataset_id: Dataset id stored on nodes
+            labels: Candidate labels (None: any label)
+            id_property: Property name for the node id (e.g. 'id')
+
+        Returns:
+            Dict of label -> number of distinct ids found with that label
+        """
+        unique_ids = list(set(ids))
+        counts = {label: 0 for label in labels or []}
+        if not unique_ids or labels == []:
+            return counts
+
+        parameters = {'ids': unique_ids, 'dataset_id': dataset_id}
+        if labels:
+            branches = []
+            for i, label in enumerate(labels):
+                parameters[f'l{i}'] = label
+                branches.append(
+                    f"UNWIND $ids AS node_id "
+                    f"MATCH (n:{quote_name(label)} {{{quote_name(id_property)}: node_id}}) "
+                    f"WHERE n.dataset_id = $dataset_id "
+                    f"RETURN [$l{i}] AS labels, count(DISTINCT node_id) AS count"
                 )
-                summary = await result.consume()
-                deleted = summary.counters.nodes_deleted if summary.counters else 0
-            logger.info(f"Sync nodes: deleted {deleted} nodes of type {label} (dataset_id={dataset_id}) not in file")
-            return deleted
+            query = '\nUNION ALL\n'.join(branches)
+        else:
+            query = f"""
+            UNWIND $ids AS node_id
+            MATCH (n)
+            WHERE n.{quote_name(id_property)} = node_id AND n.dataset_id = $dataset_id
+            RETURN labels(n) AS labels, count(DISTINCT node_id) AS count
+            """
+
+        try:
+            async with self.session() as session:
+                result = await session.run(query, parameters)
+                async for record in result:
+                    for label in record['labels']:
+                        counts[label] = counts.get(label, 0) + record['count']
+            logger.debug(f"Label counts for {len(unique_ids)} sample ids (dataset_id={dataset_id}): {counts}")
+            return counts
         except Exception as e:
-            logger.error(f"delete_nodes_not_in_set failed: {e}")
+            logger.error(f"count_id_labels failed: {e}")
             raise
 
     async def create_relationship(
@@ -292,8 +921,7 @@ class Neo4jClient:
                 'props': properties
             }
             
-            driver = self.get_driver()
-            async with driver.session() as session:
+            async with self.session() as session:
                 result = await session.run(query, parameters)
                 record = await result.single()
                 if record:
@@ -314,7 +942,10 @@ class Neo4jClient:
         target_id_key: str,
         relationship_type: str,
         relationships: List[Dict[str, Any]],
-        batch_size: int = 1000
+        batch_size: int = 1000,
+        sizer: Optional[AdaptiveBatchSizer] = None,
+        strategy: str = 'merge',
+        on_reject: Optional[RejectHandler] = None
     ) -> int:
         """
         Create multiple relationships in batches.
@@ -325,126 +956,229 @@ class Neo4jClient:
             target_label: Target node label
             target_id_key: Target node ID property name
             relationship_type: Relationship type
-            relationships: List of relationship dicts with source_id, target_id, and optional properties
+            relationships: List of relationship dicts with source_id, target_id, and optional properties;
+                with source_element_id and target_element_id too, endpoints are matched by element id
             batch_size: Number of relationships per batch
+            sizer: Adaptive batch sizer choosing the size of each transaction (replaces batch_size)
+            strategy: 'merge' to update existing relationships between the same nodes, or
+                'create' to skip that lookup when none can exist (see core.write_strategy)
+            on_reject: Optional on_reject(index, error) for relationships that cannot be
+                written; the rest of their transaction is still written (without it the
+                error is raised)
             
         Returns:
             Number of relationships created
         """
-        created_count = 0
+        if not relationships:
+            return 0
+        if sizer is None:
+            sizer = AdaptiveBatchSizer.fixed(batch_size)
+        if strategy == 'create':
+            # No relationship between the two nodes can exist yet: skip MERGE's lookup
+            write_clause = "CREATE (source)-[r:{rel_type}]->(target) SET r = rel.props"
+        else:
+            write_clause = "MERGE (source)-[r:{rel_type}]->(target) ON CREATE SET r = rel.props ON MATCH SET r = rel.props"
+        
+        rel_type_escaped = quote_name(relationship_type)
+        
+        by_element_id = 'source_element_id' in relationships[0]
+        if by_element_id:
+            # Endpoints already resolved (see EndpointResolver): direct lookups, no index seeks
+            query = f"""
+            UNWIND $rels AS rel
+            MATCH (source) WHERE elementId(source) = rel.source
+            MATCH (target) WHERE elementId(target) = rel.target
+            {write_clause.format(rel_type=rel_type_escaped)}
+            RETURN count(r) as count
+            """
+        else:
+            # Match nodes by ID and dataset_id to ensure we're matching the correct nodes
+            # Use WHERE clause for dataset_id since it can't be in property map with rel reference
+            query = f"""
+            UNWIND $rels AS rel
+            MATCH (source:{quote_name(source_label)} {{{quote_name(source_id_key)}: rel.source_id}})
+            WHERE source.dataset_id = rel.dataset_id
+            MATCH (target:{quote_name(target_label)} {{{quote_name(target_id_key)}: rel.target_id}})
+            WHERE target.dataset_id = rel.dataset_id
+            {write_clause.format(rel_type=rel_type_escaped)}
+            RETURN count(r) as count
+            """
+        
+        def batch_parameters(batch: List[Dict[str, Any]]) -> Dict[str, Any]:
+            batch_data = []
+            for rel in batch:
+                props = rel.get('properties', {})
+                if by_element_id:
+                    batch_data.append({
+                        'source': rel['source_element_id'],
+                        'target': rel['target_element_id'],
+                        'props': props
+                    })
+                    continue
+                batch_data.append({
+                    'source_id': rel.get('source_id'),
+                    'target_id': rel.get('target_id'),
+                    'dataset_id': props.get('dataset_id'),  # Extract dataset_id for matching
+                    'props': props
+                })
+            return {'rels': batch_data}
         
         try:
-            driver = self.get_driver()
-            async with driver.session() as session:
-                for i in range(0, len(relationships), batch_size):
-                    batch = relationships[i:i + batch_size]
-                    
-                    # Escape relationship type if it contains special characters
-                    rel_type_escaped = f"`{relationship_type}`" if not relationship_type.replace('_', '').isalnum() else relationship_type
-                    
-                    # Use ON CREATE to track newly created relationships
-                    # Match nodes by ID and dataset_id to ensure we're matching the correct nodes
-                    # Use WHERE clause for dataset_id since it can't be in property map with rel reference
-                    query = f"""
-                    UNWIND $rels AS rel
-                    MATCH (source:{source_label} {{{source_id_key}: rel.source_id}})
-                    WHERE source.dataset_id = rel.dataset_id
-                    MATCH (target:{target_label} {{{target_id_key}: rel.target_id}})
-                    WHERE target.dataset_id = rel.dataset_id
-                    MERGE (source)-[r:{rel_type_escaped}]->(target)
-                    ON CREATE SET r = rel.props
-                    ON MATCH SET r = rel.props
-                    RETURN count(r) as count
-                    """
-                    
-                    # Prepare batch data
-                    batch_data = []
-                    for rel in batch:
-                        props = rel.get('properties', {})
-                        rel_data = {
-                            'source_id': rel.get('source_id'),
-                            'target_id': rel.get('target_id'),
-                            'dataset_id': props.get('dataset_id'),  # Extract dataset_id for matching
-                            'props': props
-                        }
-                        batch_data.append(rel_data)
-                    
-                    try:
-                        result = await session.run(query, {'rels': batch_data})
-                        record = await result.single()
-                        if record:
-                            batch_created = record['count']
-                            created_count += batch_created
-                            logger.info(f"Batch {i//batch_size + 1}: Created/updated {batch_created}/{len(batch)} relationships of type {relationship_type}")
-                            
-                            if batch_created < len(batch):
-                                logger.warning(
-                                    f"Batch {i//batch_size + 1}: Only processed {batch_created}/{len(batch)} relationships. "
-                                    f"Some source or target nodes may not exist. "
-                                    f"Looking for nodes with label '{source_label}' or '{target_label}'"
-                                )
-                        else:
-                            logger.warning(f"Batch {i//batch_size + 1}: No relationships processed - check if nodes exist")
-                            logger.warning(f"Query: {query}")
-                            logger.warning(f"Batch data sample: {batch_data[:2] if batch_data else 'empty'}")
-                    except Exception as batch_error:
-                        logger.error(f"Error processing batch {i//batch_size + 1}: {batch_error}", exc_info=True)
-                        # Continue with next batch instead of failing completely
-                        continue
-            
+            created_count = await self._write_in_transactions(
+                query, relationships, batch_parameters, sizer, on_reject
+            )
+            if created_count < len(relationships):
+                logger.warning(
+                    f"Only processed {created_count}/{len(relationships)} relationships of type {relationship_type}. "
+                    f"Some source or target nodes may not exist. "
+                    f"Looking for nodes with label '{source_label}' or '{target_label}'"
+                )
             logger.info(f"Total relationships created/updated: {created_count} of type {relationship_type}")
             return created_count
         except Exception as e:
             logger.error(f"Batch relationship creation failed: {e}")
             raise
     
-    async def get_schema(self) -> Dict[str, Any]:
+    async def create_relationships_in_lanes(
+        self,
+        source_label: str,
+        source_id_key: str,
+        target_label: str,
+        target_id_key: str,
+        relationship_type: str,
+        relationships: List[Dict[str, Any]],
+        lanes: int,
+        hub_degree: int = 0,
+        sizer: Optional[AdaptiveBatchSizer] = None,
+        strategy: str = 'merge',
+        on_reject: Optional[RejectHandler] = None,
+        lane_stats: Optional[LaneStats] = None,
+        lane_sizers: Optional[List[AdaptiveBatchSizer]] = None
+    ) -> int:
+        """
+        Create relationships with concurrent transactions that rarely lock the same nodes.
+        
+        Rows are partitioned by source id, with hub targets in a lane of their own (see
+        core.relationship_lanes), and every lane is written by create_relationships_batch
+        in its own session, concurrently with the others. Deadlocks left between lanes are
+        transient errors, retried by the managed transactions. If a lane fails, the other
+        lanes are cancelled and the error is raised.
+        
+        Args:
+            lanes: Number of source-hashed lanes (1 writes a single stream)
+            hub_degree: Rows of one target in this batch from which it goes to the hub lane
+            lane_stats: Optional LaneStats accumulating the rows per lane
+            lane_sizers: lanes + 1 sizers, one per lane (the last for the hub lane), kept
+                for the whole upload: lanes wait on each other's locks, so a shared sizer
+                would shrink for all of them, and one lane's memory error would resize the
+                batches of the others mid-flight. Without it every lane uses sizer.
+            (other arguments as create_relationships_batch)
+            
+        Returns:
+            Number of relationships created
+        """
+        if lanes <= 1:
+            return await self.create_relationships_batch(
+                source_label, source_id_key, target_label, target_id_key, relationship_type,
+                relationships, sizer=sizer, strategy=strategy, on_reject=on_reject
+            )
+        
+        partitions, hubs = partition_relationships(relationships, lanes, hub_degree)
+        if lane_stats is not None:
+            lane_stats.record(partitions, hubs)
+        
+        async def write_lane(lane: int, indices: List[int]) -> int:
+            def reject(index: int, error: Exception) -> None:
+                on_reject(indices[index], error)
+            
+            return await self.create_relationships_batch(
+                source_label, source_id_key, target_label, target_id_key, relationship_type,
+                [relationships[index] for index in indices],
+                sizer=lane_sizers[lane] if lane_sizers is not None else sizer,
+                strategy=strategy,
+                on_reject=reject if on_reject is not None else None
+            )
+        
+        # One asyncio task per lane, so each lane gets its own session (see session())
+        tasks = [asyncio.create_task(write_lane(lane, indices)) for lane, indices in enumerate(partitions) if indices]
+        try:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+            for task in done:
+                if task.exception() is not None:
+                    raise task.exception()
+            return sum(task.result() for task in tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+    
+    async def get_schema(self, include_counts: bool = False) -> Dict[str, Any]:
         """
         Get Neo4j database schema information.
         
+        Properties come from db.schema.nodeTypeProperties() / db.schema.relTypeProperties()
+        and counts from the count store, all read in one session with a fixed number of
+        round trips regardless of how many labels and types exist.
+        
+        Args:
+            include_counts: Also return node counts per label and relationship counts per type
+        
         Returns:
-            Dictionary with node labels, relationship types, and their properties
+            Dictionary with node labels, relationship types, their properties and
+            (optionally) counts
         """
         try:
             schema = {
                 'node_labels': [],
                 'relationship_types': [],
-                'properties': {}
+                'properties': {},
+                'relationship_properties': {},
             }
             
-            # Get all node labels
-            labels_query = "CALL db.labels()"
-            driver = self.get_driver()
-            async with driver.session() as session:
-                result = await session.run(labels_query)
-                labels = await result.values()
-                schema['node_labels'] = [label[0] for label in labels]
-            
-            # Get all relationship types
-            rel_types_query = "CALL db.relationshipTypes()"
-            driver = self.get_driver()
-            async with driver.session() as session:
-                result = await session.run(rel_types_query)
-                rel_types = await result.values()
-                schema['relationship_types'] = [rel_type[0] for rel_type in rel_types]
-            
-            # Get properties for each label
-            driver = self.get_driver()
-            async with driver.session() as session:
-                for label in schema['node_labels']:
-                    query = f"""
-                    MATCH (n:{label})
-                    RETURN keys(n) as keys
-                    LIMIT 100
-                    """
-                    result = await session.run(query)
-                    records = await result.data()
-                    if records:
-                        # Get unique properties using set for O(1) lookups
-                        all_keys = set()
-                        for record in records:
-                            all_keys.update(record.get('keys', []))
-                        schema['properties'][label] = list(all_keys)
+            async with self.session() as session:
+                result = await session.run("CALL db.labels() YIELD label RETURN collect(label) AS labels")
+                record = await result.single()
+                schema['node_labels'] = record['labels'] if record else []
+                
+                result = await session.run(
+                    "CALL db.relationshipTypes() YIELD relationshipType "
+                    "RETURN collect(relationshipType) AS types"
+                )
+                record = await result.single()
+                schema['relationship_types'] = record['types'] if record else []
+                
+                # Property keys per label / type from the schema procedures (no per-label scans)
+                node_properties: Dict[str, Set[str]] = {}
+                result = await session.run(
+                    "CALL db.schema.nodeTypeProperties() YIELD nodeLabels, propertyName "
+                    "RETURN nodeLabels, collect(DISTINCT propertyName) AS properties"
+                )
+                async for record in result:
+                    for label in record['nodeLabels'] or []:
+                        node_properties.setdefault(label, set()).update(
+                            prop for prop in record['properties'] if prop is not None
+                        )
+                schema['properties'] = {label: sorted(props) for label, props in node_properties.items()}
+                
+                rel_properties: Dict[str, Set[str]] = {}
+                result = await session.run(
+                    "CALL db.schema.relTypeProperties() YIELD relType, propertyName "
+                    "RETURN relType, collect(DISTINCT propertyName) AS properties"
+                )
+                async for record in result:
+                    # relType is reported as ":`TYPE`"
+                    rel_type = record['relType'].lstrip(':').strip('`').replace('``', '`')
+                    rel_properties.setdefault(rel_type, set()).update(
+                        prop for prop in record['properties'] if prop is not None
+                    )
+                schema['relationship_properties'] = {
+                    rel_type: sorted(props) for rel_type, props in rel_properties.items()
+                }
+                
+                if include_counts:
+                    schema['node_counts'], schema['relationship_counts'] = await self._get_counts(
+                        session, schema['node_labels'], schema['relationship_types']
+                    )
             
             logger.info(f"Schema retrieved: {len(schema['node_labels'])} labels, {len(schema['relationship_types'])} relationship types")
             return schema
@@ -452,6 +1186,35 @@ class Neo4jClient:
             logger.error(f"Schema retrieval failed: {e}")
             raise
     
+    async def _get_counts(
+        self,
+        session: AsyncSession,
+        labels: List[str],
+        relationship_types: List[str]
+    ) -> Tuple[Dict[str, int], Dict[str, int]]:
+        """
+        Count nodes per label and relationships per type in a single UNION ALL query.
+        Each branch is a plain label/type count, which Neo4j answers from the count store.
+        """
+        node_counts = {label: 0 for label in labels}
+        rel_counts = {rel_type: 0 for rel_type in relationship_types}
+        branches = []
+        parameters = {}
+        for i, label in enumerate(labels):
+            parameters[f'n{i}'] = label
+            branches.append(f"MATCH (n:{quote_name(label)}) RETURN 'node' AS kind, $n{i} AS name, count(n) AS count")
+        for i, rel_type in enumerate(relationship_types):
+            parameters[f'r{i}'] = rel_type
+            branches.append(f"MATCH ()-[r:{quote_name(rel_type)}]->() RETURN 'relationship' AS kind, $r{i} AS name, count(r) AS count")
+        if not branches:
+            return node_counts, rel_counts
+        
+        result = await session.run('\nUNION ALL\n'.join(branches), parameters)
+        async for record in result:
+            target = node_counts if record['kind'] == 'node' else rel_counts
+            target[record['name']] = record['count']
+        return node_counts, rel_counts
+    
     async def get_node_count(self, label: Optional[str] = None) -> int:
         """Get count of nodes, optionally filtered by label."""
         try:
@@ -460,8 +1223,7 @@ class Neo4jClient:
             else:
                 query = "MATCH (n) RETURN count(n) as count"
             
-            driver = self.get_driver()
-            async with driver.session() as session:
+            async with self.session() as session:
                 result = await session.run(query)
                 record = await result.single()
                 return record['count'] if record else 0
@@ -477,8 +1239,7 @@ class Neo4jClient:
             else:
                 query = "MATCH ()-[r]->() RETURN count(r) as count"
             
-            driver = self.get_driver()
-            async with driver.session() as session:
+            async with self.session() as session:
                 result = await session.run(query)
                 record = await result.single()
                 return record['count'] if record else 0
@@ -487,30 +1248,107 @@ class Neo4jClient:
             raise
 
     async def delete_relationships_of_type_for_dataset(
-        self, relationship_type: str, dataset_id: int
-    ) -> None:
-        """Delete all relationships of this type for the dataset (used before re-upload to sync to file)."""
+        self,
+        relationship_type: str,
+        dataset_id: int,
+        chunk_size: Optional[int] = None,
+        on_progress: Optional[Callable[[int], Awaitable[None]]] = None,
+    ) -> int:
+        """
+        Delete all relationships of this type for the dataset (used before re-upload to sync to file),
+        chunk_size relationships per transaction.
+
+        Returns:
+            Number of relationships deleted
+        """
         try:
-            rel_type_escaped = (
-                f"`{relationship_type}`"
-                if not relationship_type.replace("_", "").isalnum()
-                else relationship_type
+            deleted = await delete_in_chunks(
+                self.execute_query,
+                relationships_match(relationship_type, "x.dataset_id = $dataset_id"),
+                {"dataset_id": dataset_id},
+                chunk_size=chunk_size or settings.NEO4J_DELETE_CHUNK_SIZE,
+                on_progress=on_progress,
             )
-            query = (
-                f"MATCH ()-[r:{rel_type_escaped}]->() "
-                "WHERE r.dataset_id = $dataset_id "
-                "DELETE r"
-            )
-            driver = self.get_driver()
-            async with driver.session() as session:
-                await session.run(query, {"dataset_id": dataset_id})
             logger.info(
-                f"Deleted relationships of type '{relationship_type}' for dataset {dataset_id}"
+                f"Deleted {deleted} relationships of type '{relationship_type}' for dataset {dataset_id}"
             )
+            return deleted
         except Exception as e:
             logger.error(f"Delete relationships failed: {e}")
             raise
 
+    async def has_relationships_for_dataset(self, relationship_type: str, dataset_id: int) -> bool:
+        """Whether the dataset has at least one relationship of this type."""
+        records = await self.execute_query(
+            f"{relationships_match(relationship_type, 'x.dataset_id = $dataset_id')} RETURN 1 AS found LIMIT 1",
+            {"dataset_id": dataset_id},
+        )
+        return bool(records)
+
+    async def purge_dataset(
+        self,
+        dataset_id: int,
+        chunk_size: Optional[int] = None,
+        on_progress: Optional[Callable[[Dict[str, int]], Awaitable[None]]] = None,
+    ) -> Dict[str, int]:
+        """
+        Delete every relationship and node of a dataset, in bounded transactions.
+
+        Relationships are deleted type by type first, so the DETACH DELETE of the nodes
+        (label by label) never has to remove a large set of relationships at once. Each
+        step is backed by the (dataset_id) indexes provisioned per label and type. The
+        purge is idempotent: running it again after an interruption continues where it
+        stopped.
+
+        Args:
+            dataset_id: Dataset id stored on nodes and relationships
+            chunk_size: Entities deleted per transaction (default NEO4J_DELETE_CHUNK_SIZE)
+            on_progress: Optional coroutine function on_progress(totals) awaited after every
+                chunk, with totals = {'relationships': n, 'nodes': m}
+
+        Returns:
+            Dict with the number of deleted 'relationships' and 'nodes'
+        """
+        chunk_size = chunk_size or settings.NEO4J_DELETE_CHUNK_SIZE
+        totals = {'relationships': 0, 'nodes': 0}
+
+        def progress(kind: str):
+            base = totals[kind]
+
+            async def report(deleted: int) -> None:
+                totals[kind] = base + deleted
+                if on_progress is not None:
+                    await on_progress(dict(totals))
+            return report
+
+        try:
+            types = await self.execute_query("CALL db.relationshipTypes() YIELD relationshipType RETURN relationshipType")
+            for record in types:
+                await delete_in_chunks(
+                    self.execute_query,
+                    relationships_match(record['relationshipType'], "x.dataset_id = $dataset_id"),
+                    {'dataset_id': dataset_id},
+                    chunk_size=chunk_size,
+                    on_progress=progress('relationships'),
+                )
+            labels = await self.execute_query("CALL db.labels() YIELD label RETURN label")
+            for record in labels:
+                await delete_in_chunks(
+                    self.execute_query,
+                    nodes_match(record['label'], "x.dataset_id = $dataset_id"),
+                    {'dataset_id': dataset_id},
+                    detach=True,
+                    chunk_size=chunk_size,
+                    on_progress=progress('nodes'),
+                )
+            logger.info(
+                f"Purged dataset {dataset_id}: {totals['relationships']} relationships, {totals['nodes']} nodes"
+            )
+            return totals
+        except Exception as e:
+            logger.error(f"Dataset purge failed for dataset {dataset_id}: {e}")
+            raise
+
 
 # Singleton instance
 neo4j_client = Neo4jClient()
@@ -0,0 +1,185 @@
+"""
+Neo4j schema provisioning for dataset-scoped graph data.
+
+Every node written by the upload tasks is keyed by (dataset_id, id) and every
+relationship carries a dataset_id property. This module idempotently creates the
+indexes (and, where possible, uniqueness constraints) that back those lookups, and
+remembers what has already been provisioned so the DDL is issued at most once per
+label / relationship type per process.
+"""
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Set, Tuple
+from django.conf import settings
+
+from core.chunked_delete import quote_name
+from core.neo4j_client import neo4j_client, Neo4jClient
+
+logger = logging.getLogger(__name__)
+
+# Composite key for nodes. dataset_id comes first so that the index also serves the
+# "WHERE n.dataset_id = $dataset_id" filters used for counts, samples and exports,
+# while (dataset_id, id) equality lookups from MERGE/MATCH still use a full seek.
+NODE_KEY_PROPERTIES = ('dataset_id', 'id')
+RELATIONSHIP_KEY_PROPERTIES = ('dataset_id',)
+
+
+def _schema_name(prefix: str, name: str, properties: Tuple[str, ...]) -> str:
+    """Build a stable index/constraint name from a label or relationship type."""
+    safe = ''.join(ch if ch.isalnum() else '_' for ch in name)
+    return f"{prefix}_{safe}_{'_'.join(properties)}"
+
+
+class SchemaProvisioner:
+    """Create and track indexes/constraints for node labels and relationship types."""
+
+    def __init__(self, client: Neo4jClient):
+        self.client = client
+        self._lock = threading.Lock()
+        self._provisioned: Set[Tuple[str, str]] = set()  # ('node', label) / ('relationship', type)
+        self._existing_loaded = False
+
+    def is_provisioned(self, entity_type: str, name: str) -> bool:
+        """Return True if the label/type has already been provisioned in this process."""
+        with self._lock:
+            return (entity_type, name) in self._provisioned
+
+    def _mark_provisioned(self, entity_type: str, name: str) -> None:
+        with self._lock:
+            self._provisioned.add((entity_type, name))
+
+    def reset(self) -> None:
+        """Forget what has been provisioned (e.g. after the Neo4j database was cleared)."""
+        with self._lock:
+            self._provisioned.clear()
+            self._existing_loaded = False
+
+    async def _load_existing(self) -> None:
+        """Seed the provisioned set from indexes that already exist in Neo4j."""
+        if self._existing_loaded:
+            return
+        records = await self.client.execute_query(
+            "SHOW INDEXES YIELD entityType, labelsOrTypes, properties "
+            "WHERE labelsOrTypes IS NOT NULL"
+        )
+        node_key = set(NODE_KEY_PROPERTIES)
+        rel_key = set(RELATIONSHIP_KEY_PROPERTIES)
+        with self._lock:
+            for record in records:
+                names = record.get('labelsOrTypes') or []
+                properties = list(record.get('properties') or [])
+                if len(names) != 1:
+                    continue
+                if record.get('entityType') == 'NODE' and set(properties) == node_key:
+                    self._provisioned.add(('node', names[0]))
+                elif record.get('entityType') == 'RELATIONSHIP' and set(properties) == rel_key:
+                    self._provisioned.add(('relationship', names[0]))
+            self._existing_loaded = True
+
+    async def ensure_node_label(self, label: str) -> bool:
+        """
+        Ensure the (dataset_id, id) index exists for a node label.
+
+        A composite uniqueness constraint is tried first when enabled (it also
+        serialises concurrent MERGEs on the same key); if it cannot be created, e.g.
+        because existing data holds duplicates, a plain range index is created instead.
+
+        Returns:
+            True if DDL was issued, False if the label was already provisioned
+        """
+        if not label or self.is_provisioned('node', label):
+            return False
+        await self._load_existing()
+        if self.is_provisioned('node', label):
+            return False
+
+        properties = ', '.join(f"n.{prop}" for prop in NODE_KEY_PROPERTIES)
+        if settings.NEO4J_CREATE_UNIQUENESS_CONSTRAINTS:
+            constraint_query = (
+                f"CREATE CONSTRAINT {quote_name(_schema_name('uniq', label, NODE_KEY_PROPERTIES))} IF NOT EXISTS "
+                f"FOR (n:{quote_name(label)}) REQUIRE ({properties}) IS UNIQUE"
+            )
+            try:
+                await self.client.execute_query(constraint_query)
+                self._mark_provisioned('node', label)
+                logger.info(f"Provisioned uniqueness constraint on {label}({', '.join(NODE_KEY_PROPERTIES)})")
+                return True
+            except Exception as e:
+                logger.warning(f"Could not create uniqueness constraint for {label}, falling back to index: {e}")
+
+        index_query = (
+            f"CREATE INDEX {quote_name(_schema_name('idx', label, NODE_KEY_PROPERTIES))} IF NOT EXISTS "
+            f"FOR (n:{quote_name(label)}) ON ({properties})"
+        )
+        await self.client.execute_query(index_query)
+        self._mark_provisioned('node', label)
+        logger.info(f"Provisioned index on {label}({', '.join(NODE_KEY_PROPERTIES)})")
+        return True
+
+    async def ensure_relationship_type(self, relationship_type: str) -> bool:
+        """
+        Ensure the dataset_id index exists for a relationship type.
+
+        Returns:
+            True if DDL was issued, False if the type was already provisioned
+        """
+        if not relationship_type or self.is_provisioned('relationship', relationship_type):
+            return False
+        await self._load_existing()
+        if self.is_provisioned('relationship', relationship_type):
+            return False
+
+        properties = ', '.join(f"r.{prop}" for prop in RELATIONSHIP_KEY_PROPERTIES)
+        query = (
+            f"CREATE INDEX {quote_name(_schema_name('rel_idx', relationship_type, RELATIONSHIP_KEY_PROPERTIES))} IF NOT EXISTS "
+            f"FOR ()-[r:{quote_name(relationship_type)}]-() ON ({properties})"
+        )
+        await self.client.execute_query(query)
+        self._mark_provisioned('relationship', relationship_type)
+        logger.info(f"Provisioned index on [{relationship_type}]({', '.join(RELATIONSHIP_KEY_PROPERTIES)})")
+        return True
+
+    async def backfill(
+        self,
+        labels: Optional[List[str]] = None,
+        relationship_types: Optional[List[str]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Provision indexes for existing labels and relationship types.
+
+        Args:
+            labels: Labels to provision (default: every label in the database)
+            relationship_types: Types to provision (default: every type in the database)
+
+        Returns:
+            Dictionary with created/skipped/failed names per entity type
+        """
+        if labels is None:
+            records = await self.client.execute_query("CALL db.labels() YIELD label RETURN label")
+            labels = [record['label'] for record in records]
+        if relationship_types is None:
+            records = await self.client.execute_query(
+                "CALL db.relationshipTypes() YIELD relationshipType RETURN relationshipType"
+            )
+            relationship_types = [record['relationshipType'] for record in records]
+
+        report = {
+            'nodes': {'created': [], 'skipped': [], 'failed': []},
+            'relationships': {'created': [], 'skipped': [], 'failed': []},
+        }
+        for entity, names, ensure in (
+            ('nodes', labels, self.ensure_node_label),
+            ('relationships', relationship_types, self.ensure_relationship_type),
+        ):
+            for name in names:
+                try:
+                    created = await ensure(name)
+                    report[entity]['created' if created else 'skipped'].append(name)
+                except Exception as e:
+                    logger.error(f"Schema provisioning failed for {name}: {e}")
+                    report[entity]['failed'].append(name)
+        return report
+
+
+# Singleton instance
+schema_provisioner = SchemaProvisioner(neo4j_client)
@@ -0,0 +1,246 @@
+"""
+Result cache for read-only Cypher queries.
+
+Entries are stored in the Django cache configured as ``QUERY_CACHE_ALIAS`` (an LRU,
+TTL-bounded LocMemCache by default, or Redis with QUERY_CACHE_REDIS_URL). The key is
+the normalized query text plus a hash of the parameters.
+
+Graph data changes when an upload task finishes, a dataset is deleted, or a writing
+query is run through the query API, so invalidation is generation based: every key
+embeds generation counters, and invalidating bumps a counter so old entries are never
+read again and age out of the LRU. Queries that pass a ``dataset_id`` parameter are
+tagged with that dataset and only invalidated when it changes; all other queries may
+read any dataset and are invalidated on every change. A writing query may touch any
+dataset and invalidates everything.
+
+The counters live in the cache itself, so invalidation only reaches the processes
+sharing it: with LocMemCache every server process has its own cache, and the other
+workers of a multi-worker server keep serving their entries until QUERY_CACHE_TTL.
+"""
+import hashlib
+import json
+import logging
+import re
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from django.conf import settings
+from django.core.cache import caches
+
+from core.neo4j_client import neo4j_client
+
+logger = logging.getLogger(__name__)
+
+# Clauses and procedures that may write or administer the database (matched outside string literals)
+WRITE_PATTERN = re.compile(
+    r'(?<![\w.$`])(CREATE|MERGE|DELETE|DETACH|SET|REMOVE|DROP|FOREACH|LOAD\s+CSV|IN\s+TRANSACTIONS|'
+    r'ALTER|RENAME|GRANT|DENY|REVOKE|START|STOP|TERMINATE)\b',
+    re.IGNORECASE
+)
+CALL_PATTERN = re.compile(r'\bCALL\s+([A-Za-z_][\w.]*)', re.IGNORECASE)
+# Procedures known to be read-only; any other CALL disables caching
+READ_ONLY_PROCEDURES = (
+    'db.labels',
+    'db.relationshiptypes',
+    'db.propertykeys',
+    'db.schema.',
+    'db.indexes',
+    'db.constraints',
+)
+# Non-deterministic functions: results must not be reused
+VOLATILE_PATTERN = re.compile(r'(?<![\w.$`])(rand|randomUUID|timestamp|datetime|date|time|localdatetime|localtime)\s*\(', re.IGNORECASE)
+
+UNTAGGED = 'all'
+GLOBAL = 'global'  # Generation embedded in every key, bumped by invalidate_all
+
+
+def _split_literals(query: str) -> List[Tuple[bool, str]]:
+    """Split a query into (is_literal, text) parts; quoted strings and identifiers are literals."""
+    parts = []
+    buffer = []
+    quote = None
+    i = 0
+    while i < len(query):
+        ch = query[i]
+        if quote:
+            buffer.append(ch)
+            if ch == '\\' and quote != '`' and i + 1 < len(query):
+                buffer.append(query[i + 1])
+                i += 1
+            elif ch == quote:
+                parts.append((True, ''.join(buffer)))
+                buffer = []
+                quote = None
+        elif ch in ('"', "'", '`'):
+            if buffer:
+                parts.append((False, ''.join(buffer)))
+            buffer = [ch]
+            quote = ch
+        else:
+            buffer.append(ch)
+        i += 1
+    if buffer:
+        parts.append((bool(quote), ''.join(buffer)))
+    return parts
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalize Cypher text for cache keys: drop comments, collapse whitespace and
+    trailing semicolons. String literals and quoted identifiers are left untouched.
+    """
+    normalized = []
+    for is_literal, text in _split_literals(query):
+        if not is_literal:
+            text = re.sub(r'//[^\n]*', ' ', text)
+            text = re.sub(r'/\*.*?\*/', ' ', text, flags=re.DOTALL)
+            text = re.sub(r'\s+', ' ', text)
+        normalized.append(text)
+    return ''.join(normalized).strip().rstrip(';').strip()
+
+
+def _code(query: str) -> str:
+    return ' '.join(text for is_literal, text in _split_literals(normalize_query(query)) if not is_literal)
+
+
+def _may_write(code: str) -> bool:
+    if WRITE_PATTERN.search(code):
+        return True
+    for match in CALL_PATTERN.finditer(code):
+        procedure = match.group(1).lower()
+        if not procedure.startswith(READ_ONLY_PROCEDURES):
+            return True
+    return False
+
+
+def may_write(query: str) -> bool:
+    """Return True if the query may change the graph (writes, admin commands, unknown procedures)."""
+    return _may_write(_code(query))
+
+
+def is_read_only(query: str) -> bool:
+    """Return True if the query can be cached (no writes, admin commands or volatile functions)."""
+    code = _code(query)
+    return not _may_write(code) and not VOLATILE_PATTERN.search(code)
+
+
+def _parameters_hash(parameters: Optional[Dict[str, Any]]) -> str:
+    payload = json.dumps(parameters or {}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class QueryResultCache:
+    """Read-through cache for read-only query results with dataset-aware invalidation."""
+
+    def __init__(self, alias: str, max_rows: int):
+        self.alias = alias
+        self.max_rows = max_rows
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    @property
+    def enabled(self) -> bool:
+        return settings.QUERY_CACHE_ENABLED
+
+    def _generation(self, tag: str) -> str:
+        # Seeded from the clock: if a counter is evicted, the new one can never collide
+        # with a generation whose entries may still be cached
+        keys = [f'qc:gen:{GLOBAL}', f'qc:gen:{tag}']
+        found = self.cache.get_many(keys)
+        return '.'.join(
+            str(found[key]) if key in found else str(self.cache.get_or_set(key, time.time_ns, timeout=None))
+            for key in keys
+        )
+
+    def _tag(self, parameters: Optional[Dict[str, Any]]) -> str:
+        dataset_id = (parameters or {}).get('dataset_id')
+        return f'dataset:{dataset_id}' if dataset_id is not None else UNTAGGED
+
+    def make_key(self, query: str, parameters: Optional[Dict[str, Any]] = None) -> str:
+        """Build the cache key for a query in the current generation of its tag."""
+        tag = self._tag(parameters)
+        digest = hashlib.sha256(normalize_query(query).encode('utf-8')).hexdigest()
+        return f'qc:{tag}:{self._generation(tag)}:{digest}:{_parameters_hash(parameters)}'
+
+    def get(self, query: str, parameters: Optional[Dict[str, Any]] = None) -> Optional[List[Dict[str, Any]]]:
+        """Return cached rows, or None on a miss (or if the query is not cacheable)."""
+        if not self.enabled or not is_read_only(query):
+            return None
+        return self.cache.get(self.make_key(query, parameters))
+
+    def set(self, query: str, parameters: Optional[Dict[str, Any]], rows: List[Dict[str, Any]]) -> bool:
+        """Store rows for a read-only query. Results larger than max_rows are not cached."""
+        if not self.enabled or not is_read_only(query) or len(rows) > self.max_rows:
+            return False
+        self.cache.set(self.make_key(query, parameters), rows)
+        return True
+
+    def get_value(self, name: str, dataset_id: Optional[int] = None) -> Any:
+        """Return a derived value (e.g. the schema summary) cached under name, or None."""
+        if not self.enabled:
+            return None
+        tag = f'dataset:{dataset_id}' if dataset_id is not None else UNTAGGED
+        return self.cache.get(f'qc:{tag}:{self._generation(tag)}:value:{name}')
+
+    def set_value(self, name: str, value: Any, dataset_id: Optional[int] = None) -> None:
+        """Cache a derived value; it is invalidated together with query results of the same tag."""
+        if not self.enabled:
+            return
+        tag = f'dataset:{dataset_id}' if dataset_id is not None else UNTAGGED
+        self.cache.set(f'qc:{tag}:{self._generation(tag)}:value:{name}', value)
+
+    async def execute(
+        self,
+        query: str,
+        parameters: Optional[Dict[str, Any]] = None
+    ) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        Execute a query through the cache.
+
+        Returns:
+            Tuple of (rows, cache_hit)
+        """
+        rows = self.get(query, parameters)
+        if rows is not None:
+            return rows, True
+        rows = await neo4j_client.execute_query(query, parameters)
+        self.set(query, parameters, rows)
+        return rows, False
+
+    def _bump(self, tag: str) -> None:
+        key = f'qc:gen:{tag}'
+        try:
+            self.cache.incr(key)
+        except ValueError:
+            self.cache.set(key, time.time_ns(), timeout=None)
+
+    def invalidate_dataset(self, dataset_id: int) -> None:
+        """Invalidate entries tagged with this dataset and all untagged entries."""
+        self._bump(f'dataset:{dataset_id}')
+        self._bump(UNTAGGED)
+        logger.info(f"Query cache invalidated for dataset {dataset_id}")
+
+    def invalidate_all(self) -> None:
+        """Invalidate every cached result (e.g. after a writing query, which may touch any dataset)."""
+        self._bump(GLOBAL)
+        logger.info("Query cache invalidated for all datasets")
+
+    def invalidate_after_write(self, query: str) -> bool:
+        """
+        Invalidate everything if the query may have changed the graph.
+
+        Call once the query has finished (its transaction committed or failed), so a
+        read running meanwhile cannot cache the data from before the write.
+
+        Returns:
+            Whether the cache was invalidated
+        """
+        if not self.enabled or not may_write(query):
+            return False
+        self.invalidate_all()
+        return True
+
+
+# Singleton instance
+query_cache = QueryResultCache(settings.QUERY_CACHE_ALIAS, settings.QUERY_CACHE_MAX_ROWS)
@@ -0,0 +1,235 @@
+"""
+Background task runner backed by a single long-lived asyncio event loop.
+
+Upload processing used to start a fresh thread and event loop per file. Because
+Neo4j drivers are bound to the loop they were created on, every upload also
+created (and leaked) its own connection pool. This module runs all background
+coroutines on one loop in one daemon thread, so the Neo4j driver for that loop
+is created once and reused, and bounds how many tasks run at the same time.
+"""
+import asyncio
+import atexit
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundTaskRunner:
+    """
+    Queue coroutines onto a persistent event loop with a concurrency limit.
+
+    Tasks beyond the limit wait on a semaphore inside the loop, so submission never
+    blocks the caller. Submitting a key that is already queued or running is a no-op.
+    """
+
+    def __init__(self, name: str, concurrency: int):
+        self.name = name
+        self.concurrency = max(1, concurrency)
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._ready = threading.Event()
+        self._futures: Dict[Hashable, Future] = {}
+        self._running = 0
+        self._shutting_down = False
+        self._shutdown_hooks = []
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """The runner's event loop (started on first access)."""
+        self.start()
+        return self._loop
+
+    def start(self) -> None:
+        """Start the loop thread if it is not running yet."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            if self._shutting_down:
+                raise RuntimeError(f"{self.name} runner is shutting down")
+            self._ready.clear()
+            self._thread = threading.Thread(target=self._run_loop, daemon=True, name=self.name)
+            self._thread.start()
+        self._ready.wait()
+
+    def _run_loop(self) -> None:
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self._loop = loop
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._ready.set()
+        logger.info(f"{self.name} event loop started (concurrency={self.concurrency})")
+        try:
+            loop.run_forever()
+        finally:
+            loop.run_until_complete(loop.shutdown_asyncgens())
+            loop.close()
+            logger.info(f"{self.name} event loop stopped")
+
+    def add_shutdown_hook(self, hook: Callable[[], Awaitable[Any]]) -> None:
+        """Register a coroutine function to await on the loop before it is stopped."""
+        self._shutdown_hooks.append(hook)
+
+    def submit(self, key: Hashable, coro_factory: Callable[[], Awaitable[Any]]) -> Optional[Future]:
+        """
+        Queue a coroutine for execution.
+
+        Args:
+            key: Identifier used to de-duplicate submissions (e.g. a task id)
+            coro_factory: Zero-argument callable returning the coroutine to run
+
+        Returns:
+            concurrent.futures.Future for the task, or None if the runner is shutting down
+        """
+        if self._shutting_down:
+            logger.warning(f"{self.name} is shutting down, not accepting {key}")
+            return None
+        self.start()
+        with self._lock:
+            existing = self._futures.get(key)
+            if existing is not None and not existing.done():
+                logger.info(f"{self.name}: {key} is already queued or running")
+                return existing
+            future = asyncio.run_coroutine_threadsafe(self._run_guarded(key, coro_factory), self._loop)
+            self._futures[key] = future
+        future.add_done_callback(lambda _f, key=key: self._forget(key, _f))
+        return future
+
+    def is_active(self, key: Hashable) -> bool:
+        """Whether a submission with this key is queued or running."""
+        with self._lock:
+            future = self._futures.get(key)
+            return future is not None and not future.done()
+
+    def run(self, coro_factory: Callable[[], Awaitable[Any]], timeout: Optional[float] = None) -> Any:
+        """
+        Run a coroutine on the loop and block until it finishes (within the concurrency limit).
+
+        Unlike submit(), exceptions propagate to the caller.
+        """
+        if self._shutting_down:
+            raise RuntimeError(f"{self.name} runner is shutting down")
+
+        async def limited():
+            async with self._semaphore:
+                self._running += 1
+                try:
+                    return await coro_factory()
+                finally:
+                    self._running -= 1
+
+        return asyncio.run_coroutine_threadsafe(limited(), self.loop).result(timeout)
+
+    def _forget(self, key: Hashable, future: Future) -> None:
+        with self._lock:
+            if self._futures.get(key) is future:
+                del self._futures[key]
+
+    async def _run_guarded(self, key: Hashable, coro_factory: Callable[[], Awaitable[Any]]) -> Any:
+        async with self._semaphore:
+            self._running += 1
+            try:
+                return await coro_factory()
+            except asyncio.CancelledError:
+                logger.warning(f"{self.name}: {key} was cancelled")
+                raise
+            except Exception as e:
+                logger.error(f"{self.name}: {key} failed: {e}", exc_info=True)
+            finally:
+                self._running -= 1
+
+    def stats(self) -> Dict[str, int]:
+        """Return queued/running counts for monitoring."""
+        with self._lock:
+            in_flight = sum(1 for future in self._futures.values() if not future.done())
+        running = self._running
+        return {
+            'concurrency': self.concurrency,
+            'running': running,
+            'queued': max(0, in_flight - running),
+        }
+
+    def shutdown(self, timeout: Optional[float] = 30.0) -> None:
+        """
+        Stop accepting work, wait up to ``timeout`` seconds (None: no limit) for
+        in-flight tasks, cancel whatever is left, run shutdown hooks and stop the loop.
+
+        Cancelled tasks keep their persisted state (e.g. 'processing') so they can be
+        re-queued on the next start.
+        """
+        with self._lock:
+            if self._shutting_down or self._thread is None or not self._thread.is_alive():
+                self._shutting_down = True
+                return
+            self._shutting_down = True
+            pending = [future for future in self._futures.values() if not future.done()]
+
+        if pending:
+            logger.info(f"{self.name}: waiting up to {timeout}s for {len(pending)} task(s)")
+
+        async def drain():
+            tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+            if tasks:
+                _, still_running = await asyncio.wait(tasks, timeout=timeout)
+                for task in still_running:
+                    task.cancel()
+                if still_running:
+                    logger.warning(f"{self.name}: cancelled {len(still_running)} unfinished task(s)")
+                    await asyncio.gather(*still_running, return_exceptions=True)
+            for hook in self._shutdown_hooks:
+                try:
+                    await hook()
+                except Exception as e:
+                    logger.warning(f"{self.name}: shutdown hook failed: {e}")
+
+        try:
+            asyncio.run_coroutine_threadsafe(drain(), self._loop).result(
+                None if timeout is None else timeout + 10
+            )
+        except Exception as e:
+            logger.warning(f"{self.name}: graceful shutdown incomplete: {e}")
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+
+
+def create_runner(name: str, concurrency: int, shutdown_timeout: float = 30.0) -> BackgroundTaskRunner:
+    """Create a runner that closes its Neo4j driver and stops cleanly at interpreter exit."""
+    from core.neo4j_client import neo4j_client
+
+    runner = BackgroundTaskRunner(name, concurrency)
+    runner.add_shutdown_hook(neo4j_client.close)
+    atexit.register(runner.shutdown, shutdown_timeout)
+    return runner
+
+
+_request_runner: Optional[BackgroundTaskRunner] = None
+_request_runner_lock = threading.Lock()
+
+
+def get_request_runner() -> BackgroundTaskRunner:
+    """Return the shared loop used by synchronous views to talk to Neo4j."""
+    global _request_runner
+    with _request_runner_lock:
+        if _request_runner is None:
+            _request_runner = create_runner(
+                'Neo4jRequestLoop',
+                settings.NEO4J_REQUEST_CONCURRENCY,
+                shutdown_timeout=5.0
+            )
+        return _request_runner
+
+
+def run_sync(async_fn: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+    """
+    Call an async function from synchronous code and return its result.
+
+    Replacement for ``async_to_sync(fn)(...)`` for Neo4j work: asgiref may run each call
+    on a new, short-lived event loop, which would create a new Neo4j driver every time.
+    Here every call runs on the same long-lived loop, so its driver and pool are reused.
+    """
+    return get_request_runner().run(lambda: async_fn(*args, **kwargs))
@@ -1,3 +1,654 @@
-from django.test import TestCase
+import asyncio
+import csv
+import io
+import os
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+from django.test import SimpleTestCase
+from neo4j.exceptions import Neo4jError, ServiceUnavailable, SessionExpired
+
+from core.chunked_delete import delete_in_transactions, nodes_match
+from core.column_profile import DISTINCT_SKETCH_SIZE, ColumnProfiler, TableProfiler
+from core.csv_processor import (
+    MAX_ROW_VALIDATION, CSVProcessor, NodeCSVValidator, NodeRowConverter, convert_byte_range, iter_record_ranges
+)
+from core.endpoint_resolver import EndpointResolver
+from core.ingest_pipeline import BatchWriteError, IngestPipeline
+from core.neo4j_client import AdaptiveBatchSizer, Neo4jClient, classify_write_error
+from core.query_cache import is_read_only, may_write, normalize_query
+from core.relationship_lanes import partition_relationships
+from core.write_strategy import CREATE, MERGE, BloomFilter, RelationshipWriteStrategy
+
+
+def _batches(count, rows_per_batch=2):
+    return iter([[{'row': batch * rows_per_batch + i} for i in range(rows_per_batch)] for batch in range(count)])
+
+
+class IngestPipelineTests(SimpleTestCase):
+
+    def _pipeline(self, count, write, writers=3, **kwargs):
+        read = [0]
+
+        def position():
+            read[0] += 1
+            return read[0]  # Position after batch n is n + 1
+
+        return IngestPipeline(
+            _batches(count), convert=list, write=write, writers=writers, position=position, **kwargs
+        )
+
+    async def test_watermark_never_passes_an_unwritten_batch(self):
+        written = set()
+        progress = []
+
+        async def write(batch_num, payload):
+            # Later batches finish first
+            await asyncio.sleep(0.002 * (6 - batch_num))
+            written.add(batch_num)
+
+        async def on_progress(batch_num, processed):
+            self.assertTrue(set(range(batch_num + 1)) <= written)
+            self.assertEqual(processed, (batch_num + 1) * 2)
+            self.assertEqual(pipeline.position, batch_num + 1)
+            progress.append(batch_num)
+
+        pipeline = self._pipeline(6, write, on_progress=on_progress)
+        processed = await pipeline.run()
+
+        self.assertEqual(processed, 12)
+        self.assertEqual(pipeline.batches_written, 6)
+        self.assertEqual(progress, sorted(progress))
+        self.assertEqual(progress[-1], 5)
+        self.assertEqual(pipeline.position, 6)
+
+    async def test_failed_write_propagates_and_holds_the_watermark(self):
+        async def write(batch_num, payload):
+            if batch_num == 2:
+                await asyncio.sleep(0.005)
+                raise ValueError('rejected')
+            await asyncio.sleep(0.001)
+
+        pipeline = self._pipeline(6, write)
+        with self.assertRaises(BatchWriteError) as raised:
+            await pipeline.run()
+
+        self.assertEqual(raised.exception.batch_num, 2)
+        self.assertIsInstance(raised.exception.error, ValueError)
+        # Batches after 2 may have been written, but the watermark and checkpoint stop before it
+        self.assertEqual(pipeline.processed, 4)
+        self.assertEqual(pipeline.position, 2)
+
+    async def test_wait_written_waits_for_every_earlier_batch(self):
+        written = set()
+
+        async def write(batch_num, payload):
+            if batch_num == 3:
+                await pipeline.wait_written(3)
+                self.assertTrue({0, 1, 2} <= written)
+            else:
+                await asyncio.sleep(0.002 * (4 - batch_num))
+            written.add(batch_num)
+
+        pipeline = self._pipeline(5, write, writers=4)
+        self.assertEqual(await pipeline.run(), 10)
+
+    async def test_convert_error_propagates(self):
+        def convert(batch):
+            if batch[0]['row'] == 4:
+                raise RuntimeError('bad row')
+            return batch
+
+        async def write(batch_num, payload):
+            pass
+
+        pipeline = IngestPipeline(_batches(4), convert=convert, write=write, writers=2)
+        with self.assertRaisesMessage(RuntimeError, 'bad row'):
+            await pipeline.run()
+        self.assertLessEqual(pipeline.processed, 4)
+
+
+class RecordRangeTests(SimpleTestCase):
+
+    def setUp(self):
+        rows = [['id', 'name', 'note']]
+        for i in range(300):
+            note = ['plain', 'with ""quotes""', 'multi\nline', '"quoted, comma"', 'end quote""', ''][i % 6]
+            rows.append([str(i), f'name {i}', note.replace('""', '"')])
+        buffer = io.StringIO(newline='')
+        csv.writer(buffer).writerows(rows)
+        self.rows = rows
+        handle, self.path = tempfile.mkstemp(suffix='.csv')
+        with os.fdopen(handle, 'wb') as f:
+            f.write(buffer.getvalue().encode('utf-8'))
+        self.addCleanup(os.remove, self.path)
+
+    def test_ranges_round_trip_quoted_newlines_and_quotes(self):
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        header_end = data.index(b'\n') + 1
+        for chunk_bytes in (1, 7, 64, 256, 4096, len(data) * 2):
+            with self.subTest(chunk_bytes=chunk_bytes):
+                ranges = list(iter_record_ranges(self.path, header_end, len(data), chunk_bytes))
+                self.assertEqual(ranges[0][0], header_end)
+                self.assertEqual(ranges[-1][1], len(data))
+                for (_, end), (start, _) in zip(ranges, ranges[1:]):
+                    self.assertEqual(end, start)
+                parsed = []
+                for start, end in ranges:
+                    parsed += list(csv.reader(io.StringIO(data[start:end].decode('utf-8'), newline='')))
+                self.assertEqual(parsed, self.rows[1:])
+
+    def test_convert_byte_range_batches_rows(self):
+        converter = NodeRowConverter(self.rows[0], {'id': 'integer'}, id_column='id')
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        batches = convert_byte_range(self.path, data.index(b'\n') + 1, len(data), converter, 128)
+        self.assertEqual([len(batch) for batch in batches], [128, 128, 44])
+        self.assertEqual(batches[2][-1]['id'], 299)
+
+    def test_parallel_batches_match_sequential_batches(self):
+        sequential = CSVProcessor(self.path)
+        sequential.open_stream()
+        converter = NodeRowConverter(sequential.header, sequential.metadata['data_types'], id_column='id')
+        expected = [row for batch in sequential.iter_batches(16, raw=True) for row in converter.convert_batch(batch)]
+
+        parallel = CSVProcessor(self.path)
+        parallel.open_stream()
+        rows = [row for batch in parallel.iter_parallel_batches(16, converter, workers=2, chunk_bytes=512) for row in batch]
+
+        self.assertEqual(len(expected), 300)
+        self.assertEqual(rows, expected)
+        self.assertEqual(parallel.metadata['row_count'], 300)
+
+
+class ProfileColumnsTests(SimpleTestCase):
+
+    def _write(self, rows):
+        handle, path = tempfile.mkstemp(suffix='.csv')
+        with os.fdopen(handle, 'w', newline='') as f:
+            csv.writer(f).writerows(rows)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def test_types_come_from_the_whole_file(self):
+        rows = [['id', 'score', 'flag', 'late']]
+        rows += [[str(i), str(i), 'true', ''] for i in range(MAX_ROW_VALIDATION + 2000)]
+        rows[-1][1:] = ['2.5', 'maybe', '7']
+        processor = CSVProcessor(self._write(rows))
+        metadata = processor.open_stream(NodeCSVValidator(processor.file_path))
+        self.assertEqual(metadata['data_types']['score'], 'integer')
+
+        for workers in (1, 2):
+            with self.subTest(workers=workers):
+                metadata = processor.profile_columns(workers=workers, chunk_bytes=4096)
+                types = metadata['data_types']
+                self.assertEqual((types['score'], types['flag'], types['late']), ('float', 'string', 'integer'))
+                self.assertEqual(processor.column_profiler.profile()['score']['count'], len(rows) - 1)
+
+        converter = NodeRowConverter(processor.header, metadata['data_types'], id_column='id')
+        last = [row for batch in processor.iter_batches(1000, raw=True) for row in converter.convert_batch(batch)][-1]
+        self.assertEqual((last['score'], last['flag'], last['late']), (2.5, 'maybe', 7))
+
+
+def _profile(*blocks):
+    column = ColumnProfiler('value')
+    for block in blocks:
+        column.update(block)
+    return column
+
+
+class ColumnProfilerTests(SimpleTestCase):
+
+    def test_types_are_promoted_across_blocks(self):
+        column = _profile(['1', '-2', '+3'])
+        self.assertEqual(column.data_type, 'integer')
+        column.update(['4', '1.5e3', 'NaN'])
+        self.assertEqual(column.data_type, 'float')
+        column.update(['7'])
+        self.assertEqual(column.data_type, 'float')  # Never narrowed again
+        column.update(['seven'])
+        self.assertEqual(column.data_type, 'string')
+
+    def test_booleans_and_multi_line_values(self):
+        self.assertEqual(_profile(['true', 'No', 'YES']).data_type, 'boolean')
+        self.assertEqual(_profile(['1', '0']).data_type, 'integer')  # Integer wins over boolean
+        self.assertEqual(_profile(['12', '3\n4']).data_type, 'string')
+
+    def test_date_format_is_detected_once_per_column(self):
+        column = _profile(['2024-01-31', '2024-02-01'])
+        self.assertEqual((column.data_type, column.date_format), ('date', '%Y-%m-%d'))
+        column.update(['2024/03/01'])  # Valid with another format, but not the column's
+        self.assertEqual(column.data_type, 'string')
+        self.assertEqual(column.date_format, '%Y-%m-%d')
+
+        column = _profile(['2024-01-31T10:00:00'], ['2024-02-01T11:30:00'])
+        profile = column.profile()
+        self.assertEqual((profile['type'], profile['date_format']), ('datetime', '%Y-%m-%dT%H:%M:%S'))
+        self.assertEqual((profile['min'], profile['max']), ('2024-01-31T10:00:00', '2024-02-01T11:30:00'))
+
+        profile = _profile(['12/31/2024', '01/15/2025']).profile()
+        self.assertEqual((profile['type'], profile['date_format']), ('date', '%m/%d/%Y'))
+        self.assertEqual((profile['min'], profile['max']), (None, None))  # Not chronological as text
+
+    def test_all_null_column_is_unknown(self):
+        column = _profile(['', None, '  '], [''])
+        profile = column.profile()
+        self.assertEqual(profile['type'], 'unknown')
+        self.assertEqual((profile['count'], profile['null_ratio']), (4, 1.0))
+        self.assertEqual(profile['approx_distinct'], 0)
+        self.assertEqual(ColumnProfiler('empty').profile()['null_ratio'], 0.0)
+
+    def test_null_ratio_and_numeric_bounds(self):
+        profile = _profile(['5', '', '-3', '12'], [None, '7']).profile()
+        self.assertEqual(profile['null_ratio'], round(2 / 6, 4))
+        self.assertEqual((profile['min'], profile['max']), (-3, 12))
+        self.assertIsInstance(profile['min'], int)
+
+        profile = _profile(['1', '2'], ['-0.5', 'nan', '1e2']).profile()
+        self.assertEqual((profile['type'], profile['min'], profile['max']), ('float', -0.5, 100.0))
+
+        profile = _profile([str(2 ** 70), '1']).profile()  # Beyond int64
+        self.assertEqual((profile['min'], profile['max']), (1, 2 ** 70))
+
+    def test_approximate_distinct_count(self):
+        self.assertEqual(_profile(['a', 'b', 'a', 'c']).approx_distinct, 3)
+        for distinct in (20000, 100000):
+            with self.subTest(distinct=distinct):
+                values = [f'value-{i % distinct}' for i in range(distinct * 2)]
+                column = _profile(*(values[i:i + 4096] for i in range(0, len(values), 4096)))
+                self.assertGreater(column.approx_distinct, DISTINCT_SKETCH_SIZE)
+                self.assertLess(abs(column.approx_distinct - distinct) / distinct, 0.1)
+
+    def test_merge_matches_a_single_pass(self):
+        header = ['id', 'score', 'day', 'empty']
+        rows = [[str(i), str(i % 50) if i % 7 else '', f'2024-01-{i % 28 + 1:02d}', ''] for i in range(6000)]
+        rows[4500][1] = '0.25'
+
+        single = TableProfiler(header, block_size=1000)
+        single.add_rows(rows)
+        parts = [TableProfiler(header, block_size=1000) for _ in range(3)]
+        for part, start in zip(parts, (0, 2000, 4000)):
+            part.add_rows(rows[start:start + 2000])
+        merged = TableProfiler(header)
+        for part in parts:
+            merged.merge(part)
+
+        self.assertEqual(merged.profile(), single.profile())
+        self.assertEqual(merged.data_types(), {'id': 'integer', 'score': 'float', 'day': 'date', 'empty': 'unknown'})
+        self.assertEqual(merged.sample_values()['id'], '0')
+
+
+def _neo4j_error(code):
+    return Neo4jError.hydrate(message='failed', code=code)
+
+
+MEMORY_ERROR = 'Neo.TransientError.General.MemoryPoolOutOfMemoryError'
+
+
+class AdaptiveBatchSizerTests(SimpleTestCase):
+
+    def test_grows_at_most_doubling_towards_the_target(self):
+        sizer = AdaptiveBatchSizer(100, 10, 10000, target_seconds=1.0)
+        sizer.record(100, 0.01)  # 100x faster than the target
+        self.assertEqual(sizer.size, 200)
+        sizer.record(200, 0.02)
+        self.assertEqual(sizer.size, 400)
+
+    def test_growth_is_capped_by_max_size(self):
+        sizer = AdaptiveBatchSizer(600, 10, 1000, target_seconds=1.0)
+        sizer.record(600, 0.01)
+        self.assertEqual(sizer.size, 1000)
+
+    def test_shrinks_immediately_when_slow(self):
+        sizer = AdaptiveBatchSizer(1000, 10, 10000, target_seconds=1.0)
+        sizer.record(1000, 4.0)  # 4 ms per row: 250 rows take a second
+        self.assertEqual(sizer.size, 250)
+        sizer.record(250, 100.0)
+        self.assertEqual(sizer.size, 10)  # Not below min_size
+
+    def test_payload_bound(self):
+        sizer = AdaptiveBatchSizer(100, 10, 10000, target_seconds=1.0, max_bytes=5000)
+        sizer.record(100, 0.001, payload_bytes=10000)  # 100 bytes per row
+        self.assertEqual(sizer.size, 50)
+
+    def test_memory_error_halves_and_caps_later_growth(self):
+        sizer = AdaptiveBatchSizer(1000, 10, 10000, target_seconds=1.0)
+        self.assertTrue(sizer.back_off(_neo4j_error(MEMORY_ERROR)))
+        self.assertEqual(sizer.size, 500)
+        self.assertEqual(sizer.backoffs, 1)
+        sizer.record(500, 0.001)
+        sizer.record(750, 0.001)
+        self.assertEqual(sizer.size, 750)  # Ceiling: 3/4 of the size that failed
+
+    def test_other_errors_and_min_size_do_not_back_off(self):
+        sizer = AdaptiveBatchSizer(10, 10, 10000)
+        self.assertFalse(sizer.back_off(_neo4j_error(MEMORY_ERROR)))
+        sizer = AdaptiveBatchSizer(1000, 10, 10000)
+        self.assertFalse(sizer.back_off(_neo4j_error('Neo.TransientError.Transaction.DeadlockDetected')))
+        self.assertEqual(sizer.size, 1000)
+
+    def test_fixed_sizer_never_changes(self):
+        sizer = AdaptiveBatchSizer.fixed(100)
+        sizer.record(100, 50.0)
+        self.assertEqual(sizer.size, 100)
+        self.assertFalse(sizer.back_off(_neo4j_error(MEMORY_ERROR)))
+
+    def test_combined_stats_of_lane_sizers(self):
+        shared = AdaptiveBatchSizer(100, 10, 10000, target_seconds=1.0)
+        fast, slow, idle = shared.spawn(), shared.spawn(), shared.spawn()
+        fast.record(100, 0.01)
+        slow.record(100, 4.0)
+        self.assertEqual((fast.size, slow.size, idle.size), (200, 25, 100))
+        self.assertEqual(AdaptiveBatchSizer.combined_stats([shared, fast]), fast.stats())
+
+        stats = AdaptiveBatchSizer.combined_stats([shared, fast, slow, idle])
+        self.assertEqual(stats['final_sizes'], [200, 25])
+        self.assertEqual((stats['transactions'], stats['rows'], stats['mean_size']), (2, 200, 100.0))
+        self.assertEqual((stats['smallest_size'], stats['largest_size']), (25, 200))
+        self.assertEqual(stats['avg_transaction_ms'], 2005.0)
+
+    async def test_each_lane_writes_with_its_own_sizer(self):
+        client = Neo4jClient()
+        sizers = [AdaptiveBatchSizer(100, 10, 1000) for _ in range(3)]
+        used = {}
+
+        async def write(source_label, source_key, target_label, target_key, rel_type, relationships, sizer=None, **kwargs):
+            used[id(sizer)] = used.get(id(sizer), 0) + len(relationships)
+            return len(relationships)
+
+        rels = _rels([(source, 'hub') for source in range(10)] + [(source, source + 1) for source in range(20)])
+        with mock.patch.object(client, 'create_relationships_batch', write):
+            created = await client.create_relationships_in_lanes(
+                'A', 'id', 'B', 'id', 'R', rels, lanes=2, hub_degree=5, lane_sizers=sizers
+            )
+        self.assertEqual(created, 30)
+        self.assertEqual(used[id(sizers[2])], 10)  # Hub lane
+        self.assertEqual(used[id(sizers[0])] + used[id(sizers[1])], 20)
+
+
+class PartitionRelationshipsTests(SimpleTestCase):
+
+    def test_non_hub_sources_land_in_one_hashed_lane(self):
+        rels = _rels([(source, target) for source in range(40) for target in (source + 1, source + 2, 'x')])
+        partitions, hubs = partition_relationships(rels, lanes=4, hub_degree=0)
+        self.assertEqual(hubs, set())
+        self.assertEqual(partitions[4], [])
+        self.assertEqual(sorted(index for partition in partitions for index in partition), list(range(len(rels))))
+        for source in range(40):
+            lanes = {lane for lane, partition in enumerate(partitions) for index in partition
+                     if rels[index]['source_id'] == source}
+            self.assertEqual(len(lanes), 1)
+
+    def test_hub_rows_go_only_to_the_last_lane(self):
+        rels = _rels([(source, 'hub') for source in range(10)] + [(source, 'leaf') for source in range(3)])
+        partitions, hubs = partition_relationships(rels, lanes=3, hub_degree=5)
+        self.assertEqual(hubs, {'hub'})
+        self.assertEqual(sorted(partitions[3]), list(range(10)))
+        for partition in partitions[:3]:
+            self.assertTrue(all(rels[index]['target_id'] == 'leaf' for index in partition))
+
+    def test_repeated_pairs_stay_in_one_lane_in_file_order(self):
+        rels = _rels([(1, 2), (3, 4), (1, 2), (5, 6), (1, 2)])
+        for row, rel in enumerate(rels):
+            rel['row'] = row
+        partitions, _ = partition_relationships(rels, lanes=3, hub_degree=0)
+        lanes = [partition for partition in partitions if 0 in partition]
+        self.assertEqual(len(lanes), 1)
+        repeated = [index for index in lanes[0] if rels[index]['source_id'] == 1]
+        self.assertEqual(repeated, [0, 2, 4])
+
+    def test_lanes_are_sorted_by_target_then_source_with_mixed_id_types(self):
+        rels = _rels([('b', 2), (2, 'a'), (1, 2), ('a', 'a'), (3, 1), ('c', 1)])
+        partitions, _ = partition_relationships(rels, lanes=1, hub_degree=0)
+        ordered = [(rels[index]['source_id'], rels[index]['target_id']) for index in partitions[0]]
+        self.assertEqual(ordered, [(3, 1), ('c', 1), (1, 2), ('b', 2), (2, 'a'), ('a', 'a')])
+
+
+class ClassifyWriteErrorTests(SimpleTestCase):
+
+    def test_memory_errors_resize(self):
+        self.assertEqual(classify_write_error(_neo4j_error(MEMORY_ERROR)), 'resize')
+        self.assertEqual(
+            classify_write_error(_neo4j_error('Neo.TransientError.General.TransactionMemoryLimit')), 'resize'
+        )
+
+    def test_transient_errors(self):
+        self.assertEqual(
+            classify_write_error(_neo4j_error('Neo.TransientError.Transaction.DeadlockDetected')), 'transient'
+        )
+        self.assertEqual(classify_write_error(ServiceUnavailable('down')), 'transient')
+        self.assertEqual(classify_write_error(SessionExpired('expired')), 'transient')
+
+    def test_data_errors_are_permanent(self):
+        self.assertEqual(
+            classify_write_error(_neo4j_error('Neo.ClientError.Schema.ConstraintValidationFailed')), 'permanent'
+        )
+        self.assertEqual(classify_write_error(_neo4j_error('Neo.ClientError.Statement.TypeError')), 'permanent')
+        self.assertEqual(classify_write_error(ValueError('bad value')), 'permanent')
+
+
+def _rels(pairs):
+    return [{'source_id': source, 'target_id': target} for source, target in pairs]
+
+
+class BloomFilterTests(SimpleTestCase):
+
+    def test_no_false_negatives_beyond_capacity(self):
+        bloom = BloomFilter(1000)
+        values = [(i, f'target-{i % 97}') for i in range(20000)]  # 20x the expected capacity
+        for value in values:
+            bloom.add(value)
+        self.assertGreater(len(bloom._layers), 1)
+        self.assertTrue(all(value in bloom for value in values))
+        self.assertTrue(all(bloom.add(value) for value in values[::50]))
+
+    def test_false_positive_rate_stays_near_target(self):
+        bloom = BloomFilter(10000, error_rate=0.01)
+        for i in range(10000):
+            bloom.add(('seen', i))
+        false_positives = sum(('unseen', i) in bloom for i in range(10000))
+        self.assertLess(false_positives, 300)
+
+
+class RelationshipWriteStrategyTests(SimpleTestCase):
+
+    def test_stays_on_create_without_repeated_pairs(self):
+        strategy = RelationshipWriteStrategy(type_empty=True, expected_rows=100)
+        self.assertEqual(strategy.observe(_rels([(1, 2), (2, 1), (1, 3)])), CREATE)
+        self.assertEqual(strategy.observe(_rels([(3, 1), (2, 3)]) + [None]), CREATE)
+        self.assertIsNone(strategy.merge_from_batch)
+        self.assertEqual(strategy.stats()['strategy'], CREATE)
+
+    def test_repeated_pair_switches_to_merge_from_its_batch(self):
+        strategy = RelationshipWriteStrategy(type_empty=True, expected_rows=100)
+        self.assertEqual(strategy.observe(_rels([(1, 2), (2, 3)])), CREATE)
+        self.assertEqual(strategy.observe(_rels([(3, 4), (1, 2)])), MERGE)
+        self.assertEqual(strategy.merge_from_batch, 1)
+        self.assertEqual(strategy.merge_from_row, 4)
+        # Once switched, every later batch is merged, repeated pairs or not
+        self.assertEqual(strategy.observe(_rels([(9, 9)])), MERGE)
+        stats = strategy.stats()
+        self.assertEqual(stats['strategy'], f'{CREATE}+{MERGE}')
+        self.assertEqual((stats['create_batches'], stats['merge_batches']), (1, 2))
+
+    def test_repeated_pair_within_one_batch(self):
+        strategy = RelationshipWriteStrategy(type_empty=True)
+        self.assertEqual(strategy.observe(_rels([(1, 2), (5, 6), (1, 2)])), MERGE)
+        self.assertEqual(strategy.merge_from_batch, 0)
+
+    def test_every_repeat_is_detected_in_a_large_upload(self):
+        strategy = RelationshipWriteStrategy(type_empty=True, expected_rows=1000)
+        pairs = [(i, i + 1) for i in range(30000)]
+        for start in range(0, len(pairs), 1000):
+            strategy.observe(_rels(pairs[start:start + 1000]))
+        if strategy.current == CREATE:
+            self.assertEqual(strategy.observe(_rels([pairs[12345]])), MERGE)
+        self.assertEqual(strategy.current, MERGE)
+
+    def test_existing_relationships_merge_from_the_start(self):
+        strategy = RelationshipWriteStrategy(type_empty=False, reason='resumed run')
+        self.assertEqual(strategy.merge_from_batch, 0)
+        self.assertEqual(strategy.observe(_rels([(1, 2)])), MERGE)
+        self.assertEqual(strategy.stats()['reason'], 'resumed run')
+
+
+class DeleteInTransactionsTests(SimpleTestCase):
+
+    async def test_single_scan_reports_progress_from_counts(self):
+        remaining = [10]
+        queries = []
+        progress = []
+
+        async def execute(query, parameters):
+            queries.append(query)
+            if 'IN TRANSACTIONS' in query:
+                for _ in range(3):
+                    await asyncio.sleep(0.02)
+                    remaining[0] -= 3
+                return [{'deleted': 10 - remaining[0]}]
+            return [{'remaining': remaining[0]}]
+
+        async def on_progress(deleted):
+            progress.append(deleted)
+
+        deleted = await delete_in_transactions(
+            execute, nodes_match('Person', 'x.dataset_id = $dataset_id'), {'dataset_id': 1},
+            detach=True, chunk_size=100, on_progress=on_progress, poll_interval=0.01
+        )
+
+        self.assertEqual(deleted, 9)
+        deletes = [query for query in queries if 'IN TRANSACTIONS' in query]
+        self.assertEqual(len(deletes), 1)
+        self.assertIn('CALL { WITH x DETACH DELETE x } IN TRANSACTIONS OF 100 ROWS', deletes[0])
+        self.assertGreater(len(progress), 1)
+        self.assertEqual(progress, sorted(progress))
+        self.assertEqual(progress[-1], 9)
+
+
+class FakeNodes:
+    """resolve_node_element_ids over an in-memory id -> element id map, recording the ids asked for."""
+
+    def __init__(self, nodes):
+        self.nodes = dict(nodes)
+        self.requests = []
+
+    async def resolve_node_element_ids(self, label, ids, dataset_id, id_property='id'):
+        ids = list(ids)
+        self.requests.append(sorted(ids, key=str))
+        return {node_id: self.nodes[node_id] for node_id in ids if node_id in self.nodes}
+
+
+class EndpointResolverTests(SimpleTestCase):
+
+    def _resolver(self, nodes, capacity=4):
+        fake = FakeNodes(nodes)
+        patcher = mock.patch('core.endpoint_resolver.neo4j_client', fake)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return EndpointResolver('Person', 1, capacity=capacity), fake
+
+    async def test_small_integer_ids_are_kept_in_the_array(self):
+        resolver, fake = self._resolver({i: f'e{i}' for i in range(4)})
+        self.assertEqual(await resolver.resolve([0, 3, 3]), {0: 'e0', 3: 'e3'})
+        self.assertEqual(await resolver.resolve([3, 0, 1]), {0: 'e0', 1: 'e1', 3: 'e3'})
+        self.assertEqual(fake.requests, [[0, 3], [1]])
+        self.assertEqual(resolver._dense, ['e0', 'e1', None, 'e3'])
+        self.assertEqual(len(resolver._lru), 0)
+        self.assertEqual(resolver.stats()['hits'], 2)
+
+    async def test_other_ids_use_the_lru(self):
+        nodes = {'a': 'ea', 4: 'e4', -1: 'e-1'}
+        resolver, fake = self._resolver(nodes)
+        self.assertEqual(await resolver.resolve(['a', 4, -1]), {'a': 'ea', 4: 'e4', -1: 'e-1'})
+        self.assertEqual(resolver._dense, [])
+        self.assertEqual(set(resolver._lru), {'a', 4, -1})
+        await resolver.resolve(['a', 4, -1])
+        self.assertEqual(len(fake.requests), 1)
+
+    async def test_lru_evicts_the_least_recently_used_id(self):
+        resolver, fake = self._resolver({name: f'e{name}' for name in 'abcdef'}, capacity=3)
+        for name in 'abc':
+            await resolver.resolve([name])
+        await resolver.resolve(['a'])  # 'b' is now the oldest
+        await resolver.resolve(['d'])
+        self.assertEqual(list(resolver._lru), ['c', 'a', 'd'])
+        await resolver.resolve(['b', 'a'])
+        self.assertEqual(fake.requests[-1], ['b'])
+        self.assertEqual(len(resolver._lru), 3)
+
+    async def test_missing_ids_are_not_cached(self):
+        resolver, fake = self._resolver({1: 'e1'})
+        self.assertEqual(await resolver.resolve([1, 2, 'x']), {1: 'e1'})
+        fake.nodes.update({2: 'e2', 'x': 'ex'})  # Created later in the upload
+        self.assertEqual(await resolver.resolve([1, 2, 'x']), {1: 'e1', 2: 'e2', 'x': 'ex'})
+        self.assertEqual(fake.requests, [[1, 2, 'x'], [2, 'x']])
+        stats = resolver.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['queries']), (1, 5, 2))
+
+
+class QueryClassificationTests(SimpleTestCase):
+
+    def assertClassified(self, query, writes, cacheable):
+        self.assertEqual((may_write(query), is_read_only(query)), (writes, cacheable), query)
+
+    def test_keywords_in_literals_and_quoted_names_are_not_writes(self):
+        for query in (
+            "MATCH (n) WHERE n.name = 'CREATE (x)' RETURN n",
+            'MATCH (n) WHERE n.note = "it\'s a MERGE; DELETE n" RETURN n',
+            'MATCH (n:`DELETE`) RETURN n.`set` AS s',
+            'MATCH (n) WHERE n.createdBy = $set RETURN n.remove_at',
+        ):
+            self.assertClassified(query, writes=False, cacheable=True)
+
+    def test_write_clauses(self):
+        for query in (
+            'MATCH (n) SET n.x = 1',
+            'match (n) detach delete n',
+            'MERGE (n:Person {id: 1})',
+            "LOAD CSV FROM 'file:///x.csv' AS row RETURN row",
+            'DROP INDEX person_id',
+        ):
+            self.assertClassified(query, writes=True, cacheable=False)
+
+    def test_call_subqueries(self):
+        self.assertClassified('MATCH (n) CALL { WITH n RETURN count(*) AS c } RETURN c', writes=False, cacheable=True)
+        self.assertClassified(
+            'MATCH (n) CALL { WITH n DETACH DELETE n } IN TRANSACTIONS OF 100 ROWS', writes=True, cacheable=False
+        )
+        self.assertClassified(
+            'UNWIND range(1, 3) AS i CALL { WITH i RETURN i AS j } IN TRANSACTIONS RETURN j', writes=True, cacheable=False
+        )
+
+    def test_procedures(self):
+        for query in (
+            'CALL db.labels() YIELD label RETURN label',
+            'call DB.RelationshipTypes()',
+            'CALL db.schema.visualization()',
+            'CALL db.schema.nodeTypeProperties() YIELD nodeType RETURN nodeType',
+        ):
+            self.assertClassified(query, writes=False, cacheable=True)
+        for query in (
+            "CALL apoc.periodic.iterate('MATCH (n) RETURN n', 'SET n.x = 1', {})",
+            'CALL db.createLabel("X")',
+            'CALL dbms.killQuery("q-1")',
+        ):
+            self.assertClassified(query, writes=True, cacheable=False)
+
+    def test_volatile_functions(self):
+        for query in ('RETURN rand()', 'RETURN randomUUID() AS id', 'RETURN datetime ()', "RETURN date('2024-01-01')"):
+            self.assertClassified(query, writes=False, cacheable=False)
+        # Property or namespaced calls that merely end in a volatile function name
+        for query in ('RETURN n.date(1)', 'RETURN apoc.date.format(1)', 'MATCH (n) RETURN n.timestamp, n.`date`(1)'):
+            self.assertClassified(query, writes=False, cacheable=True)
+
+    def test_comments_are_ignored(self):
+        self.assertClassified('MATCH (n) // CREATE (m)\nRETURN n', writes=False, cacheable=True)
+        self.assertClassified('MATCH (n) /* SET n.x = 1\n DELETE n */ RETURN n', writes=False, cacheable=True)
+        self.assertClassified("MATCH (n) WHERE n.url = 'http://x' SET n.y = 1", writes=True, cacheable=False)
+
+    def test_normalize_query(self):
+        query = "  MATCH (n)   // comment\n\tWHERE n.name = 'a  // b'  /* c\n d */ RETURN   n ;  "
+        self.assertEqual(normalize_query(query), "MATCH (n) WHERE n.name = 'a  // b' RETURN n")
+        self.assertEqual(normalize_query('MATCH (n)\nRETURN n'), normalize_query('MATCH (n) RETURN n;'))
+        self.assertNotEqual(normalize_query("RETURN 'a  b'"), normalize_query("RETURN 'a b'"))
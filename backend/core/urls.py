@@ -0,0 +1,11 @@
+"""
+URL routing for core (operational) endpoints.
+"""
+from django.urls import path
+from core import views
+
+app_name = 'core'
+
+urlpatterns = [
+    path('neo4j/pool/', views.Neo4jPoolMetricsView.as_view(), name='neo4j-pool-metrics'),
+]
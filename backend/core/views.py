@@ -0,0 +1,21 @@
+"""Core API: runtime metrics for the Neo4j connection pools and background task runners."""
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from core.neo4j_client import neo4j_client
+from core.task_runner import get_request_runner
+
+
+class Neo4jPoolMetricsView(APIView):
+    """GET live Neo4j pool metrics (in-use/idle connections, acquisition wait) and task runner load."""
+
+    def get(self, request):
+        from datasets.tasks import upload_task_runner
+
+        return Response({
+            'drivers': neo4j_client.pool_metrics(),
+            'runners': {
+                'upload_tasks': upload_task_runner.stats(),
+                'requests': get_request_runner().stats(),
+            },
+        })
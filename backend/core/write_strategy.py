@@ -0,0 +1,175 @@
+"""
+Write strategy for relationship uploads: CREATE when it is safe, MERGE otherwise.
+
+``MERGE (source)-[r:TYPE]->(target)`` first looks for an existing relationship between
+the two nodes, which costs a scan of the relationships of one endpoint for every row.
+That check can only succeed if the relationship already exists in the dataset, or if
+the same (source, target) pair appears earlier in the file. When the type is empty for
+the dataset (first upload, or just cleared by a sync-to-file re-upload), a plain
+``CREATE`` gives the same result as long as no pair repeats.
+
+Pairs are tracked with a Bloom filter, so memory stays around 10 bits per row. A pair
+that may have been seen (a real duplicate or a false positive) switches the rest of
+the upload to MERGE, starting with the batch that contains it. MERGE then finds the
+relationships created so far, provided they have been committed; writers therefore
+wait for every CREATE batch to be written before the first MERGE batch runs (see
+IngestPipeline.wait_written).
+
+Like chunked_delete, this module does not depend on Django.
+"""
+import math
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+CREATE = 'create'
+MERGE = 'merge'
+
+
+class BloomFilter:
+    """
+    Scalable Bloom filter over hashable values.
+
+    When the expected capacity is exceeded a new filter, twice as large and with a
+    tighter error rate, is added, so an underestimated capacity only costs memory.
+    Hashes are Python's hash(), so a filter is only meaningful within one process.
+
+    Args:
+        capacity: Expected number of values
+        error_rate: Target false positive rate
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        self.error_rate = error_rate
+        self.count = 0
+        self._layers: List[Dict[str, Any]] = []
+        self._add_layer(max(1000, int(capacity)), error_rate)
+
+    def _add_layer(self, capacity: int, error_rate: float) -> None:
+        bits = max(64, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self._layers.append({
+            'bits': bytearray((bits + 7) // 8),
+            'size': bits,
+            'hashes': max(1, round(bits / capacity * math.log(2))),
+            'capacity': capacity,
+            'error_rate': error_rate,
+            'count': 0,
+        })
+
+    @staticmethod
+    def _positions(layer: Dict[str, Any], h1: int, h2: int) -> List[int]:
+        # Double hashing: position i = h1 + i * h2
+        size = layer['size']
+        return [(h1 + i * h2) % size for i in range(layer['hashes'])]
+
+    @staticmethod
+    def _hashes(value: Hashable) -> Tuple[int, int]:
+        h1 = hash(value)
+        return h1, hash((h1, 0x9E3779B9)) | 1
+
+    def _contains(self, h1: int, h2: int) -> bool:
+        for layer in self._layers:
+            bits = layer['bits']
+            for p in self._positions(layer, h1, h2):
+                if not bits[p >> 3] & (1 << (p & 7)):
+                    break
+            else:
+                return True
+        return False
+
+    def __contains__(self, value: Hashable) -> bool:
+        return self._contains(*self._hashes(value))
+
+    def add(self, value: Hashable) -> bool:
+        """
+        Add a value.
+
+        Returns:
+            Whether the value may already have been added (always true for real repeats)
+        """
+        h1, h2 = self._hashes(value)
+        if self._contains(h1, h2):
+            return True
+        layer = self._layers[-1]
+        if layer['count'] >= layer['capacity']:
+            self._add_layer(layer['capacity'] * 2, layer['error_rate'] / 2)
+            layer = self._layers[-1]
+        bits = layer['bits']
+        for p in self._positions(layer, h1, h2):
+            bits[p >> 3] |= 1 << (p & 7)
+        layer['count'] += 1
+        self.count += 1
+        return False
+
+    @property
+    def size_bytes(self) -> int:
+        return sum(len(layer['bits']) for layer in self._layers)
+
+
+class RelationshipWriteStrategy:
+    """
+    Chooses CREATE or MERGE for each batch of a relationship upload.
+
+    observe() must be called once per batch, in file order (IngestPipeline converts
+    batches that way), so batch numbers match the pipeline's.
+
+    Args:
+        type_empty: Whether the relationship type has no relationships in the dataset
+            when writing starts (first upload, or cleared for a sync-to-file re-upload)
+        expected_rows: Estimated rows in the file, to size the Bloom filter
+        reason: Why MERGE is used when type_empty is False
+    """
+
+    def __init__(self, type_empty: bool, expected_rows: int = 0, reason: Optional[str] = None):
+        self.initial = CREATE if type_empty else MERGE
+        self.current = self.initial
+        if self.initial == CREATE:
+            self.reason = 'relationship type empty for the dataset, no repeated (source, target) pair'
+        else:
+            self.reason = reason or 'relationships of this type already exist in the dataset'
+        self.merge_from_batch: Optional[int] = 0 if self.initial == MERGE else None
+        self.merge_from_row: Optional[int] = None
+        self.create_batches = 0
+        self.merge_batches = 0
+        self._batches = 0
+        self._rows = 0
+        self._pairs = BloomFilter(expected_rows) if self.initial == CREATE else None
+
+    def observe(self, rels: List[Optional[Dict[str, Any]]]) -> str:
+        """
+        Record the (source_id, target_id) pairs of the next batch.
+
+        Args:
+            rels: Converted rows of the batch (None for rows without both ids)
+
+        Returns:
+            CREATE or MERGE, the statement to write this batch with
+        """
+        if self.current == CREATE:
+            for index, rel in enumerate(rels):
+                if rel is not None and self._pairs.add((rel['source_id'], rel['target_id'])):
+                    self.current = MERGE
+                    self.merge_from_batch = self._batches
+                    self.merge_from_row = self._rows + index + 1
+                    self.reason = 'repeated (source, target) pair in the file'
+                    self._pairs = None  # Not needed any more
+                    break
+        self._batches += 1
+        self._rows += len(rels)
+        if self.current == CREATE:
+            self.create_batches += 1
+        else:
+            self.merge_batches += 1
+        return self.current
+
+    def stats(self) -> Dict[str, Any]:
+        """Strategy actually used, for the task metrics."""
+        if self.initial == CREATE and self.current == MERGE:
+            strategy = f'{CREATE}+{MERGE}'
+        else:
+            strategy = self.current
+        return {
+            'strategy': strategy,
+            'reason': self.reason,
+            'create_batches': self.create_batches,
+            'merge_batches': self.merge_batches,
+            'merge_from_row': self.merge_from_row,
+        }
@@ -1,6 +1,28 @@
+import os
+import sys
+
 from django.apps import AppConfig
+from django.conf import settings
+
+
+def _is_single_server_process() -> bool:
+    """
+    Return True when running as the development server (the autoreloader's child), the
+    only web server that is a single process. Multi-worker servers (gunicorn, uvicorn,
+    daphne workers) would each sweep; there `manage.py requeue_upload_tasks` is run once
+    from a single process instead.
+    """
+    if 'runserver' in sys.argv:
+        # With the autoreloader, only the child process (RUN_MAIN=true) serves requests
+        return os.environ.get('RUN_MAIN') == 'true' or '--noreload' in sys.argv
+    return False
 
 
 class DatasetsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'datasets'
+
+    def ready(self):
+        if settings.UPLOAD_TASK_REQUEUE_ON_STARTUP and _is_single_server_process():
+            from datasets.tasks import schedule_upload_task_requeue
+            schedule_upload_task_requeue()
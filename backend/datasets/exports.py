@@ -0,0 +1,265 @@
+"""
+Streaming CSV/ZIP export of dataset nodes and relationships.
+
+Records are read from Neo4j with keyset pagination on the node ``id`` property
+(``WHERE n.id > $last ORDER BY n.id LIMIT $page``, never SKIP; one id type after the
+other), rendered into CSV text a chunk at a time, and optionally deflated into a ZIP
+archive written to an unseekable buffer. Everything is exposed as generators for StreamingHttpResponse,
+so memory use stays flat regardless of the export size.
+"""
+import csv
+import io
+import logging
+import zipfile
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from django.conf import settings
+
+from core.chunked_delete import quote_name
+from core.neo4j_client import neo4j_client, UPLOAD_GENERATION_PROPERTY
+from core.task_runner import run_sync
+
+logger = logging.getLogger(__name__)
+
+# Properties written by ingestion that are not part of the exported CSV
+HIDDEN_PROPERTIES = {'dataset_id', UPLOAD_GENERATION_PROPERTY}
+
+
+@dataclass
+class ExportFile:
+    """One CSV file of an export: all nodes of a label or all relationships of a type."""
+    filename: str
+    kind: str  # 'node' or 'relationship'
+    name: str  # Node label or relationship type
+    dataset_id: int
+    columns: List[str]
+    source_label: Optional[str] = None
+    target_label: Optional[str] = None
+
+    @property
+    def header(self) -> List[str]:
+        if self.kind == 'node':
+            return self.columns
+        return [f'{self.source_label}:source_id', f'{self.target_label}:target_id'] + self.columns
+
+
+async def _distinct_keys(query: str, dataset_id: int) -> List[str]:
+    records = await neo4j_client.execute_query(query, {'dataset_id': dataset_id})
+    return [record['key'] for record in records if record['key'] not in HIDDEN_PROPERTIES]
+
+
+async def node_export_file(label: str, dataset_id: int) -> Optional[ExportFile]:
+    """
+    Build the export spec for a node label, or None if the dataset has no such nodes.
+    Columns are the union of property keys over all nodes, with id first.
+    """
+    keys = await _distinct_keys(
+        f"MATCH (n:{quote_name(label)}) WHERE n.dataset_id = $dataset_id "
+        "UNWIND keys(n) AS key RETURN DISTINCT key",
+        dataset_id
+    )
+    if not keys:
+        return None
+    columns = ['id'] + [key for key in keys if key != 'id']
+    return ExportFile(f'{label}.csv', 'node', label, dataset_id, columns)
+
+
+async def relationship_export_file(
+    relationship_type: str,
+    dataset_id: int,
+    source_label: Optional[str],
+    target_label: Optional[str]
+) -> Optional[ExportFile]:
+    """Build the export spec for a relationship type, or None if the dataset has none."""
+    query = (
+        f"MATCH ()-[r:{quote_name(relationship_type)}]->() WHERE r.dataset_id = $dataset_id "
+        "WITH r LIMIT 1 RETURN count(r) AS count"
+    )
+    records = await neo4j_client.execute_query(query, {'dataset_id': dataset_id})
+    if not records or not records[0]['count']:
+        return None
+    keys = await _distinct_keys(
+        f"MATCH ()-[r:{quote_name(relationship_type)}]->() WHERE r.dataset_id = $dataset_id "
+        "UNWIND keys(r) AS key RETURN DISTINCT key",
+        dataset_id
+    )
+    return ExportFile(
+        f'{relationship_type}.csv', 'relationship', relationship_type, dataset_id, keys,
+        source_label=source_label, target_label=target_label
+    )
+
+
+# Ids are integers or strings (see NodeRowConverter), possibly mixed in one label. Cypher
+# comparisons between a number and a string are null, so ``a.id > $last_id`` only ever
+# matches ids of the bound's type: ids are paged one type at a time, each starting from
+# the lowest value of its type. Integers and floats compare with each other.
+KEY_TYPE_LOWER_BOUNDS = (float('-inf'), '')
+
+
+def _page_query(export: ExportFile, first_page: bool) -> str:
+    """Keyset page query. Relationships are paged by their source node, so a page is bounded by sources."""
+    keyset = ' AND a.id >= $last_id' if first_page else ' AND a.id > $last_id'
+    if export.kind == 'node':
+        return (
+            f"MATCH (a:{quote_name(export.name)}) WHERE a.dataset_id = $dataset_id{keyset} "
+            "WITH a ORDER BY a.id LIMIT $page_size "
+            "RETURN a.id AS key, properties(a) AS props"
+        )
+    source = f':{quote_name(export.source_label)}' if export.source_label else ''
+    return (
+        f"MATCH (a{source}) WHERE a.dataset_id = $dataset_id{keyset} "
+        "WITH a ORDER BY a.id LIMIT $page_size "
+        f"OPTIONAL MATCH (a)-[r:{quote_name(export.name)}]->(b) WHERE r.dataset_id = $dataset_id "
+        "RETURN a.id AS key, properties(r) AS props, b.id AS target_id"
+    )
+
+
+def iter_records(export: ExportFile) -> Iterator[Dict[str, Any]]:
+    """
+    Yield export records page by page.
+
+    Each page is itself consumed through a streaming result in chunks, so a page made
+    large by a high-degree source node does not have to fit in memory either.
+    """
+    for lower_bound in KEY_TYPE_LOWER_BOUNDS:
+        yield from _iter_key_type(export, lower_bound)
+
+
+def _iter_key_type(export: ExportFile, lower_bound: Any) -> Iterator[Dict[str, Any]]:
+    """Yield the records whose key has the type of lower_bound, page by page."""
+    page_size = settings.EXPORT_PAGE_SIZE
+    chunk_size = settings.EXPORT_CHUNK_SIZE
+    last_id = lower_bound
+    first_page = True
+    while True:
+        parameters = {'dataset_id': export.dataset_id, 'page_size': page_size, 'last_id': last_id}
+        stream = neo4j_client.stream_query(_page_query(export, first_page), parameters, fetch_size=chunk_size)
+
+        async def next_chunk():
+            rows = []
+            while len(rows) < chunk_size:
+                try:
+                    rows.append(await stream.__anext__())
+                except StopAsyncIteration:
+                    return rows, True
+            return rows, False
+
+        # Keys of this page (at most page_size): row order after the relationship
+        # expansion is not guaranteed, so the next keyset bound is the page maximum
+        page_keys = set()
+        try:
+            done = False
+            while not done:
+                rows, done = run_sync(next_chunk)
+                for row in rows:
+                    page_keys.add(row['key'])
+                    yield row
+        finally:
+            run_sync(stream.aclose)
+
+        if len(page_keys) < page_size:
+            return
+        last_id = max(page_keys)
+        first_page = False
+
+
+def _format_value(value: Any) -> Any:
+    return '' if value is None else value
+
+
+def iter_csv(export: ExportFile) -> Iterator[str]:
+    """Yield CSV text for an export in chunks of roughly EXPORT_CHUNK_SIZE rows."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(export.header)
+    chunk_size = settings.EXPORT_CHUNK_SIZE
+    pending = 0
+
+    for record in iter_records(export):
+        props = record.get('props')
+        if export.kind == 'node':
+            writer.writerow([_format_value(props.get(column)) for column in export.columns])
+        else:
+            if props is None:
+                # Source node without relationships of this type (kept only to advance the keyset)
+                continue
+            writer.writerow(
+                [_format_value(record['key']), _format_value(record['target_id'])]
+                + [_format_value(props.get(column)) for column in export.columns]
+            )
+        pending += 1
+        if pending >= chunk_size:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def iter_csv_bytes(export: ExportFile) -> Iterator[bytes]:
+    for text in iter_csv(export):
+        yield text.encode('utf-8')
+
+
+class _StreamBuffer(io.RawIOBase):
+    """Write-only, unseekable sink: zipfile writes into it and the generator drains it."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def iter_zip(exports: List[ExportFile]) -> Iterator[bytes]:
+    """
+    Yield a ZIP archive containing one CSV per export, deflated on the fly.
+
+    The archive is written to an unseekable buffer, so zipfile emits data descriptors
+    after each entry instead of seeking back to patch local headers.
+    """
+    sink = _StreamBuffer()
+    with zipfile.ZipFile(sink, mode='w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for export in exports:
+            with archive.open(export.filename, mode='w', force_zip64=True) as entry:
+                for text in iter_csv(export):
+                    entry.write(text.encode('utf-8'))
+                    data = sink.drain()
+                    if data:
+                        yield data
+            data = sink.drain()
+            if data:
+                yield data
+    yield sink.drain()
+
+
+async def build_exports(
+    dataset_id: int,
+    node_labels: List[str],
+    relationship_types: List[Tuple[str, Optional[str], Optional[str]]]
+) -> List[ExportFile]:
+    """
+    Resolve export specs for the requested labels and (type, source_label, target_label)
+    tuples, skipping those without data in the dataset.
+    """
+    exports = []
+    for label in node_labels:
+        export = await node_export_file(label, dataset_id)
+        if export:
+            exports.append(export)
+    for relationship_type, source_label, target_label in relationship_types:
+        export = await relationship_export_file(relationship_type, dataset_id, source_label, target_label)
+        if export:
+            exports.append(export)
+    return exports
@@ -0,0 +1,30 @@
+"""
+Re-queue upload tasks that were left pending or interrupted by a restart and run them.
+
+Multi-worker servers do not sweep on startup (see datasets.apps); run this once, from a
+single process, after a restart. Tasks still held by a live worker are left alone.
+
+Usage:
+    python manage.py requeue_upload_tasks
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from datasets.tasks import requeue_pending_upload_tasks, upload_task_runner
+
+
+class Command(BaseCommand):
+    help = 'Re-queue pending/processing upload tasks and wait for them to finish.'
+
+    def handle(self, *args, **options):
+        try:
+            task_ids = upload_task_runner.submit('requeue', requeue_pending_upload_tasks).result()
+        except Exception as e:
+            raise CommandError(f'Re-queueing upload tasks failed: {e}')
+
+        if not task_ids:
+            self.stdout.write('No pending upload tasks')
+            return
+
+        self.stdout.write(f'Processing {len(task_ids)} upload task(s): {task_ids}')
+        upload_task_runner.shutdown(timeout=None)
+        self.stdout.write(self.style.SUCCESS('Upload tasks finished'))
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.10 on 2026-10-18 20:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('datasets', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadtask',
+            name='column_profile',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
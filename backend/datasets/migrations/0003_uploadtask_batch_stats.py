@@ -0,0 +1,18 @@
+# Generated by Django 5.2.10 on 2026-10-18 21:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('datasets', '0002_uploadtask_column_profile'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadtask',
+            name='batch_stats',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.10 on 2026-10-18 21:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('datasets', '0003_uploadtask_batch_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadtask',
+            name='checkpoint',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.10 on 2026-10-18 20:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('datasets', '0004_uploadtask_checkpoint'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='dataset',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('completed', 'Completed'), ('failed', 'Failed'), ('deleting', 'Deleting')], default='pending', max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='uploadtask',
+            name='file_type',
+            field=models.CharField(choices=[('node', 'Node'), ('relationship', 'Relationship'), ('purge', 'Dataset purge')], max_length=20),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.10 on 2026-10-18 21:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('datasets', '0005_dataset_deleting_purge_task'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadtask',
+            name='rejected_rows',
+            field=models.IntegerField(default=0),
+        ),
+    ]
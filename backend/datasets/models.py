@@ -10,6 +10,7 @@ class Dataset(models.Model):
         ('processing', 'Processing'),
         ('completed', 'Completed'),
         ('failed', 'Failed'),
+        ('deleting', 'Deleting'),
     ]
     
     name = models.CharField(max_length=255)
@@ -64,6 +65,7 @@ class UploadTask(models.Model):
     FILE_TYPE_CHOICES = [
         ('node', 'Node'),
         ('relationship', 'Relationship'),
+        ('purge', 'Dataset purge'),  # Deletes the dataset's graph data, then the dataset
     ]
     
     dataset = models.ForeignKey(
@@ -102,6 +104,21 @@ class UploadTask(models.Model):
     # Validation warnings (for skipped rows, etc.)
     validation_warnings = models.JSONField(default=list, blank=True)  # List of warning messages
     
+    # Column profile of the whole file: type, null_ratio, min/max, approx_distinct per column
+    column_profile = models.JSONField(default=dict, blank=True)
+    
+    # Rows per write transaction chosen by the adaptive batch sizer (sizes, timings, back-offs)
+    batch_stats = models.JSONField(default=dict, blank=True)
+    
+    # Resume point of an interrupted run: {'offset': byte offset, 'row': rows committed, 'created', 'skipped', 'rejected'}
+    checkpoint = models.JSONField(default=dict, blank=True)
+    
+    # Rows Neo4j refused to write (isolated by bisecting the failing batch); see datasets.rejects
+    rejected_rows = models.IntegerField(default=0)
+    
+    # Refreshed while a process runs the task; None when no process holds it (see datasets.tasks.stale_task_filter)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    
     class Meta:
         ordering = ['-created_at']
         verbose_name = 'Upload Task'
@@ -0,0 +1,65 @@
+"""
+Rejects files of upload tasks.
+
+When Neo4j refuses a batch for a reason retrying cannot fix (a type error, a constraint
+violation), Neo4jClient bisects the batch and reports the rows that still fail on their
+own. Those rows are appended here to a CSV per task, with the error, so they can be
+downloaded (GET tasks/<id>/?download=rejects), fixed and uploaded again.
+"""
+import csv
+import logging
+from pathlib import Path
+from typing import Any, Dict, List, Optional, TextIO
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+ERROR_COLUMN = 'error'
+
+
+def rejects_path(task_id: int) -> Path:
+    """Path of the rejects file of an upload task (it may not exist)."""
+    return Path(settings.UPLOAD_REJECTS_DIR) / f'task_{task_id}_rejects.csv'
+
+
+class RejectsWriter:
+    """
+    Appends rejected rows of one task to its rejects file.
+
+    The file is only created when the first row is rejected. A resumed run appends to
+    the rows rejected before its checkpoint; a new run starts a new file.
+
+    Args:
+        task_id: UploadTask ID
+        columns: CSV columns before the error column (values missing from a row are left empty)
+        resume: Keep the rows of an earlier, interrupted run
+    """
+
+    def __init__(self, task_id: int, columns: List[str], resume: bool = False):
+        self.path = rejects_path(task_id)
+        self.columns = list(columns) + [ERROR_COLUMN]
+        self.count = 0
+        self._file: Optional[TextIO] = None
+        self._writer: Optional[csv.DictWriter] = None
+        if not resume:
+            self.path.unlink(missing_ok=True)
+
+    def add(self, values: Dict[str, Any], error: Exception) -> None:
+        if self._writer is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            write_header = not self.path.exists() or self.path.stat().st_size == 0
+            self._file = open(self.path, 'a', newline='', encoding='utf-8')
+            self._writer = csv.DictWriter(self._file, fieldnames=self.columns, extrasaction='ignore')
+            if write_header:
+                self._writer.writeheader()
+        self._writer.writerow({**values, ERROR_COLUMN: str(error)})
+        # Flushed per row: the file must hold every row counted in a checkpoint
+        self._file.flush()
+        self.count += 1
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._writer = None
+            logger.info(f"{self.count} rejected rows written to {self.path}")
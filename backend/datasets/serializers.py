@@ -20,6 +20,10 @@ class UploadTaskSerializer(serializers.ModelSerializer):
             'source_label',
             'target_label',
             'validation_warnings',
+            'column_profile',
+            'batch_stats',
+            'checkpoint',
+            'rejected_rows',
             'started_at',
             'completed_at',
             'created_at',
@@ -35,6 +39,10 @@ class UploadTaskSerializer(serializers.ModelSerializer):
             'source_label',
             'target_label',
             'validation_warnings',
+            'column_profile',
+            'batch_stats',
+            'checkpoint',
+            'rejected_rows',
             'started_at',
             'completed_at',
             'created_at',
@@ -6,22 +6,36 @@ data, including validation, parsing, type conversion, and Neo4j database operati
 """
 import asyncio
 import logging
-import threading
 from pathlib import Path
-from typing import Dict, Any, Optional, List, Set, Tuple
-from datetime import datetime
+from typing import Dict, Any, Iterator, Optional, List, Set, Tuple
+from datetime import datetime, timedelta
+from django.conf import settings
+from django.db.models import Q
 from django.utils import timezone
 from channels.layers import get_channel_layer
 from asgiref.sync import async_to_sync
 
 from datasets.models import Dataset, UploadTask
 from core.csv_processor import (
-    parse_csv,
-    validate_node_csv,
-    validate_relationship_csv,
+    open_validated_stream,
+    CSVProcessor,
+    NodeCSVValidator,
+    RelationshipCSVValidator,
+    NodeRowConverter,
+    RelationshipRowConverter,
     CSVProcessingError
 )
-from core.neo4j_client import neo4j_client
+from core import load_csv
+from core.chunked_delete import quote_name
+from core.neo4j_client import neo4j_client, AdaptiveBatchSizer, UPLOAD_GENERATION_PROPERTY
+from core.neo4j_schema import schema_provisioner
+from core.query_cache import query_cache
+from core.ingest_pipeline import IngestPipeline, BatchWriteError
+from core.write_strategy import RelationshipWriteStrategy, MERGE
+from core.relationship_lanes import LaneStats
+from core.endpoint_resolver import EndpointResolver
+from datasets.rejects import RejectsWriter, rejects_path
+from core.task_runner import create_runner
 
 logger = logging.getLogger(__name__)
 
@@ -67,6 +81,9 @@ async def update_dataset_status(dataset_id: int) -> None:
     """
     try:
         dataset = await Dataset.objects.aget(id=dataset_id)
+        if dataset.status == 'deleting':
+            # Owned by its purge task until the dataset row is removed
+            return
         
         # Use async queryset aggregation for better performance
         tasks = []
@@ -101,6 +118,193 @@ async def update_dataset_status(dataset_id: int) -> None:
         logger.error(f"Failed to update dataset status for dataset {dataset_id}: {e}")
 
 
+def get_stream_progress(processor: CSVProcessor, processed_rows: int) -> Tuple[float, int]:
+    """
+    Progress of a streaming CSV task.
+    
+    The total row count is unknown until the file has been read, so progress is based on
+    the bytes consumed and the total is extrapolated from the rows read so far.
+    
+    Returns:
+        Tuple of (fraction of the file consumed 0..1, estimated total rows)
+    """
+    if not processor.file_size or not processor.bytes_read:
+        return 0.0, processed_rows
+    fraction = min(processor.bytes_read / processor.file_size, 1.0)
+    estimated_total = max(processed_rows, int(processed_rows / fraction)) if fraction > 0 else processed_rows
+    return fraction, estimated_total
+
+
+def new_batch_sizer() -> AdaptiveBatchSizer:
+    """Transaction size controller for one upload (fixed BATCH_SIZE if adaptive batching is off)."""
+    if settings.INGEST_ADAPTIVE_BATCHING:
+        return AdaptiveBatchSizer.from_settings()
+    return AdaptiveBatchSizer.fixed(BATCH_SIZE)
+
+
+def read_batch_size() -> int:
+    """
+    Rows per batch read from the file. With adaptive batching a read batch holds up to
+    INGEST_BATCH_MAX_SIZE rows and is split into transactions by the batch sizer.
+    """
+    return settings.INGEST_BATCH_MAX_SIZE if settings.INGEST_ADAPTIVE_BATCHING else BATCH_SIZE
+
+
+def parallel_workers(processor: CSVProcessor) -> int:
+    """Worker processes for parsing the file: CSV_PARALLEL_WORKERS from CSV_PARALLEL_MIN_BYTES, else 1."""
+    workers = settings.CSV_PARALLEL_WORKERS
+    if workers > 1 and processor.file_size >= settings.CSV_PARALLEL_MIN_BYTES:
+        return workers
+    return 1
+
+
+def iter_converted_batches(processor: CSVProcessor, converter: Any, ordered: bool = True) -> Iterator[List[Any]]:
+    """
+    Converted batches of a file, one entry per row.
+    
+    Files of at least CSV_PARALLEL_MIN_BYTES are parsed and converted in
+    CSV_PARALLEL_WORKERS processes; smaller files are read in the calling thread.
+    
+    Args:
+        processor: CSVProcessor returned by open_validated_stream
+        converter: NodeRowConverter / RelationshipRowConverter for the file
+        ordered: Whether batches must arrive in file order (parallel mode only)
+    """
+    workers = parallel_workers(processor)
+    if workers > 1:
+        logger.info(f"Parsing {processor.file_path.name} ({processor.file_size} bytes) with {workers} processes")
+        yield from processor.iter_parallel_batches(
+            read_batch_size(), converter, workers, settings.CSV_PARALLEL_CHUNK_BYTES, ordered=ordered
+        )
+        return
+    for rows in processor.iter_batches(read_batch_size(), raw=True):
+        yield converter.convert_batch(rows)
+
+
+def profile_columns(processor: CSVProcessor, metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Detect the conversion types over the whole file (CSV_PROFILE_COLUMNS), before any row
+    is converted; otherwise they come from the validated prefix only.
+    
+    Returns:
+        The file metadata to convert with
+    """
+    if not settings.CSV_PROFILE_COLUMNS:
+        return metadata
+    return processor.profile_columns(parallel_workers(processor), settings.CSV_PARALLEL_CHUNK_BYTES)
+
+
+def apply_column_profile(task: UploadTask, processor: CSVProcessor) -> None:
+    """Store the whole-file column profile (see profile_columns) on the task (not saved)."""
+    if processor.column_profiler is not None:
+        task.column_profile = processor.column_profiler.profile()
+
+
+def resume_from_checkpoint(task: UploadTask, processor: CSVProcessor, resumable: bool = True) -> Dict[str, Any]:
+    """
+    Continue an interrupted task from its checkpoint.
+    
+    The checkpoint ({'offset', 'row', ...}) is saved with every progress update and
+    points after the last batch below the write watermark, so every row before it has
+    been committed. Rows after it may have been written too; they are written again,
+    which MERGE makes harmless.
+    
+    Args:
+        task: UploadTask being (re)started
+        processor: Freshly opened and validated CSVProcessor for the task file
+        resumable: False if this run must start from the first row (the checkpoint is discarded)
+    
+    Returns:
+        The applied checkpoint, or {} when processing starts at the first row
+    """
+    checkpoint = task.checkpoint or {}
+    if not checkpoint.get('row'):
+        return {}
+    if not settings.UPLOAD_TASK_CHECKPOINTS or not resumable:
+        logger.info(f"Task {task.id}: checkpoint at row {checkpoint['row']} ignored, processing from the first row")
+        return {}
+    processor.skip_to(checkpoint.get('offset'), checkpoint['row'])
+    logger.info(f"Task {task.id}: resuming at row {checkpoint['row']}")
+    return checkpoint
+
+
+def rejects_warning(rejected: int) -> str:
+    return (
+        f"{rejected} rows were rejected by Neo4j and not written. "
+        f"Download them with the error of each row from the task (?download=rejects)."
+    )
+
+
+def endpoint_cache_stats(source_resolver: EndpointResolver, target_resolver: EndpointResolver) -> List[Dict[str, Any]]:
+    """Hit statistics of the endpoint resolvers of a relationship upload (one entry if they are shared)."""
+    if source_resolver is target_resolver:
+        return [source_resolver.stats()]
+    return [source_resolver.stats(), target_resolver.stats()]
+
+
+def use_load_csv(processor: CSVProcessor) -> bool:
+    """Whether a file is ingested with server-side LOAD CSV (see INGEST_BACKEND)."""
+    backend = settings.INGEST_BACKEND
+    if backend not in ('load_csv', 'auto'):
+        return False
+    if not load_csv.is_available():
+        logger.warning(f"INGEST_BACKEND={backend} but NEO4J_IMPORT_DIR is not a writable directory; using Bolt")
+        return False
+    return backend == 'load_csv' or processor.file_size >= settings.LOAD_CSV_MIN_BYTES
+
+
+async def ingest_with_load_csv(
+    task: UploadTask,
+    processor: CSVProcessor,
+    query: str,
+    parameters: Dict[str, Any],
+    count_query: str
+) -> Tuple[int, int]:
+    """
+    Stage the task file in the Neo4j import directory and run a LOAD CSV statement.
+    
+    The statement only returns when the whole file is loaded, so progress is estimated
+    from the growing node/relationship count against a row total extrapolated from the
+    validated prefix of the file.
+    
+    Returns:
+        Tuple of (rows read, nodes or relationships merged)
+    """
+    _, estimated_total = get_stream_progress(processor, processor.buffered_row_count)
+    processor.close()
+    
+    async def report_progress(loaded: int) -> None:
+        total = max(estimated_total, loaded)
+        fraction = loaded / total if total else 0.0
+        task.processed_rows = loaded
+        task.total_rows = total
+        task.progress_percentage = fraction * 100
+        await task.asave(update_fields=['processed_rows', 'total_rows', 'progress_percentage', 'updated_at'])
+        await send_task_update(
+            task.id,
+            'progress',
+            {
+                'message': f'Loading CSV on the database server ({loaded} rows)',
+                'percentage': int(10 + fraction * 80),  # 10-90%
+                'processed': loaded,
+                'total': total
+            }
+        )
+    
+    staged_name = await asyncio.to_thread(load_csv.stage_file, task.file_path, task.id)
+    try:
+        logger.info(f"Task {task.id}: loading {task.file_name} with LOAD CSV (about {estimated_total} rows)")
+        return await load_csv.run_load_csv(
+            query,
+            {**parameters, 'url': load_csv.file_url(staged_name)},
+            count_query,
+            task.dataset_id,
+            on_progress=report_progress
+        )
+    finally:
+        await asyncio.to_thread(load_csv.remove_staged, staged_name)
+
+
 async def process_node_csv_task(task_id: int) -> None:
     """
     Process a node CSV file upload task.
@@ -126,11 +330,16 @@ async def process_node_csv_task(task_id: int) -> None:
             'percentage': task.progress_percentage or 0
         })
         
-        # Validate CSV file
+        # Validate and open the CSV in a single scan: header and validated prefix are read
+        # up front, remaining rows are streamed batch by batch. In a thread, so the shared
+        # upload loop (other uploads, this task's heartbeat) keeps running meanwhile.
         await send_task_update(task_id, 'progress', {'message': 'Validating CSV file...', 'percentage': 5})
-        is_valid, errors, warnings = validate_node_csv(task.file_path, task.node_label)
+        processor, metadata, (is_valid, errors, warnings) = await asyncio.to_thread(
+            open_validated_stream, task.file_path, NodeCSVValidator(task.file_path, task.node_label)
+        )
         
         if not is_valid:
+            processor.close()
             # Clean up temp file
             if task.file_path and Path(task.file_path).exists():
                 Path(task.file_path).unlink(missing_ok=True)
@@ -152,11 +361,10 @@ async def process_node_csv_task(task_id: int) -> None:
             await send_task_update(task_id, 'error', {'message': error_msg, 'errors': errors})
             return
         
-        # Parse CSV file
         await send_task_update(task_id, 'progress', {'message': 'Parsing CSV file...', 'percentage': 10})
-        data, metadata = parse_csv(task.file_path)
         
-        if not data:
+        if not processor.sample_rows:
+            processor.close()
             # Clean up temp file
             if task.file_path and Path(task.file_path).exists():
                 Path(task.file_path).unlink(missing_ok=True)
@@ -172,9 +380,8 @@ async def process_node_csv_task(task_id: int) -> None:
             await send_task_update(task_id, 'error', {'message': 'CSV file contains no data'})
             return
         
-        # Update task with total rows
-        task.total_rows = len(data)
-        await task.asave(update_fields=['total_rows'])
+        # Conversion types over the whole file, not just the validated prefix
+        metadata = await asyncio.to_thread(profile_columns, processor, metadata)
         
         # Determine ID column - must be exactly 'id' (case-insensitive)
         id_column = None
@@ -184,6 +391,7 @@ async def process_node_csv_task(task_id: int) -> None:
                 break
         
         if not id_column:
+            processor.close()
             task.status = 'failed'
             task.error_message = "Missing required column: 'id'"
             task.completed_at = timezone.now()
@@ -195,124 +403,164 @@ async def process_node_csv_task(task_id: int) -> None:
             await send_task_update(task_id, 'error', {'message': "Missing required 'id' column in CSV file"})
             return
         
-        # Process nodes in batches
-        total_batches = (len(data) + BATCH_SIZE - 1) // BATCH_SIZE
+        # Make sure the (dataset_id, id) index exists before the first MERGE on this label
+        try:
+            await schema_provisioner.ensure_node_label(task.node_label or 'Node')
+        except Exception as e:
+            logger.warning(f"Index provisioning failed for label {task.node_label}: {e}")
+        
+        # If dataset cascade_delete, stamp the nodes with this upload's generation (the task id)
+        # to remove the label's nodes not in the file afterwards
+        dataset = await Dataset.objects.aget(id=task.dataset_id)
+        sync_to_file = bool(task.node_label and dataset.cascade_delete)
+        constants = {'dataset_id': task.dataset_id}
+        if sync_to_file:
+            constants[UPLOAD_GENERATION_PROPERTY] = task.id
+        
+        # Process nodes in batches streamed from the file: batches are converted in a worker
+        # thread while up to INGEST_NODE_WRITERS transactions are in flight
         nodes_created = 0
+        processed = 0
+        label = task.node_label or 'Node'
+        sizer = new_batch_sizer()
+        converter = NodeRowConverter(
+            processor.header, metadata['data_types'], id_column, constants
+        )
+        
+        # Continue after the last checkpoint of an interrupted run (LOAD CSV is a single
+        # statement and starts over). A resumed sync keeps the generation: it is the task id.
+        load_with_csv = use_load_csv(processor)
+        checkpoint = resume_from_checkpoint(task, processor, resumable=not load_with_csv)
+        resumed_rows = checkpoint.get('row', 0)
+        nodes_created = checkpoint.get('created', 0)
+        if resumed_rows:
+            await send_task_update(task_id, 'progress', {'message': f'Resuming from row {resumed_rows}...', 'percentage': 10})
         
-        for batch_num in range(total_batches):
-            start_idx = batch_num * BATCH_SIZE
-            end_idx = min(start_idx + BATCH_SIZE, len(data))
-            batch = data[start_idx:end_idx]
+        # Rows Neo4j refuses even on their own are isolated and saved instead of failing the task
+        rejected_count = checkpoint.get('rejected', 0)
+        rejects = RejectsWriter(task.id, processor.header, resume=bool(resumed_rows))
+        
+        def convert_batch(neo4j_nodes: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+            # Nodes arrive converted (id column to int, other columns by detected type)
+            return neo4j_nodes
+        
+        async def write_batch(batch_num: int, neo4j_nodes: List[Dict[str, Any]]) -> None:
+            nonlocal nodes_created
             
-            # Prepare nodes for Neo4j
-            neo4j_nodes = []
-            for row in batch:
-                node_props = {}
-                for key, value in row.items():
-                    # Convert value based on detected type
-                    data_type = metadata['data_types'].get(key, 'string')
-                    if value is not None:
-                        # Always convert ID column to integer
-                        if key == id_column:
-                            try:
-                                node_props[key] = int(value)
-                            except (ValueError, TypeError):
-                                node_props[key] = value
-                        # Basic type conversion for other fields
-                        elif data_type == 'integer' and value:
-                            try:
-                                node_props[key] = int(value)
-                            except (ValueError, TypeError):
-                                node_props[key] = value
-                        elif data_type == 'float' and value:
-                            try:
-                                node_props[key] = float(value)
-                            except (ValueError, TypeError):
-                                node_props[key] = value
-                        elif data_type == 'boolean' and value:
-                            node_props[key] = str(value).lower() in ['true', '1', 'yes']
-                        else:
-                            node_props[key] = value
-                    else:
-                        node_props[key] = None
-                
-                # Add dataset_id to track which dataset this node belongs to
-                node_props['dataset_id'] = task.dataset_id
-                
-                neo4j_nodes.append(node_props)
+            def reject(index: int, error: Exception) -> None:
+                nonlocal rejected_count
+                rejected_count += 1
+                rejects.add(neo4j_nodes[index], error)
             
-            # Create nodes in Neo4j
-            try:
-                created_count = await neo4j_client.create_nodes_batch(
-                    label=task.node_label or 'Node',
-                    nodes=neo4j_nodes,
-                    unique_id=id_column,
-                    batch_size=BATCH_SIZE
+            created_count = await neo4j_client.create_nodes_batch(
+                label=label,
+                nodes=neo4j_nodes,
+                unique_id=id_column,
+                sizer=sizer,
+                on_reject=reject
+            )
+            nodes_created += created_count
+        
+        async def report_progress(batch_num: int, rows_done: int) -> None:
+            rows_done += resumed_rows
+            fraction, estimated_total = get_stream_progress(processor, rows_done)
+            percentage = int(10 + fraction * 80)  # 10-90%
+            task.processed_rows = rows_done
+            task.total_rows = estimated_total
+            task.progress_percentage = fraction * 100
+            if pipeline.position is not None:
+                offset, row = pipeline.position
+                task.checkpoint = {'offset': offset, 'row': row, 'created': nodes_created, 'rejected': rejected_count}
+            await task.asave(update_fields=['processed_rows', 'total_rows', 'progress_percentage', 'checkpoint', 'updated_at'])
+            await send_task_update(
+                task_id,
+                'progress',
+                {
+                    'message': f'Processing batch {batch_num + 1}',
+                    'percentage': percentage,
+                    'processed': rows_done,
+                    'total': estimated_total
+                }
+            )
+        
+        try:
+            if load_with_csv:
+                query, parameters = load_csv.node_load_query(
+                    label, processor.header, metadata['data_types'], id_column, constants
                 )
-                nodes_created += created_count
-                
-                # Update progress
-                processed = end_idx
-                percentage = int(10 + (processed / len(data)) * 80)  # 10-90%
-                task.processed_rows = processed
-                task.total_rows = len(data)
-                if len(data) > 0:
-                    task.progress_percentage = (processed / len(data)) * 100
-                await task.asave(update_fields=['processed_rows', 'total_rows', 'progress_percentage', 'updated_at'])
-                await send_task_update(
-                    task_id,
-                    'progress',
-                    {
-                        'message': f'Processing batch {batch_num + 1}/{total_batches}',
-                        'percentage': percentage,
-                        'processed': processed,
-                        'total': len(data)
-                    }
+                processed, nodes_created = await ingest_with_load_csv(
+                    task, processor, query, parameters, load_csv.node_count_query(label)
                 )
-                
-            except Exception as e:
-                logger.error(f"Error creating nodes in batch {batch_num + 1}: {e}")
-                task.status = 'failed'
-                task.error_message = f"Error processing batch {batch_num + 1}: {str(e)}"
-                task.completed_at = timezone.now()
-                await task.asave(update_fields=['status', 'error_message', 'completed_at', 'updated_at'])
-                
-                # Update dataset status
-                await update_dataset_status(task.dataset_id)
-                
-                await send_task_update(task_id, 'error', {'message': str(e)})
-                return
+            else:
+                pipeline = IngestPipeline(
+                    # Node batches are independent, so parallel parsing may deliver them out of order
+                    iter_converted_batches(processor, converter, ordered=False),
+                    convert_batch,
+                    write_batch,
+                    writers=settings.INGEST_NODE_WRITERS,
+                    queue_size=settings.INGEST_QUEUE_SIZE,
+                    on_progress=report_progress,
+                    position=lambda: processor.checkpoint
+                )
+                processed = resumed_rows + await pipeline.run()
+        except BatchWriteError as e:
+            processor.close()
+            logger.error(f"Error creating nodes in batch {e.batch_num + 1}: {e}")
+            task.status = 'failed'
+            task.error_message = f"Error processing batch {e.batch_num + 1}: {str(e)}"
+            task.completed_at = timezone.now()
+            task.batch_stats = sizer.stats()
+            task.rejected_rows = rejected_count
+            await task.asave(update_fields=['status', 'error_message', 'completed_at', 'batch_stats', 'rejected_rows', 'updated_at'])
+            
+            # Update dataset status
+            await update_dataset_status(task.dataset_id)
+            
+            await send_task_update(task_id, 'error', {'message': str(e)})
+            return
+        finally:
+            rejects.close()
         
         # If dataset cascade_delete: sync to file — remove nodes of this label not in the file (and their relationships)
         nodes_deleted = 0
-        if task.node_label and id_column:
-            dataset = await Dataset.objects.aget(id=task.dataset_id)
-            if dataset.cascade_delete:
-                try:
-                    ids_in_file = []
-                    for row in data:
-                        val = row.get(id_column)
-                        if val is not None:
-                            try:
-                                ids_in_file.append(int(val))
-                            except (ValueError, TypeError):
-                                ids_in_file.append(val)
-                    nodes_deleted = await neo4j_client.delete_nodes_not_in_set(
-                        label=task.node_label or 'Node',
-                        dataset_id=task.dataset_id,
-                        id_property=id_column,
-                        ids_in_file=ids_in_file,
-                    )
-                    logger.info(f"Cascade delete: removed {nodes_deleted} nodes not in file for label {task.node_label}")
-                except Exception as e:
-                    logger.warning(f"Cascade delete (sync nodes) failed: {e}", exc_info=True)
+        if sync_to_file:
+            try:
+                await send_task_update(task_id, 'progress', {'message': 'Syncing to file (removing nodes not in the file)...', 'percentage': 92})
+                
+                async def report_deleted(deleted: int) -> None:
+                    await send_task_update(task_id, 'progress', {
+                        'message': f'Syncing to file ({deleted} nodes not in the file removed)...',
+                        'percentage': 92
+                    })
+                
+                nodes_deleted = await neo4j_client.delete_stale_nodes(
+                    label=task.node_label or 'Node',
+                    dataset_id=task.dataset_id,
+                    generation=task.id,
+                    on_progress=report_deleted,
+                )
+                logger.info(f"Cascade delete: removed {nodes_deleted} nodes not in file for label {task.node_label}")
+            except Exception as e:
+                logger.warning(f"Cascade delete (sync nodes) failed: {e}", exc_info=True)
 
         # Mark task as completed
+        apply_column_profile(task, processor)
+        if sizer.transactions:
+            task.batch_stats = sizer.stats()
+        task.rejected_rows = rejected_count
+        if rejected_count:
+            # Before any warnings already on the task
+            task.validation_warnings = (
+                [rejects_warning(rejected_count)] + list(task.validation_warnings or [])
+            )[:MAX_VALIDATION_WARNINGS]
+        task.checkpoint = {}
         task.status = 'completed'
         task.completed_at = timezone.now()
+        task.processed_rows = processed
+        task.total_rows = processed
         if task.total_rows > 0:
             task.progress_percentage = 100.0
-        await task.asave(update_fields=['status', 'completed_at', 'progress_percentage', 'updated_at'])
+        await task.asave(update_fields=['status', 'completed_at', 'processed_rows', 'total_rows', 'progress_percentage', 'validation_warnings', 'column_profile', 'batch_stats', 'rejected_rows', 'checkpoint', 'updated_at'])
         
         # Clean up temporary file
         if task.file_path and Path(task.file_path).exists():
@@ -386,14 +634,14 @@ async def process_relationship_csv_task(task_id: int) -> None:
             'percentage': task.progress_percentage or 0
         })
         
-        # Validate CSV file
+        # Validate and open the CSV in a single scan
         await send_task_update(task_id, 'progress', {'message': 'Validating CSV file...', 'percentage': 5})
-        is_valid, errors, warnings = validate_relationship_csv(
-            task.file_path,
-            task.relationship_type
+        processor, metadata, (is_valid, errors, warnings) = await asyncio.to_thread(
+            open_validated_stream, task.file_path, RelationshipCSVValidator(task.file_path, task.relationship_type)
         )
         
         if not is_valid:
+            processor.close()
             # Format errors for better readability - keep it short
             if len(errors) == 1:
                 error_msg = errors[0]
@@ -411,11 +659,10 @@ async def process_relationship_csv_task(task_id: int) -> None:
             await send_task_update(task_id, 'error', {'message': error_msg, 'errors': errors})
             return
         
-        # Parse CSV file
         await send_task_update(task_id, 'progress', {'message': 'Parsing CSV file...', 'percentage': 10})
-        data, metadata = parse_csv(task.file_path)
         
-        if not data:
+        if not processor.sample_rows:
+            processor.close()
             # Clean up temp file
             if task.file_path and Path(task.file_path).exists():
                 Path(task.file_path).unlink(missing_ok=True)
@@ -431,10 +678,6 @@ async def process_relationship_csv_task(task_id: int) -> None:
             await send_task_update(task_id, 'error', {'message': 'CSV file contains no data'})
             return
         
-        # Update task with total rows
-        task.total_rows = len(data)
-        await task.asave(update_fields=['total_rows'])
-        
         # Get source and target labels from task (already set in view)
         source_label = task.source_label
         target_label = task.target_label
@@ -454,6 +697,7 @@ async def process_relationship_csv_task(task_id: int) -> None:
                 if target_label not in missing:
                     missing.append(target_label)
             if missing:
+                processor.close()
                 if task.file_path and Path(task.file_path).exists():
                     Path(task.file_path).unlink(missing_ok=True)
                 labels_str = ', '.join(missing)
@@ -469,7 +713,14 @@ async def process_relationship_csv_task(task_id: int) -> None:
                 await send_task_update(task_id, 'error', {'message': error_msg})
                 return
         
+        # Infer labels only when missing (e.g. old CSV format without Label:source_id)
         if not source_label or not target_label:
+            source_label, target_label = await infer_endpoint_labels(
+                task, processor.sample_rows, node_labels, source_label, target_label
+            )
+        
+        if not source_label or not target_label:
+            processor.close()
             # Clean up temp file
             if task.file_path and Path(task.file_path).exists():
                 Path(task.file_path).unlink(missing_ok=True)
@@ -485,357 +736,295 @@ async def process_relationship_csv_task(task_id: int) -> None:
             await send_task_update(task_id, 'error', {'message': task.error_message})
             return
         
-        # Infer or resolve labels only when missing (e.g. old CSV format without Label:source_id)
-        if not source_label or not target_label:
-            inferred_source, inferred_target = infer_labels_from_relationship_type(
-                task.relationship_type,
-                node_labels
-            )
-            if inferred_source and inferred_target:
-                source_label = inferred_source
-                target_label = inferred_target
-                logger.info(
-                    f"Inferred labels from relationship type '{task.relationship_type}': "
-                    f"{source_label} -> {target_label}"
-                )
-        
-        # If inference didn't work, fall back to ID matching
-        if not source_label or not target_label:
-            if len(node_labels) == 1:
-                # Only one label, use it for both
-                source_label = node_labels[0]
-                target_label = node_labels[0]
-            else:
-                # Multiple labels - try to determine which label each ID belongs to
-                # Sample first few rows to check
-                sample_size = min(DEFAULT_SAMPLE_SIZE, len(data))
-                sample_source_ids = set()
-                sample_target_ids = set()
-                
-                for row in data[:sample_size]:
-                    source_id = row.get('source_id') or row.get('SOURCE_ID') or row.get('Source_ID')
-                    target_id = row.get('target_id') or row.get('TARGET_ID') or row.get('Target_ID')
-                    
-                    # Find case-insensitive matches
-                    for key, value in row.items():
-                        if key.lower().strip() == 'source_id' and value:
-                            sample_source_ids.add(value)
-                        elif key.lower().strip() == 'target_id' and value:
-                            sample_target_ids.add(value)
-                
-                # Query Neo4j to find which labels these IDs belong to
-                # Strategy: For each sample ID, check which label it belongs to, then use the most common label
-                # This handles cases where IDs overlap across labels (e.g., Customer id=1 and Product id=1)
-                try:
-                    if sample_source_ids:
-                        # Convert IDs to integers if possible, but keep track of original values
-                        test_ids = []
-                        for sid in list(sample_source_ids)[:MAX_SAMPLE_IDS]:
-                            try:
-                                test_ids.append(int(sid))
-                            except (ValueError, TypeError):
-                                test_ids.append(sid)
-                        
-                        if test_ids:
-                            # For each ID, find which label(s) it belongs to
-                            label_counts = {label: 0 for label in node_labels}
-                            for test_id in test_ids:
-                                for label in node_labels:
-                                    # Check if this specific ID exists in this label with this dataset_id
-                                    query = f"MATCH (n:{label} {{id: $id, dataset_id: $dataset_id}}) RETURN count(n) as count"
-                                    result = await neo4j_client.execute_query(query, {'id': test_id, 'dataset_id': task.dataset_id})
-                                    if result and result[0].get('count', 0) > 0:
-                                        label_counts[label] += 1
-                            
-                            # Find the label with the most matches
-                            best_label = max(label_counts.items(), key=lambda x: x[1])[0] if label_counts else None
-                            best_count = max(label_counts.values()) if label_counts else 0
-                            
-                            if best_label and best_count > 0:
-                                # Only use this if we haven't already inferred from relationship type
-                                if not source_label:
-                                    source_label = best_label
-                                    logger.info(f"Determined source label from ID matching: {source_label} (matched {best_count}/{len(test_ids)} sample IDs)")
-                                    logger.info(f"Label match counts: {label_counts}")
-                                else:
-                                    logger.info(f"Source label already inferred as {source_label}, skipping ID matching")
-                            else:
-                                logger.warning(f"Could not determine source label from sample IDs: {test_ids}")
-                    
-                    if sample_target_ids:
-                        # Convert IDs to integers if possible
-                        test_ids = []
-                        for tid in list(sample_target_ids)[:MAX_SAMPLE_IDS]:
-                            try:
-                                test_ids.append(int(tid))
-                            except (ValueError, TypeError):
-                                test_ids.append(tid)
-                        
-                        if test_ids:
-                            # For each ID, find which label(s) it belongs to
-                            label_counts = {label: 0 for label in node_labels}
-                            for test_id in test_ids:
-                                for label in node_labels:
-                                    # Check if this specific ID exists in this label with this dataset_id
-                                    query = f"MATCH (n:{label} {{id: $id, dataset_id: $dataset_id}}) RETURN count(n) as count"
-                                    result = await neo4j_client.execute_query(query, {'id': test_id, 'dataset_id': task.dataset_id})
-                                    if result and result[0].get('count', 0) > 0:
-                                        label_counts[label] += 1
-                            
-                            # Find the label with the most matches
-                            best_label = max(label_counts.items(), key=lambda x: x[1])[0] if label_counts else None
-                            best_count = max(label_counts.values()) if label_counts else 0
-                            
-                            if best_label and best_count > 0:
-                                # Only use this if we haven't already inferred from relationship type
-                                if not target_label:
-                                    target_label = best_label
-                                    logger.info(f"Determined target label from ID matching: {target_label} (matched {best_count}/{len(test_ids)} sample IDs)")
-                                    logger.info(f"Label match counts: {label_counts}")
-                                else:
-                                    logger.info(f"Target label already inferred as {target_label}, skipping ID matching")
-                            else:
-                                logger.warning(f"Could not determine target label from sample IDs: {test_ids}")
-                except Exception as e:
-                    logger.warning(f"Error determining labels from Neo4j: {e}", exc_info=True)
-            
-            # Fallback: if we couldn't determine, use intelligent defaults
-            if not source_label:
-                source_label = node_labels[0]
-                logger.warning(f"Could not determine source label, using fallback: {source_label}")
-            if not target_label:
-                # Use different label if available, otherwise same as source
-                if len(node_labels) > 1:
-                    # Try to use a different label than source
-                    target_label = node_labels[1] if node_labels[1] != source_label else (node_labels[2] if len(node_labels) > 2 else node_labels[0])
-                else:
-                    target_label = node_labels[0]
-                logger.warning(f"Could not determine target label, using fallback: {target_label}")
-            
-            # Final validation: warn if source and target are the same when we have multiple labels
-            if source_label == target_label and len(node_labels) > 1:
-                logger.warning(
-                    f"WARNING: Source and target labels are the same ({source_label}) but multiple labels exist: {node_labels}. "
-                    f"This might indicate incorrect label detection. Please verify your relationship CSV data."
-                )
-        
         logger.info(f"Processing relationship file '{task.file_name}' with type '{task.relationship_type}'")
         logger.info(f"Using node labels: source={source_label}, target={target_label}")
-        logger.info(f"Found {len(data)} relationship rows to process")
 
+        # Make sure endpoint lookups and dataset-scoped relationship filters are index-backed
+        try:
+            await schema_provisioner.ensure_node_label(source_label)
+            await schema_provisioner.ensure_node_label(target_label)
+            await schema_provisioner.ensure_relationship_type(task.relationship_type or 'RELATED_TO')
+        except Exception as e:
+            logger.warning(f"Index provisioning failed for relationship type {task.relationship_type}: {e}")
+
+        # Conversion types over the whole file, not just the validated prefix
+        metadata = await asyncio.to_thread(profile_columns, processor, metadata)
+        
+        # Continue after the last checkpoint of an interrupted run (LOAD CSV starts over)
+        load_with_csv = use_load_csv(processor)
+        checkpoint = resume_from_checkpoint(task, processor, resumable=not load_with_csv)
+        resumed_rows = checkpoint.get('row', 0)
+        
         # If cascade_delete: re-upload replaces — remove existing relationships of this type so file is source of truth. Otherwise leave existing in Neo4j (orphans).
+        # A resumed run already did this before its checkpoint.
         dataset = await Dataset.objects.aget(id=task.dataset_id)
-        if dataset.cascade_delete:
+        if dataset.cascade_delete and not resumed_rows:
             await send_task_update(task_id, 'progress', {'message': 'Syncing to file (removing previous relationships)...', 'percentage': 12})
+            
+            async def report_deleted(deleted: int) -> None:
+                await send_task_update(task_id, 'progress', {
+                    'message': f'Syncing to file ({deleted} previous relationships removed)...',
+                    'percentage': 12
+                })
+            
             await neo4j_client.delete_relationships_of_type_for_dataset(
+                task.relationship_type or 'RELATED_TO', task.dataset_id, on_progress=report_deleted
+            )
+        
+        # CREATE instead of MERGE while no relationship of this type can exist yet between
+        # the endpoints (see core.write_strategy)
+        if load_with_csv:
+            write_strategy = RelationshipWriteStrategy(False, reason='LOAD CSV ingestion')
+        elif resumed_rows:
+            # Pairs written before the checkpoint are not known any more
+            write_strategy = RelationshipWriteStrategy(False, reason='resumed upload')
+        elif settings.INGEST_RELATIONSHIP_STRATEGY != 'auto':
+            write_strategy = RelationshipWriteStrategy(False, reason=f'INGEST_RELATIONSHIP_STRATEGY={settings.INGEST_RELATIONSHIP_STRATEGY}')
+        else:
+            type_empty = dataset.cascade_delete or not await neo4j_client.has_relationships_for_dataset(
                 task.relationship_type or 'RELATED_TO', task.dataset_id
             )
+            write_strategy = RelationshipWriteStrategy(
+                type_empty, expected_rows=get_stream_progress(processor, processor.buffered_row_count)[1]
+            )
+        logger.info(f"Task {task_id}: writing relationships with {write_strategy.initial.upper()} ({write_strategy.reason})")
 
-        # Process relationships in batches
-        total_batches = (len(data) + BATCH_SIZE - 1) // BATCH_SIZE
-        relationships_created = 0
+        # Process relationships in batches streamed from the file (see IngestPipeline)
+        relationships_created = checkpoint.get('created', 0)
+        processed = 0
+        validation_warnings = []
+        skipped_count = checkpoint.get('skipped', 0)
+        
+        def add_warning(message: str) -> None:
+            # Count every skipped row but only keep the first MAX_VALIDATION_WARNINGS messages
+            if len(validation_warnings) < MAX_VALIDATION_WARNINGS:
+                validation_warnings.append(message)
+        
+        rows_read = resumed_rows
+        sizer = new_batch_sizer()
+        lane_stats = LaneStats(settings.INGEST_RELATIONSHIP_LANES, settings.INGEST_HUB_DEGREE)
+        # Each lane adapts its own batch size (lanes wait on each other's locks)
+        lane_sizers = [sizer.spawn() for _ in range(lane_stats.lanes + 1)]
+        write_sizers = [sizer] + lane_sizers
+        # Endpoint id -> element id, kept for the whole upload (see core.endpoint_resolver)
+        source_resolver = EndpointResolver(source_label, task.dataset_id)
+        target_resolver = source_resolver if target_label == source_label else EndpointResolver(target_label, task.dataset_id)
+        converter = RelationshipRowConverter(
+            processor.header,
+            metadata.get('data_types', {}),
+            source_label,
+            target_label,
+            {'dataset_id': task.dataset_id}
+        )
+        
+        # Rows Neo4j refuses even on their own are isolated and saved instead of being dropped
+        rejected_count = checkpoint.get('rejected', 0)
+        rejects = RejectsWriter(task.id, ['row'] + processor.header, resume=bool(resumed_rows))
+        source_column = processor.header[converter.source_index] if converter.source_index is not None else 'source_id'
+        target_column = processor.header[converter.target_index] if converter.target_index is not None else 'target_id'
         
-        for batch_num in range(total_batches):
-            start_idx = batch_num * BATCH_SIZE
-            end_idx = min(start_idx + BATCH_SIZE, len(data))
-            batch = data[start_idx:end_idx]
+        def convert_batch(rels: List[Optional[Dict[str, Any]]]) -> Tuple[List[Tuple[int, Dict[str, Any]]], List[str], str]:
+            # Runs in the pipeline's worker thread: skipped rows are returned and counted by
+            # write_batch on the event loop, so the counters are only touched from one thread
+            nonlocal rows_read
+            strategy = write_strategy.observe(rels)
+            # Number the converted rows (endpoints are validated per batch in write_batch)
+            candidate_rels = []
+            skipped_rows = []
+            for row_idx, rel_data in enumerate(rels, start=rows_read + 1):
+                if rel_data is None:
+                    skipped_rows.append(f"Row {row_idx}: Missing source_id or target_id")
+                    continue
+                candidate_rels.append((row_idx, rel_data))
+            rows_read += len(rels)
+            return candidate_rels, skipped_rows, strategy
+        
+        async def write_batch(batch_num: int, converted: Tuple[List[Tuple[int, Dict[str, Any]]], List[str], str]) -> None:
+            nonlocal relationships_created, skipped_count
+            candidate_rels, skipped_rows, strategy = converted
+            skipped_count += len(skipped_rows)
+            for message in skipped_rows:
+                add_warning(message)
             
-            # Prepare relationships for Neo4j
+            # Validate that source and target nodes exist and resolve them to element ids: at most
+            # one UNWIND lookup per label for the whole batch, for the ids not cached yet
             neo4j_rels = []
-            validation_warnings = []
-            skipped_count = 0
-            
-            for row_idx, row in enumerate(batch, start=start_idx + 1):
-                # Find source_id and target_id columns (new format: Label:source_id)
-                source_id = None
-                target_id = None
-                source_col = None
-                target_col = None
-                
-                for key, value in row.items():
-                    # Check for new format: Label:source_id or Label:target_id
-                    if ':' in key:
-                        parts = key.split(':', 1)
-                        if len(parts) == 2:
-                            label_part = parts[0].strip()
-                            id_part = parts[1].strip().lower()
-                            
-                            if id_part == 'source_id' and label_part == source_label:
-                                source_id = value
-                                source_col = key
-                            elif id_part == 'target_id' and label_part == target_label:
-                                target_id = value
-                                target_col = key
-                    # Fallback to old format (for backward compatibility)
-                    elif key.lower().strip() == 'source_id':
-                        source_id = value
-                        source_col = key
-                    elif key.lower().strip() == 'target_id':
-                        target_id = value
-                        target_col = key
-                
-                if not source_id or not target_id:
-                    skipped_count += 1
-                    validation_warnings.append(f"Row {row_idx}: Missing source_id or target_id")
-                    continue
-                
-                # Convert IDs to integers if they're numeric (to match node IDs)
-                # This ensures type consistency with how node IDs are stored
+            rel_rows = []  # File row of each entry of neo4j_rels
+            if candidate_rels:
                 try:
-                    # Try to convert to int, handling strings and already-int values
-                    if isinstance(source_id, str):
-                        source_id = source_id.strip()
-                        if source_id.isdigit() or (source_id.startswith('-') and source_id[1:].isdigit()):
-                            source_id = int(source_id)
-                    elif isinstance(source_id, (int, float)):
-                        source_id = int(source_id)
-                    
-                    if isinstance(target_id, str):
-                        target_id = target_id.strip()
-                        if target_id.isdigit() or (target_id.startswith('-') and target_id[1:].isdigit()):
-                            target_id = int(target_id)
-                    elif isinstance(target_id, (int, float)):
-                        target_id = int(target_id)
-                except (ValueError, TypeError, AttributeError):
-                    # Keep as original value if conversion fails
-                    logger.debug(f"Could not convert IDs to int: source_id={source_id}, target_id={target_id}")
-                    pass
-                
-                rel_data = {
-                    'source_id': source_id,
-                    'target_id': target_id,
-                    'properties': {}
-                }
-                
-                # Add other properties (excluding source_id and target_id in any case)
-                # Convert values to appropriate types based on detected metadata
-                for key, value in row.items():
-                    key_lower = key.lower().strip()
-                    if key_lower not in ['source_id', 'target_id']:
-                        # Convert value based on detected type from metadata
-                        data_type = metadata.get('data_types', {}).get(key, 'string')
-                        converted_value = value
-                        
-                        if value is not None and value != '':
-                            try:
-                                if data_type == 'integer':
-                                    converted_value = int(value)
-                                elif data_type == 'float':
-                                    converted_value = float(value)
-                                elif data_type == 'boolean':
-                                    converted_value = str(value).lower() in ['true', '1', 'yes']
-                                # Keep dates and strings as-is for now
-                            except (ValueError, TypeError):
-                                # If conversion fails, keep original value
-                                logger.debug(f"Could not convert relationship property {key}={value} to {data_type}, keeping as string")
-                                converted_value = value
-                        else:
-                            converted_value = None
-                        
-                        rel_data['properties'][key] = converted_value
+                    source_ids = {rel['source_id'] for _, rel in candidate_rels}
+                    target_ids = {rel['target_id'] for _, rel in candidate_rels}
+                    if source_label == target_label:
+                        existing_source_ids = await source_resolver.resolve(source_ids | target_ids)
+                        existing_target_ids = existing_source_ids
+                    else:
+                        existing_source_ids = await source_resolver.resolve(source_ids)
+                        existing_target_ids = await target_resolver.resolve(target_ids)
+                except Exception as e:
+                    logger.warning(f"Error validating nodes for batch {batch_num + 1}: {e}")
+                    skipped_count += len(candidate_rels)
+                    for row_idx, _ in candidate_rels:
+                        add_warning(f"Row {row_idx}: Error validating nodes: {str(e)}")
+                    candidate_rels = []
                 
-                # Validate that source and target nodes exist before adding to batch
-                try:
-                    # Check source node exists
-                    source_query = f"MATCH (n:{source_label} {{id: $id, dataset_id: $dataset_id}}) RETURN count(n) as count"
-                    source_result = await neo4j_client.execute_query(
-                        source_query,
-                        {'id': source_id, 'dataset_id': task.dataset_id}
-                    )
-                    source_exists = source_result and source_result[0].get('count', 0) > 0
-                    
-                    # Check target node exists
-                    target_query = f"MATCH (n:{target_label} {{id: $id, dataset_id: $dataset_id}}) RETURN count(n) as count"
-                    target_result = await neo4j_client.execute_query(
-                        target_query,
-                        {'id': target_id, 'dataset_id': task.dataset_id}
-                    )
-                    target_exists = target_result and target_result[0].get('count', 0) > 0
-                    
-                    if not source_exists:
+                for row_idx, rel_data in candidate_rels:
+                    if rel_data['source_id'] not in existing_source_ids:
                         skipped_count += 1
-                        validation_warnings.append(f"Row {row_idx}: Source node {source_label}:{source_id} does not exist")
+                        add_warning(f"Row {row_idx}: Source node {source_label}:{rel_data['source_id']} does not exist")
                         continue
                     
-                    if not target_exists:
+                    if rel_data['target_id'] not in existing_target_ids:
                         skipped_count += 1
-                        validation_warnings.append(f"Row {row_idx}: Target node {target_label}:{target_id} does not exist")
+                        add_warning(f"Row {row_idx}: Target node {target_label}:{rel_data['target_id']} does not exist")
                         continue
                     
-                except Exception as e:
-                    logger.warning(f"Error validating nodes for row {row_idx}: {e}")
-                    skipped_count += 1
-                    validation_warnings.append(f"Row {row_idx}: Error validating nodes: {str(e)}")
-                    continue
-                
-                # Add dataset_id to relationship properties to track which dataset it belongs to
-                rel_data['properties']['dataset_id'] = task.dataset_id
-                
-                neo4j_rels.append(rel_data)
+                    rel_data['source_element_id'] = existing_source_ids[rel_data['source_id']]
+                    rel_data['target_element_id'] = existing_target_ids[rel_data['target_id']]
+                    neo4j_rels.append(rel_data)
+                    rel_rows.append(row_idx)
+            
+            def reject(index: int, error: Exception) -> None:
+                nonlocal skipped_count, rejected_count
+                rel_data = neo4j_rels[index]
+                skipped_count += 1
+                rejected_count += 1
+                add_warning(f"Row {rel_rows[index]}: Rejected by Neo4j: {error}")
+                rejects.add({
+                    **rel_data['properties'],
+                    'row': rel_rows[index],
+                    source_column: rel_data['source_id'],
+                    target_column: rel_data['target_id'],
+                }, error)
             
             # Create relationships in Neo4j
-            try:
-                if neo4j_rels:
-                    created_count = await neo4j_client.create_relationships_batch(
-                        source_label=source_label,
-                        source_id_key='id',
-                        target_label=target_label,
-                        target_id_key='id',
-                        relationship_type=task.relationship_type or 'RELATED_TO',
-                        relationships=neo4j_rels,
-                        batch_size=BATCH_SIZE
-                    )
-                    
-                    logger.info(f"Batch {batch_num + 1}: Created {created_count} relationships (expected {len(neo4j_rels)})")
-                    relationships_created += created_count
-                else:
-                    logger.warning(f"Batch {batch_num + 1}: No valid relationships to create (all skipped)")
-                
-                # Update progress
-                processed = end_idx
-                percentage = int(10 + (processed / len(data)) * 80)  # 10-90%
-                task.processed_rows = processed
-                task.total_rows = len(data)
-                if len(data) > 0:
-                    task.progress_percentage = (processed / len(data)) * 100
-                await task.asave(update_fields=['processed_rows', 'total_rows', 'progress_percentage', 'updated_at'])
-                await send_task_update(
-                    task_id,
-                    'progress',
-                    {
-                        'message': f'Processing batch {batch_num + 1}/{total_batches}',
-                        'percentage': percentage,
-                        'processed': processed,
-                        'total': len(data)
-                    }
+            if neo4j_rels:
+                if strategy == MERGE and write_strategy.merge_from_batch:
+                    # MERGE must see every relationship the CREATE batches before it wrote
+                    await pipeline.wait_written(write_strategy.merge_from_batch)
+                created_count = await neo4j_client.create_relationships_in_lanes(
+                    source_label=source_label,
+                    source_id_key='id',
+                    target_label=target_label,
+                    target_id_key='id',
+                    relationship_type=task.relationship_type or 'RELATED_TO',
+                    relationships=neo4j_rels,
+                    lanes=settings.INGEST_RELATIONSHIP_LANES,
+                    hub_degree=settings.INGEST_HUB_DEGREE,
+                    sizer=sizer,
+                    strategy=strategy,
+                    on_reject=reject,
+                    lane_stats=lane_stats,
+                    lane_sizers=lane_sizers
                 )
                 
-            except Exception as e:
-                logger.error(f"Error creating relationships in batch {batch_num + 1}: {e}")
-                task.status = 'failed'
-                task.error_message = f"Error processing batch {batch_num + 1}: {str(e)}"
-                task.completed_at = timezone.now()
-                await task.asave(update_fields=['status', 'error_message', 'completed_at', 'updated_at'])
-                
-                # Update dataset status
-                await update_dataset_status(task.dataset_id)
-                
-                await send_task_update(task_id, 'error', {'message': str(e)})
-                return
+                logger.info(f"Batch {batch_num + 1}: Created {created_count} relationships (expected {len(neo4j_rels)})")
+                relationships_created += created_count
+            else:
+                logger.warning(f"Batch {batch_num + 1}: No valid relationships to create (all skipped)")
+        
+        async def report_progress(batch_num: int, rows_done: int) -> None:
+            rows_done += resumed_rows
+            fraction, estimated_total = get_stream_progress(processor, rows_done)
+            percentage = int(10 + fraction * 80)  # 10-90%
+            task.processed_rows = rows_done
+            task.total_rows = estimated_total
+            task.progress_percentage = fraction * 100
+            if pipeline.position is not None:
+                offset, row = pipeline.position
+                task.checkpoint = {
+                    'offset': offset, 'row': row, 'created': relationships_created, 'skipped': skipped_count,
+                    'rejected': rejected_count
+                }
+            await task.asave(update_fields=['processed_rows', 'total_rows', 'progress_percentage', 'checkpoint', 'updated_at'])
+            await send_task_update(
+                task_id,
+                'progress',
+                {
+                    'message': f'Processing batch {batch_num + 1}',
+                    'percentage': percentage,
+                    'processed': rows_done,
+                    'total': estimated_total
+                }
+            )
+        
+        try:
+            if load_with_csv:
+                relationship_type = task.relationship_type or 'RELATED_TO'
+                query, parameters = load_csv.relationship_load_query(
+                    processor.header, metadata.get('data_types', {}), source_label, target_label, relationship_type
+                )
+                processed, relationships_created = await ingest_with_load_csv(
+                    task, processor, query, parameters, load_csv.relationship_count_query(relationship_type)
+                )
+                # LOAD CSV does not report individual rows: rows without both ids or whose
+                # endpoints do not exist are only counted
+                skipped_count = processed - relationships_created
+                if skipped_count > 0:
+                    add_warning(
+                        f"{skipped_count} rows were not loaded: missing source_id/target_id, or "
+                        f"source node {source_label} / target node {target_label} does not exist"
+                    )
+            else:
+                pipeline = IngestPipeline(
+                    iter_converted_batches(processor, converter),
+                    convert_batch,
+                    write_batch,
+                    writers=settings.INGEST_RELATIONSHIP_WRITERS,
+                    queue_size=settings.INGEST_QUEUE_SIZE,
+                    on_progress=report_progress,
+                    position=lambda: processor.checkpoint
+                )
+                processed = resumed_rows + await pipeline.run()
+        except BatchWriteError as e:
+            processor.close()
+            logger.error(f"Error creating relationships in batch {e.batch_num + 1}: {e}")
+            task.status = 'failed'
+            task.error_message = f"Error processing batch {e.batch_num + 1}: {str(e)}"
+            task.completed_at = timezone.now()
+            task.batch_stats = {
+                **AdaptiveBatchSizer.combined_stats(write_sizers),
+                'write_strategy': write_strategy.stats(),
+                'lanes': lane_stats.stats(),
+                'endpoint_cache': endpoint_cache_stats(source_resolver, target_resolver)
+            }
+            task.rejected_rows = rejected_count
+            await task.asave(update_fields=['status', 'error_message', 'completed_at', 'batch_stats', 'rejected_rows', 'updated_at'])
+            
+            # Update dataset status
+            await update_dataset_status(task.dataset_id)
+            
+            await send_task_update(task_id, 'error', {'message': str(e)})
+            return
+        finally:
+            rejects.close()
         
         # Save validation warnings
+        if rejected_count:
+            validation_warnings.insert(0, rejects_warning(rejected_count))
         if validation_warnings:
-            task.validation_warnings = validation_warnings[:100]  # Limit to first 100 warnings
+            task.validation_warnings = validation_warnings[:MAX_VALIDATION_WARNINGS]
             if skipped_count > 0:
                 warning_summary = f"Skipped {skipped_count} rows due to validation errors. See validation_warnings for details."
                 logger.warning(warning_summary)
         
         # Mark task as completed
+        apply_column_profile(task, processor)
+        wrote = any(write_sizer.transactions for write_sizer in write_sizers)
+        task.batch_stats = {
+            **(AdaptiveBatchSizer.combined_stats(write_sizers) if wrote else {}),
+            'write_strategy': write_strategy.stats(),
+            'lanes': lane_stats.stats(),
+            'endpoint_cache': endpoint_cache_stats(source_resolver, target_resolver)
+        }
+        task.rejected_rows = rejected_count
+        task.checkpoint = {}
         task.status = 'completed'
         task.completed_at = timezone.now()
+        task.processed_rows = processed
+        task.total_rows = processed
         if task.total_rows > 0:
             task.progress_percentage = 100.0
-        await task.asave(update_fields=['status', 'completed_at', 'progress_percentage', 'validation_warnings', 'updated_at'])
+        await task.asave(update_fields=['status', 'completed_at', 'processed_rows', 'total_rows', 'progress_percentage', 'validation_warnings', 'column_profile', 'batch_stats', 'rejected_rows', 'checkpoint', 'updated_at'])
         
         # Clean up temporary file
         if task.file_path and Path(task.file_path).exists():
@@ -851,7 +1040,7 @@ async def process_relationship_csv_task(task_id: int) -> None:
         # Verify actual count from Neo4j
         try:
             if task.relationship_type:
-                rel_type_escaped = f"`{task.relationship_type}`" if not task.relationship_type.replace('_', '').isalnum() else task.relationship_type
+                rel_type_escaped = quote_name(task.relationship_type)
                 verify_query = f"MATCH ()-[r:{rel_type_escaped}]->() WHERE r.dataset_id = $dataset_id RETURN count(r) as count"
                 verify_result = await neo4j_client.execute_query(verify_query, {'dataset_id': task.dataset_id})
                 actual_count = verify_result[0]['count'] if verify_result and len(verify_result) > 0 else 0
@@ -881,6 +1070,7 @@ async def process_relationship_csv_task(task_id: int) -> None:
                 'status': 'completed',
                 'message': f'Successfully created {relationships_created} relationships',
                 'relationships_created': relationships_created,
+                'write_strategy': write_strategy.stats()['strategy'],
                 'percentage': 100
             }
         )
@@ -905,21 +1095,149 @@ async def process_relationship_csv_task(task_id: int) -> None:
             logger.error(f"Failed to update task status: {db_error}")
 
 
+async def process_purge_task(task_id: int) -> None:
+    """
+    Delete a dataset: its relationships and nodes in Neo4j, then the Dataset row.
+    
+    The graph is purged in bounded transactions (see Neo4jClient.purge_dataset) with
+    progress streamed over the task WebSocket. The row, and with it this task, is only
+    deleted once Neo4j is clean; if the purge fails the task is marked failed and
+    re-running it (DELETE again, or the task resume endpoint) continues where it stopped.
+    
+    Args:
+        task_id: UploadTask ID (file_type 'purge')
+    """
+    try:
+        task = await UploadTask.objects.select_related('dataset').aget(id=task_id)
+        dataset = task.dataset
+        
+        task.status = 'processing'
+        task.started_at = timezone.now()
+        task.total_rows = dataset.total_nodes + dataset.total_relationships
+        await task.asave(update_fields=['status', 'started_at', 'total_rows', 'updated_at'])
+        
+        await send_task_update(task_id, 'status', {
+            'status': 'processing',
+            'message': 'Deleting dataset from the graph',
+            'percentage': 0
+        })
+        
+        async def report_progress(totals: Dict[str, int]) -> None:
+            deleted = totals['relationships'] + totals['nodes']
+            # The counts on the dataset are an estimate (e.g. after an interrupted purge)
+            task.total_rows = max(task.total_rows, deleted)
+            task.processed_rows = deleted
+            task.progress_percentage = deleted / task.total_rows * 100 if task.total_rows else 0.0
+            await task.asave(update_fields=['processed_rows', 'total_rows', 'progress_percentage', 'updated_at'])
+            await send_task_update(
+                task_id,
+                'progress',
+                {
+                    'message': f"Deleted {totals['relationships']} relationships and {totals['nodes']} nodes",
+                    'percentage': int(task.progress_percentage * 0.95),  # 0-95%
+                    'processed': deleted,
+                    'total': task.total_rows,
+                    'relationships_deleted': totals['relationships'],
+                    'nodes_deleted': totals['nodes']
+                }
+            )
+        
+        totals = await neo4j_client.purge_dataset(dataset.id, on_progress=report_progress)
+        query_cache.invalidate_dataset(dataset.id)
+        
+        # Uploads that never ran still hold their temp files; rejects files go with their tasks
+        async for upload in UploadTask.objects.filter(dataset_id=dataset.id):
+            if upload.file_path:
+                Path(upload.file_path).unlink(missing_ok=True)
+            rejects_path(upload.id).unlink(missing_ok=True)
+        
+        await send_task_update(
+            task_id,
+            'status',
+            {
+                'status': 'completed',
+                'message': f"Dataset deleted ({totals['relationships']} relationships, {totals['nodes']} nodes)",
+                'relationships_deleted': totals['relationships'],
+                'nodes_deleted': totals['nodes'],
+                'percentage': 100
+            }
+        )
+        # Cascades to the upload tasks, this one included
+        await Dataset.objects.filter(id=dataset.id).adelete()
+        
+        logger.info(
+            f"Task {task_id} completed: dataset {dataset.id} deleted "
+            f"({totals['relationships']} relationships, {totals['nodes']} nodes)"
+        )
+        
+    except Exception as e:
+        logger.error(f"Task {task_id} failed: {e}", exc_info=True)
+        try:
+            task = await UploadTask.objects.aget(id=task_id)
+            task.status = 'failed'
+            task.error_message = str(e)
+            task.completed_at = timezone.now()
+            await task.asave(update_fields=['status', 'error_message', 'completed_at', 'updated_at'])
+            
+            await send_task_update(task_id, 'error', {'message': str(e)})
+        except Exception as db_error:
+            logger.error(f"Failed to update task status: {db_error}")
+
+
 async def process_upload_task(task_id: int) -> None:
     """
     Main function to process an upload task.
     Determines if it's a node or relationship file and processes accordingly.
     
+    The task is claimed first (pending -> processing in one UPDATE), so a task queued by
+    more than one process, e.g. by a view and by requeue_pending_upload_tasks, runs once.
+    While it runs, its heartbeat is refreshed every UPLOAD_TASK_HEARTBEAT_INTERVAL seconds.
+    
     Args:
         task_id: UploadTask ID
     """
+    claimed = await UploadTask.objects.filter(id=task_id, status='pending').aupdate(
+        status='processing', heartbeat_at=timezone.now(), updated_at=timezone.now()
+    )
+    if not claimed:
+        logger.info(f"Upload task {task_id} is no longer pending (run by another process?), skipping it")
+        return
+    heartbeat = asyncio.create_task(keep_task_alive(task_id))
+    try:
+        await run_upload_task(task_id)
+    finally:
+        heartbeat.cancel()
+        try:
+            # Released: an interrupted task can be re-queued right away instead of once stale
+            await UploadTask.objects.filter(id=task_id).aupdate(heartbeat_at=None)
+        except Exception as e:
+            logger.warning(f"Could not release heartbeat of upload task {task_id}: {e}")
+
+
+async def keep_task_alive(task_id: int) -> None:
+    """Refresh the heartbeat of a running task until cancelled."""
+    while True:
+        await asyncio.sleep(settings.UPLOAD_TASK_HEARTBEAT_INTERVAL)
+        try:
+            await UploadTask.objects.filter(id=task_id).aupdate(heartbeat_at=timezone.now())
+        except Exception as e:
+            logger.warning(f"Heartbeat of upload task {task_id} failed: {e}")
+
+
+async def run_upload_task(task_id: int) -> None:
+    """Dispatch a claimed upload task to the processor of its file type."""
     try:
         task = await UploadTask.objects.select_related('dataset').aget(id=task_id)
         
         if task.file_type == 'node':
             await process_node_csv_task(task_id)
+            # Graph data changed (also on failure: earlier batches may have been written)
+            query_cache.invalidate_dataset(task.dataset_id)
         elif task.file_type == 'relationship':
             await process_relationship_csv_task(task_id)
+            query_cache.invalidate_dataset(task.dataset_id)
+        elif task.file_type == 'purge':
+            await process_purge_task(task_id)
         else:
             task.status = 'failed'
             task.error_message = f"Unknown file type: {task.file_type}"
@@ -950,9 +1268,8 @@ async def process_upload_task(task_id: int) -> None:
 
 # Constants
 BATCH_SIZE = 100
-DEFAULT_SAMPLE_SIZE = 5
-MAX_SAMPLE_IDS = 10
-MAX_LABELS_TO_CHECK = 5
+MAX_SAMPLE_IDS = 100  # Distinct ids per side sent to the label inference query
+MAX_VALIDATION_WARNINGS = 100  # Warnings stored on the task (skipped rows are still counted)
 
 # Relationship type to label mapping patterns
 RELATIONSHIP_PATTERNS = {
@@ -1015,25 +1332,209 @@ def infer_labels_from_relationship_type(
     return None, None
 
 
+def sample_endpoint_ids(sample_rows: List[Dict[str, Any]], column: str) -> List[Any]:
+    """
+    Distinct ids of an endpoint column ('source_id' or 'target_id', optionally prefixed
+    with 'Label:') in the sample rows, as integers when numeric (like node ids).
+    """
+    ids = []
+    seen = set()
+    for row in sample_rows:
+        for key, value in row.items():
+            name = key.lower().strip().rsplit(':', 1)[-1]
+            if name != column or value is None or str(value).strip() == '':
+                continue
+            value = str(value).strip()
+            try:
+                value = int(value)
+            except ValueError:
+                pass
+            if value not in seen:
+                seen.add(value)
+                ids.append(value)
+            if len(ids) >= MAX_SAMPLE_IDS:
+                return ids
+    return ids
+
+
+def rank_candidate_labels(
+    label_counts: Dict[str, int],
+    available_labels: List[str],
+    preferred: Optional[str] = None
+) -> List[str]:
+    """
+    Labels that matched at least one sample id, best first.
+
+    Ranked by number of matched ids; ties (e.g. Customer id=1 and Product id=1) go to
+    the label suggested by the relationship type, then to the earliest uploaded label.
+    """
+    def order(label: str) -> Tuple[int, bool, int]:
+        position = available_labels.index(label) if label in available_labels else len(available_labels)
+        return -label_counts[label], label != preferred, position
+
+    return sorted((label for label, count in label_counts.items() if count > 0), key=order)
+
+
+async def infer_endpoint_labels(
+    task: UploadTask,
+    sample_rows: List[Dict[str, Any]],
+    node_labels: List[str],
+    source_label: Optional[str],
+    target_label: Optional[str]
+) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Infer the missing source/target labels of a relationship upload.
+
+    Sample ids of each side are looked up in one query (Neo4jClient.count_id_labels) and
+    the labels holding most of them are used; the relationship type name only breaks
+    ties, or decides when no sample id exists yet.
+
+    Args:
+        task: Relationship UploadTask
+        sample_rows: First rows of the CSV file, as dicts keyed by column
+        node_labels: Labels of the completed node uploads of the dataset
+        source_label: Source label from the header, if any
+        target_label: Target label from the header, if any
+
+    Returns:
+        Tuple of (source_label, target_label), None where no label could be found
+    """
+    if not node_labels:
+        return source_label, target_label
+    if len(node_labels) == 1:
+        # Only one label, use it for both
+        return source_label or node_labels[0], target_label or node_labels[0]
+
+    hinted_source, hinted_target = infer_labels_from_relationship_type(task.relationship_type, node_labels)
+    sides = [
+        ('source', 'source_id', source_label, hinted_source),
+        ('target', 'target_id', target_label, hinted_target),
+    ]
+    inferred = []
+    for side, column, label, hint in sides:
+        if label:
+            inferred.append(label)
+            continue
+        ids = sample_endpoint_ids(sample_rows, column)
+        ranked = []
+        if ids:
+            try:
+                label_counts = await neo4j_client.count_id_labels(ids, task.dataset_id, node_labels)
+                ranked = rank_candidate_labels(label_counts, node_labels, hint)
+                logger.info(f"Label match counts for {len(ids)} sample {side} ids: {label_counts}")
+            except Exception as e:
+                logger.warning(f"Error determining {side} label from Neo4j: {e}", exc_info=True)
+        if ranked:
+            label = ranked[0]
+            logger.info(f"Determined {side} label from ID matching: {label} (candidates: {ranked})")
+        elif hint:
+            label = hint
+            logger.info(f"Inferred {side} label from relationship type '{task.relationship_type}': {label}")
+        else:
+            logger.warning(f"Could not determine {side} label from sample IDs: {ids[:10]}")
+        inferred.append(label)
+
+    source_label, target_label = inferred
+    # Fallback: if we couldn't determine, use intelligent defaults
+    if not source_label:
+        source_label = node_labels[0]
+        logger.warning(f"Could not determine source label, using fallback: {source_label}")
+    if not target_label:
+        # Use a different label than source if available
+        target_label = next((label for label in node_labels if label != source_label), node_labels[0])
+        logger.warning(f"Could not determine target label, using fallback: {target_label}")
+
+    # Final validation: warn if source and target are the same when we have multiple labels
+    if source_label == target_label:
+        logger.warning(
+            f"WARNING: Source and target labels are the same ({source_label}) but multiple labels exist: {node_labels}. "
+            f"This might indicate incorrect label detection. Please verify your relationship CSV data."
+        )
+    return source_label, target_label
+
+
 def start_upload_task(task_id: int) -> None:
     """
-    Start an upload task asynchronously.
+    Queue an upload task on the background runner.
     This is a sync wrapper that can be called from Django views.
     
     Args:
         task_id: UploadTask ID
     """
-    def run_task():
-        # Create a new event loop for this thread
-        new_loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(new_loop)
-        try:
-            new_loop.run_until_complete(process_upload_task(task_id))
-        except Exception as e:
-            logger.error(f"Error in background task for task {task_id}: {e}", exc_info=True)
-        finally:
-            new_loop.close()
+    upload_task_runner.submit(task_id, lambda: process_upload_task(task_id))
+
+
+def is_upload_task_active(task_id: int) -> bool:
+    """Whether an upload task is queued or running on the background runner of this process."""
+    return upload_task_runner.is_active(task_id)
+
+
+def stale_task_filter() -> Q:
+    """
+    Tasks no live process holds: failed, or pending/processing without a heartbeat in the
+    last UPLOAD_TASK_STALE_AFTER seconds. Only these may be reset to 'pending' and started,
+    with a conditional UPDATE including this filter so that one caller wins.
+    """
+    cutoff = timezone.now() - timedelta(seconds=settings.UPLOAD_TASK_STALE_AFTER)
+    return Q(status='failed') | (
+        Q(status__in=['pending', 'processing']) & (Q(heartbeat_at__isnull=True) | Q(heartbeat_at__lt=cutoff))
+    )
+
+
+async def requeue_pending_upload_tasks() -> List[int]:
+    """
+    Re-queue upload tasks left 'pending' or 'processing' by a process that is gone.
+    
+    Tasks a live process still holds (see stale_task_filter) are left alone. Each task is
+    claimed with a conditional UPDATE, so concurrent sweeps re-queue it once. Tasks whose
+    uploaded file no longer exists are marked as failed instead. Purge tasks have no file;
+    they are idempotent and simply run again.
     
-    thread = threading.Thread(target=run_task, daemon=True, name=f"UploadTask-{task_id}")
-    thread.start()
+    Returns:
+        List of re-queued task IDs
+    """
+    requeued = []
+    stale_tasks = UploadTask.objects.filter(stale_task_filter(), status__in=['pending', 'processing'])
+    async for task in stale_tasks.order_by('created_at'):
+        claim = UploadTask.objects.filter(stale_task_filter(), id=task.id, status=task.status)
+        now = timezone.now()
+        if task.file_type != 'purge' and (not task.file_path or not Path(task.file_path).exists()):
+            failed = await claim.aupdate(
+                status='failed',
+                error_message='Upload file is no longer available after server restart',
+                completed_at=now,
+                updated_at=now
+            )
+            if failed:
+                await update_dataset_status(task.dataset_id)
+                logger.warning(f"Upload task {task.id} could not be re-queued: file {task.file_path} is missing")
+            continue
+        
+        fields = {'status': 'pending', 'updated_at': now}
+        if task.status == 'processing' and not (task.checkpoint or {}).get('row'):
+            # Interrupted mid-run: it continues from its checkpoint (see resume_from_checkpoint);
+            # without one the file is processed again from the first row. Nodes are MERGEd;
+            # relationships already written make the write strategy fall back to MERGE.
+            fields.update(processed_rows=0, progress_percentage=0.0)
+        if not await claim.aupdate(**fields):
+            continue  # Claimed by another sweep or a resume request in the meantime
+        
+        start_upload_task(task.id)
+        requeued.append(task.id)
+    
+    if requeued:
+        logger.info(f"Re-queued {len(requeued)} upload task(s): {requeued}")
+    return requeued
 
+
+def schedule_upload_task_requeue() -> None:
+    """Run requeue_pending_upload_tasks on the background runner (non-blocking)."""
+    upload_task_runner.submit('requeue', requeue_pending_upload_tasks)
+
+
+# Single background loop shared by all upload tasks, so the Neo4j driver bound to it is reused
+upload_task_runner = create_runner(
+    'UploadTaskRunner',
+    settings.UPLOAD_TASK_CONCURRENCY,
+    shutdown_timeout=settings.UPLOAD_TASK_SHUTDOWN_TIMEOUT
+)
@@ -1,3 +1,78 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.test import SimpleTestCase, override_settings
+
+from datasets import exports
+from datasets.exports import ExportFile, iter_csv, iter_records
+
+
+def _comparable(a, b) -> bool:
+    """Cypher compares numbers with numbers and strings with strings; anything else is null."""
+    number = (int, float)
+    return (isinstance(a, number) and isinstance(b, number)) or (isinstance(a, str) and isinstance(b, str))
+
+
+class FakeGraph:
+    """Answers the export page queries over in-memory nodes with Cypher comparison semantics."""
+
+    def __init__(self, ids, edges=None):
+        self.ids = ids
+        self.edges = edges or {}  # source id -> list of target ids
+        self.queries = 0
+
+    async def stream_query(self, query, parameters, fetch_size=1000):
+        self.queries += 1
+        bound = parameters['last_id']
+        inclusive = 'a.id >= $last_id' in query
+        page = sorted(
+            node_id for node_id in self.ids
+            if _comparable(node_id, bound) and (node_id >= bound if inclusive else node_id > bound)
+        )[:parameters['page_size']]
+        for node_id in page:
+            if 'OPTIONAL MATCH' not in query:
+                yield {'key': node_id, 'props': {'id': node_id}}
+                continue
+            targets = self.edges.get(node_id)
+            if not targets:
+                yield {'key': node_id, 'props': None, 'target_id': None}
+            for target in targets or []:
+                yield {'key': node_id, 'props': {}, 'target_id': target}
+
+
+@override_settings(EXPORT_PAGE_SIZE=2, EXPORT_CHUNK_SIZE=1)
+class KeysetExportTests(SimpleTestCase):
+
+    def _records(self, graph, export):
+        with mock.patch.object(exports.neo4j_client, 'stream_query', graph.stream_query):
+            return list(iter_records(export))
+
+    def test_mixed_integer_and_string_ids_are_all_exported(self):
+        ids = [3, 'b', 1, 'a', 2.5, 10, 'c', 2]
+        graph = FakeGraph(ids)
+        export = ExportFile('Person.csv', 'node', 'Person', 1, ['id'])
+
+        keys = [record['key'] for record in self._records(graph, export)]
+
+        self.assertEqual(keys, [1, 2, 2.5, 3, 10, 'a', 'b', 'c'])
+
+    def test_single_type_ids_are_paged_without_duplicates(self):
+        graph = FakeGraph(list(range(7)))
+        export = ExportFile('Person.csv', 'node', 'Person', 1, ['id'])
+
+        keys = [record['key'] for record in self._records(graph, export)]
+
+        self.assertEqual(keys, list(range(7)))
+
+    def test_relationships_of_mixed_type_sources(self):
+        graph = FakeGraph([1, 'x', 2, 'y'], edges={1: [2], 'x': ['y', 1], 'y': [2]})
+        export = ExportFile(
+            'KNOWS.csv', 'relationship', 'KNOWS', 1, [], source_label='Person', target_label='Person'
+        )
+
+        with mock.patch.object(exports.neo4j_client, 'stream_query', graph.stream_query):
+            text = ''.join(iter_csv(export))
+
+        self.assertEqual(
+            text.splitlines(),
+            ['Person:source_id,Person:target_id', '1,2', 'x,y', 'x,1', 'y,2']
+        )
@@ -19,5 +19,6 @@ urlpatterns = [
     
     # Task endpoints
     path('tasks/<int:pk>/', views.TaskStatusView.as_view(), name='task-status'),
+    path('tasks/<int:pk>/resume/', views.TaskResumeView.as_view(), name='task-resume'),
 ]
 
@@ -1,17 +1,14 @@
-"""Dataset API: create, list, detail, upload nodes/relationships, node sample, download, delete, task status."""
-import zipfile
+"""Dataset API: create, list, detail, upload nodes/relationships, node sample, download, delete, task status and resume."""
 import tempfile
 import logging
-import csv
-import io
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.parsers import MultiPartParser, FormParser
-from asgiref.sync import async_to_sync
 
 from datasets.models import Dataset, UploadTask
 from datasets.serializers import (
@@ -22,18 +19,29 @@ from datasets.serializers import (
     NodeUploadSerializer,
     RelationshipUploadSerializer,
 )
-from datasets.tasks import start_upload_task
-from core.neo4j_client import neo4j_client
-from core.csv_processor import detect_file_type, parse_relationship_header
+from datasets.tasks import start_upload_task, is_upload_task_active, stale_task_filter
+from datasets.exports import build_exports, iter_csv_bytes, iter_zip
+from datasets.rejects import rejects_path
+from core.chunked_delete import quote_name
+from core.neo4j_client import neo4j_client, UPLOAD_GENERATION_PROPERTY
+from core.task_runner import run_sync
+from core.csv_processor import detect_file_type_from_header, parse_relationship_header, sniff_csv_header
 
 logger = logging.getLogger(__name__)
 
+MAX_HEADER_BYTES = 1024 * 1024  # Stop buffering the header after 1 MB without a newline
 
-def _escape_node_label(lbl: str) -> str:
-    if not lbl:
-        return lbl
-    safe = lbl.replace('_', '').replace('-', '').replace(' ', '')
-    return f"`{lbl}`" if not safe.isalnum() else lbl
+
+def _save_upload(file) -> Tuple[str, Optional[List[str]]]:
+    """Write an uploaded file to a temp CSV, sniffing its header from the chunks as they are written."""
+    head = b''
+    with tempfile.NamedTemporaryFile(mode='wb+', delete=False, suffix='.csv') as temp_file:
+        for chunk in file.chunks():
+            if b'\n' not in head and len(head) < MAX_HEADER_BYTES:
+                head += chunk
+            temp_file.write(chunk)
+        temp_file_path = temp_file.name
+    return temp_file_path, sniff_csv_header(head)
 
 
 async def fetch_dataset_summary(dataset: Dataset) -> Dict[str, Any]:
@@ -48,7 +56,7 @@ async def fetch_dataset_summary(dataset: Dataset) -> Dict[str, Any]:
 
     node_counts = {}
     for label in node_labels:
-        label_escaped = _escape_node_label(label)
+        label_escaped = quote_name(label)
         try:
             query = f"MATCH (n:{label_escaped}) WHERE n.dataset_id = $dataset_id RETURN count(n) as count"
             result = await neo4j_client.execute_query(query, {'dataset_id': dataset.id})
@@ -65,7 +73,7 @@ async def fetch_dataset_summary(dataset: Dataset) -> Dict[str, Any]:
     rel_counts = {}
     for rel_type in rel_types:
         try:
-            rel_escaped = f"`{rel_type}`" if not rel_type.replace('_', '').isalnum() else rel_type
+            rel_escaped = quote_name(rel_type)
             query = f"MATCH ()-[r:{rel_escaped}]->() WHERE r.dataset_id = $dataset_id RETURN count(r) as count"
             result = await neo4j_client.execute_query(query, {'dataset_id': dataset.id})
             count = result[0]['count'] if result and len(result) > 0 else 0
@@ -79,7 +87,7 @@ async def fetch_dataset_summary(dataset: Dataset) -> Dict[str, Any]:
 
     total_nodes = sum(node_counts.values())
     total_relationships = sum(rel_counts.values())
-    tasks = list(dataset.upload_tasks.all()) if hasattr(dataset, 'upload_tasks') else []
+    tasks = [t for t in dataset.upload_tasks.all() if t.file_type != 'purge'] if hasattr(dataset, 'upload_tasks') else []
     success_files = sum(1 for t in tasks if t.status == 'completed')
     failed_files = sum(1 for t in tasks if t.status == 'failed')
 
@@ -139,6 +147,12 @@ class NodeUploadView(APIView):
                 status=status.HTTP_404_NOT_FOUND
             )
         
+        if dataset.status == 'deleting':
+            return Response(
+                {'error': 'Dataset is being deleted'},
+                status=status.HTTP_409_CONFLICT
+            )
+        
         serializer = NodeUploadSerializer(data=request.data)
         
         if not serializer.is_valid():
@@ -154,12 +168,9 @@ class NodeUploadView(APIView):
                 file_result = {'file_name': file_name, 'status': 'pending'}
                 
                 try:
-                    with tempfile.NamedTemporaryFile(mode='wb+', delete=False, suffix='.csv') as temp_file:
-                        for chunk in file.chunks():
-                            temp_file.write(chunk)
-                        temp_file_path = temp_file.name
+                    temp_file_path, header = _save_upload(file)
 
-                    file_type = detect_file_type(temp_file_path)
+                    file_type = detect_file_type_from_header(header)
                     if file_type != 'node':
                         Path(temp_file_path).unlink(missing_ok=True)
                         file_results.append({'file_name': file_name, 'status': 'failed', 'error': 'File is not a node file. Expected node file with "id" column.'})
@@ -226,6 +237,12 @@ class RelationshipUploadView(APIView):
                 status=status.HTTP_404_NOT_FOUND
             )
         
+        if dataset.status == 'deleting':
+            return Response(
+                {'error': 'Dataset is being deleted'},
+                status=status.HTTP_409_CONFLICT
+            )
+        
         serializer = RelationshipUploadSerializer(data=request.data)
         
         if not serializer.is_valid():
@@ -240,18 +257,11 @@ class RelationshipUploadView(APIView):
                 file_name = file.name
                 
                 try:
-                    with tempfile.NamedTemporaryFile(mode='wb+', delete=False, suffix='.csv') as temp_file:
-                        for chunk in file.chunks():
-                            temp_file.write(chunk)
-                        temp_file_path = temp_file.name
-
-                    with open(temp_file_path, 'r', encoding='utf-8') as f:
-                        reader = csv.reader(f)
-                        header = next(reader, None)
-                        if not header:
-                            Path(temp_file_path).unlink(missing_ok=True)
-                            file_results.append({'file_name': file_name, 'status': 'failed', 'error': 'File is empty or missing header row.'})
-                            continue
+                    temp_file_path, header = _save_upload(file)
+                    if not header:
+                        Path(temp_file_path).unlink(missing_ok=True)
+                        file_results.append({'file_name': file_name, 'status': 'failed', 'error': 'File is empty or missing header row.'})
+                        continue
 
                     source_label, target_label, source_col, target_col, errors = parse_relationship_header(header)
                     if errors:
@@ -327,7 +337,7 @@ class DatasetDetailView(APIView):
             data = dict(serializer.data)
             include_metadata = request.query_params.get('include_metadata', 'false').strip().lower() == 'true'
             if include_metadata:
-                summary_data = async_to_sync(fetch_dataset_summary)(dataset)
+                summary_data = run_sync(fetch_dataset_summary, dataset)
                 data['summary'] = summary_data['summary']
                 data['node_summary'] = summary_data['node_summary']
                 data['relationship_summary'] = summary_data['relationship_summary']
@@ -377,7 +387,7 @@ class DatasetDetailView(APIView):
 
 
 def _node_record_to_row(record_n):
-    """Flatten Neo4j node to dict; drop dataset_id."""
+    """Flatten Neo4j node to dict; drop dataset_id and the sync generation stamp."""
     if record_n is None:
         return None
     if isinstance(record_n, dict):
@@ -392,6 +402,7 @@ def _node_record_to_row(record_n):
             except (TypeError, ValueError):
                 row = {}
     row.pop('dataset_id', None)
+    row.pop(UPLOAD_GENERATION_PROPERTY, None)
     return row
 
 
@@ -407,7 +418,7 @@ class DatasetNodeSampleView(APIView):
                 status=status.HTTP_404_NOT_FOUND
             )
         limit = min(int(request.query_params.get('limit', 5)), 20)
-        label_escaped = _escape_node_label(node_label)
+        label_escaped = quote_name(node_label)
 
         async def run():
             query = f"MATCH (n:{label_escaped}) WHERE n.dataset_id = $dataset_id RETURN n LIMIT {limit}"
@@ -427,7 +438,7 @@ class DatasetNodeSampleView(APIView):
             return {'columns': sorted(columns_set), 'rows': rows}
 
         try:
-            out = async_to_sync(run)()
+            out = run_sync(run)
             return Response(out)
         except Exception as e:
             logger.exception("Node sample failed for label %s: %s", node_label, e)
@@ -455,113 +466,46 @@ class DatasetDownloadView(APIView):
         relationship_type = request.query_params.get('relationship_type', None)
         as_zip = request.query_params.get('as_zip', 'false').lower() == 'true'
         
-        # Async function to generate CSV from Neo4j
-        async def generate_csv_from_neo4j():
-            files_to_download = []
-            
-            # Get tasks to determine what to download
-            tasks = list(dataset.upload_tasks.all())
-            
-            if node_label:
-                # Download specific node label
-                tasks = [t for t in tasks if t.file_type == 'node' and t.node_label == node_label]
-                if not tasks:
-                    return None, {'error': f'No node file found for label: {node_label}'}
-                
-                task = tasks[0]
-                # Query nodes from Neo4j
-                query = f"MATCH (n:{node_label}) WHERE n.dataset_id = $dataset_id RETURN n"
-                results = await neo4j_client.execute_query(query, {'dataset_id': dataset.id})
-                
-                if not results:
-                    return None, {'error': f'No nodes found for label: {node_label}'}
-                
-                # Generate CSV
-                csv_data = self._generate_node_csv(results, node_label)
-                files_to_download.append((f'{node_label}.csv', csv_data))
-                
-            elif relationship_type:
-                # Download specific relationship type
-                tasks = [t for t in tasks if t.file_type == 'relationship' and t.relationship_type == relationship_type]
-                if not tasks:
-                    return None, {'error': f'No relationship file found for type: {relationship_type}'}
-                
-                task = tasks[0]
-                # Query relationships from Neo4j
-                rel_type_escaped = f"`{relationship_type}`" if not relationship_type.replace('_', '').isalnum() else relationship_type
-                query = f"MATCH (a)-[r:{rel_type_escaped}]->(b) WHERE r.dataset_id = $dataset_id RETURN a, r, b, labels(a) as source_labels, labels(b) as target_labels"
-                results = await neo4j_client.execute_query(query, {'dataset_id': dataset.id})
-                
-                if not results:
-                    return None, {'error': f'No relationships found for type: {relationship_type}'}
-                
-                # Generate CSV with Label:source_id format
-                csv_data = self._generate_relationship_csv(results, task.source_label, task.target_label, relationship_type)
-                files_to_download.append((f'{relationship_type}.csv', csv_data))
-                
-            elif file_type == 'node':
-                # Download all node files
-                node_tasks = [t for t in tasks if t.file_type == 'node']
-                for task in node_tasks:
-                    if not task.node_label:
-                        continue
-                    query = f"MATCH (n:{task.node_label}) WHERE n.dataset_id = $dataset_id RETURN n"
-                    results = await neo4j_client.execute_query(query, {'dataset_id': dataset.id})
-                    if results:
-                        csv_data = self._generate_node_csv(results, task.node_label)
-                        files_to_download.append((f'{task.node_label}.csv', csv_data))
-                        
-            elif file_type == 'relationship':
-                # Download all relationship files
-                rel_tasks = [t for t in tasks if t.file_type == 'relationship']
-                for task in rel_tasks:
-                    if not task.relationship_type:
-                        continue
-                    rel_type_escaped = f"`{task.relationship_type}`" if not task.relationship_type.replace('_', '').isalnum() else task.relationship_type
-                    query = f"MATCH (a)-[r:{rel_type_escaped}]->(b) WHERE r.dataset_id = $dataset_id RETURN a, r, b, labels(a) as source_labels, labels(b) as target_labels"
-                    results = await neo4j_client.execute_query(query, {'dataset_id': dataset.id})
-                    if results:
-                        csv_data = self._generate_relationship_csv(results, task.source_label, task.target_label, task.relationship_type)
-                        files_to_download.append((f'{task.relationship_type}.csv', csv_data))
-            else:
-                node_tasks = [t for t in tasks if t.file_type == 'node']
-                for task in node_tasks:
-                    if not task.node_label:
-                        continue
-                    query = f"MATCH (n:{task.node_label}) WHERE n.dataset_id = $dataset_id RETURN n"
-                    results = await neo4j_client.execute_query(query, {'dataset_id': dataset.id})
-                    if results:
-                        csv_data = self._generate_node_csv(results, task.node_label)
-                        files_to_download.append((f'{task.node_label}.csv', csv_data))
-                rel_tasks = [t for t in tasks if t.file_type == 'relationship']
-                for task in rel_tasks:
-                    if not task.relationship_type:
-                        continue
-                    rel_type_escaped = f"`{task.relationship_type}`" if not task.relationship_type.replace('_', '').isalnum() else task.relationship_type
-                    query = f"MATCH (a)-[r:{rel_type_escaped}]->(b) WHERE r.dataset_id = $dataset_id RETURN a, r, b, labels(a) as source_labels, labels(b) as target_labels"
-                    results = await neo4j_client.execute_query(query, {'dataset_id': dataset.id})
-                    if results:
-                        csv_data = self._generate_relationship_csv(results, task.source_label, task.target_label, task.relationship_type)
-                        files_to_download.append((f'{task.relationship_type}.csv', csv_data))
-            
-            if not files_to_download:
-                return None, {'error': 'No data found to download'}
-            
-            return files_to_download, None
-
+        # Determine which labels/types to export from the upload tasks
+        tasks = list(dataset.upload_tasks.all())
+        node_tasks = [t for t in tasks if t.file_type == 'node' and t.node_label]
+        rel_tasks = [t for t in tasks if t.file_type == 'relationship' and t.relationship_type]
+        if node_label:
+            node_tasks = [t for t in node_tasks if t.node_label == node_label]
+            if not node_tasks:
+                return Response({'error': f'No node file found for label: {node_label}'}, status=status.HTTP_404_NOT_FOUND)
+            rel_tasks = []
+        elif relationship_type:
+            rel_tasks = [t for t in rel_tasks if t.relationship_type == relationship_type]
+            if not rel_tasks:
+                return Response({'error': f'No relationship file found for type: {relationship_type}'}, status=status.HTTP_404_NOT_FOUND)
+            node_tasks = []
+        elif file_type == 'node':
+            rel_tasks = []
+        elif file_type == 'relationship':
+            node_tasks = []
+        
+        node_labels = list(dict.fromkeys(t.node_label for t in node_tasks))
+        rel_specs = list({
+            t.relationship_type: (t.relationship_type, t.source_label, t.target_label) for t in rel_tasks
+        }.values())
+        
         try:
-            files_to_download, error = async_to_sync(generate_csv_from_neo4j)()
-            if error:
-                return Response(error, status=status.HTTP_404_NOT_FOUND)
-            if len(files_to_download) == 1 and not as_zip:
-                filename, csv_data = files_to_download[0]
-                response = StreamingHttpResponse(csv_data, content_type='text/csv')
-                response['Content-Disposition'] = f'attachment; filename="{filename}"'
+            exports = run_sync(build_exports, dataset.id, node_labels, rel_specs)
+            if not exports:
+                if node_label:
+                    error = f'No nodes found for label: {node_label}'
+                elif relationship_type:
+                    error = f'No relationships found for type: {relationship_type}'
+                else:
+                    error = 'No data found to download'
+                return Response({'error': error}, status=status.HTTP_404_NOT_FOUND)
+            
+            # Rows are read from Neo4j page by page while the response is being sent
+            if len(exports) == 1 and not as_zip:
+                response = StreamingHttpResponse(iter_csv_bytes(exports[0]), content_type='text/csv')
+                response['Content-Disposition'] = f'attachment; filename="{exports[0].filename}"'
                 return response
-            temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.zip')
-            with zipfile.ZipFile(temp_file.name, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-                for filename, csv_data in files_to_download:
-                    zip_file.writestr(filename, csv_data.getvalue() if hasattr(csv_data, 'getvalue') else csv_data)
             if node_label:
                 zip_filename = f'{dataset.name}_{node_label}.zip'
             elif relationship_type:
@@ -571,12 +515,7 @@ class DatasetDownloadView(APIView):
             else:
                 zip_filename = f'{dataset.name}_dataset.zip'
             
-            zip_path = Path(temp_file.name)
-            response = FileResponse(
-                open(zip_path, 'rb'),
-                as_attachment=True,
-                filename=zip_filename
-            )
+            response = StreamingHttpResponse(iter_zip(exports), content_type='application/zip')
             response['Content-Disposition'] = f'attachment; filename="{zip_filename}"'
             return response
         
@@ -586,86 +525,44 @@ class DatasetDownloadView(APIView):
                 {'error': str(e)},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
-    
-    def _generate_node_csv(self, results, label):
-        """Stream CSV from node results."""
-        if not results:
-            return io.StringIO()
-        
-        # Get all property keys from first node
-        first_node = results[0].get('n', {})
-        if isinstance(first_node, dict):
-            # Extract properties from node dict
-            properties = {k: v for k, v in first_node.items() if k != 'dataset_id'}
-        else:
-            properties = {}
-        
-        # Create CSV
-        output = io.StringIO()
-        writer = csv.DictWriter(output, fieldnames=['id'] + list(properties.keys()))
-        writer.writeheader()
-        
-        for record in results:
-            node = record.get('n', {})
-            if isinstance(node, dict):
-                row = {k: v for k, v in node.items() if k != 'dataset_id'}
-                writer.writerow(row)
-        
-        output.seek(0)
-        return output
-    
-    def _generate_relationship_csv(self, results, source_label, target_label, relationship_type):
-        """Stream CSV with Label:source_id, Label:target_id header."""
-        if not results:
-            return io.StringIO()
-        
-        # Get property keys from first relationship
-        first_rel = results[0].get('r', {})
-        rel_properties = {}
-        if isinstance(first_rel, dict):
-            rel_properties = {k: v for k, v in first_rel.items() if k not in ['dataset_id']}
-        
-        # Create CSV with Label:source_id format
-        output = io.StringIO()
-        fieldnames = [f'{source_label}:source_id', f'{target_label}:target_id'] + list(rel_properties.keys())
-        writer = csv.DictWriter(output, fieldnames=fieldnames)
-        writer.writeheader()
-        
-        for record in results:
-            source_node = record.get('a', {})
-            target_node = record.get('b', {})
-            rel = record.get('r', {})
-            
-            row = {}
-            if isinstance(source_node, dict):
-                row[f'{source_label}:source_id'] = source_node.get('id', '')
-            if isinstance(target_node, dict):
-                row[f'{target_label}:target_id'] = target_node.get('id', '')
-            if isinstance(rel, dict):
-                for key, value in rel.items():
-                    if key not in ['dataset_id']:
-                        row[key] = value
-            
-            writer.writerow(row)
-        
-        output.seek(0)
-        return output
 
 
 class DatasetDeleteView(APIView):
-    """DELETE dataset (cascade deletes tasks)."""
+    """DELETE dataset: queue a purge task removing its graph data, then the dataset and its tasks."""
 
     def delete(self, request, pk):
         try:
             dataset = Dataset.objects.get(pk=pk)
             
-            # Delete dataset (cascade will delete tasks)
-            # Note: No need to delete uploads folder as we're using temp files now
-            dataset.delete()
+            if dataset.upload_tasks.filter(status__in=['pending', 'processing']).exclude(file_type='purge').exists():
+                return Response(
+                    {'error': 'Dataset has uploads in progress; wait for them to finish before deleting it'},
+                    status=status.HTTP_409_CONFLICT
+                )
+            
+            task = dataset.upload_tasks.filter(file_type='purge').first()
+            if task is None:
+                task = UploadTask.objects.create(
+                    dataset=dataset,
+                    file_name=dataset.name,
+                    file_type='purge',
+                    file_path='',
+                    status='pending'
+                )
+                dataset.status = 'deleting'
+                dataset.save(update_fields=['status', 'updated_at'])
+            elif not is_upload_task_active(task.id):
+                # An earlier purge failed or was interrupted: it continues where it stopped.
+                # A purge another process is still running is left to it.
+                UploadTask.objects.filter(stale_task_filter(), id=task.id).update(
+                    status='pending', error_message=None, completed_at=None, updated_at=timezone.now()
+                )
+            
+            start_upload_task(task.id)
             
             return Response(
-                {'message': 'Dataset deleted successfully'},
-                status=status.HTTP_204_NO_CONTENT
+                {'message': 'Dataset deletion started', 'task_id': task.id},
+                status=status.HTTP_202_ACCEPTED
             )
         
         except Dataset.DoesNotExist:
@@ -681,15 +578,63 @@ class DatasetDeleteView(APIView):
 
 
 class TaskStatusView(APIView):
-    """GET upload task status by ID."""
+    """GET upload task status by ID; ?download=rejects returns the rows Neo4j rejected as CSV."""
 
     def get(self, request, pk):
         try:
             task = UploadTask.objects.get(pk=pk)
-            serializer = UploadTaskSerializer(task)
-            return Response(serializer.data)
         except UploadTask.DoesNotExist:
             return Response(
                 {'error': 'Task not found'},
                 status=status.HTTP_404_NOT_FOUND
             )
+        if request.query_params.get('download') == 'rejects':
+            path = rejects_path(task.id)
+            if not path.exists():
+                return Response(
+                    {'error': 'Task has no rejected rows'},
+                    status=status.HTTP_404_NOT_FOUND
+                )
+            return FileResponse(
+                open(path, 'rb'),
+                as_attachment=True,
+                filename=f'{Path(task.file_name).stem}_rejects.csv',
+                content_type='text/csv'
+            )
+        serializer = UploadTaskSerializer(task)
+        return Response(serializer.data)
+
+
+class TaskResumeView(APIView):
+    """POST: re-queue a failed or interrupted upload task; it continues from its checkpoint."""
+
+    def post(self, request, pk):
+        try:
+            task = UploadTask.objects.get(pk=pk)
+        except UploadTask.DoesNotExist:
+            return Response(
+                {'error': 'Task not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        if task.status not in ('failed', 'processing') or is_upload_task_active(task.id):
+            return Response(
+                {'error': f'Task is {task.status} and cannot be resumed'},
+                status=status.HTTP_409_CONFLICT
+            )
+        if task.file_type != 'purge' and (not task.file_path or not Path(task.file_path).exists()):
+            return Response(
+                {'error': 'Upload file is no longer available; upload the file again'},
+                status=status.HTTP_409_CONFLICT
+            )
+        # Only claimed if no other process is running it (or another request resumed it first)
+        claimed = UploadTask.objects.filter(
+            stale_task_filter(), id=task.id, status__in=['failed', 'processing']
+        ).update(status='pending', error_message=None, completed_at=None, updated_at=timezone.now())
+        if not claimed:
+            return Response(
+                {'error': 'Task is still being processed and cannot be resumed'},
+                status=status.HTTP_409_CONFLICT
+            )
+        task.refresh_from_db()
+        start_upload_task(task.id)
+        return Response(UploadTaskSerializer(task).data, status=status.HTTP_202_ACCEPTED)
@@ -0,0 +1,185 @@
+"""
+Server-side cursors for paging through Cypher query results.
+
+A cursor wraps the async record stream of one query execution. Pages are pulled from
+Neo4j only when requested, and a bounded window of recent rows is kept so that pages
+can be re-read (e.g. when the results table goes back a page) without re-running the
+query. Cursors live in memory on the shared Neo4j request loop (see
+core.task_runner.run_sync), expire after being idle, and the least recently used
+cursor is closed when too many are open.
+"""
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Dict, List, Optional
+from django.conf import settings
+
+from core.neo4j_client import neo4j_client
+from core.query_cache import query_cache
+
+logger = logging.getLogger(__name__)
+
+
+class CursorExpired(Exception):
+    """The cursor is unknown, expired, or the requested page left the buffered window."""
+    pass
+
+
+class QueryCursor:
+    """Lazily consumed result stream with a sliding window of buffered rows."""
+
+    def __init__(
+        self,
+        stream: AsyncIterator[Dict[str, Any]],
+        page_size: int,
+        execution_id: Optional[int] = None,
+        max_buffered_rows: int = 10000,
+        query: Optional[str] = None
+    ):
+        self.id = uuid.uuid4().hex
+        # A writing query commits when its result is consumed or closed: the query cache
+        # is invalidated then (see _finished)
+        self.query = query
+        self.execution_id = execution_id
+        self.page_size = page_size
+        self.max_buffered_rows = max(max_buffered_rows, page_size + 1)
+        self.rows_fetched = 0
+        self.exhausted = False
+        self.last_access = time.monotonic()
+        self._stream = stream
+        self._buffer: List[Dict[str, Any]] = []
+        self._buffer_start = 0  # Absolute row index of self._buffer[0]
+        self._lock = asyncio.Lock()
+
+    async def _pull(self, until_row: int) -> None:
+        """Read from the stream until until_row rows were fetched or it is exhausted."""
+        while not self.exhausted and self.rows_fetched < until_row:
+            try:
+                row = await self._stream.__anext__()
+            except StopAsyncIteration:
+                self.exhausted = True
+                self._finished()
+                break
+            self._buffer.append(row)
+            self.rows_fetched += 1
+
+        overflow = len(self._buffer) - self.max_buffered_rows
+        if overflow > 0:
+            del self._buffer[:overflow]
+            self._buffer_start += overflow
+
+    async def page(self, page: int) -> Dict[str, Any]:
+        """
+        Return one page of results.
+
+        Args:
+            page: Zero-based page number
+
+        Returns:
+            Dictionary with rows, page metadata and whether more rows may follow
+
+        Raises:
+            CursorExpired: If the page is older than the buffered window
+        """
+        async with self._lock:
+            self.last_access = time.monotonic()
+            start = page * self.page_size
+            end = start + self.page_size
+            if start < self._buffer_start:
+                raise CursorExpired(
+                    f"Page {page} is no longer buffered (oldest available page is "
+                    f"{-(-self._buffer_start // self.page_size)}); re-run the query"
+                )
+            # Fetch one row past the page so has_more is exact
+            await self._pull(end + 1)
+            rows = self._buffer[start - self._buffer_start:end - self._buffer_start]
+            return {
+                'cursor_id': self.id,
+                'page': page,
+                'page_size': self.page_size,
+                'rows': rows,
+                'rows_fetched': self.rows_fetched,
+                'has_more': not self.exhausted or self.rows_fetched > end,
+            }
+
+    def _finished(self) -> None:
+        if self.query is not None:
+            query_cache.invalidate_after_write(self.query)
+            self.query = None
+
+    async def close(self) -> None:
+        """Release the underlying session."""
+        self.exhausted = True
+        self._buffer = []
+        try:
+            await self._stream.aclose()
+        except Exception as e:
+            logger.warning(f"Error closing query cursor {self.id}: {e}")
+        self._finished()
+
+
+class CursorStore:
+    """Open cursors keyed by id, with idle expiry and an LRU cap. Used on a single event loop."""
+
+    def __init__(self, max_open: int, ttl: float):
+        self.max_open = max_open
+        self.ttl = ttl
+        self._cursors: "OrderedDict[str, QueryCursor]" = OrderedDict()
+
+    async def _expire(self) -> None:
+        now = time.monotonic()
+        expired = [cursor for cursor in self._cursors.values() if now - cursor.last_access > self.ttl]
+        for cursor in expired:
+            self._cursors.pop(cursor.id, None)
+            await cursor.close()
+        while len(self._cursors) >= self.max_open:
+            _, cursor = self._cursors.popitem(last=False)
+            logger.info(f"Closing least recently used query cursor {cursor.id}")
+            await cursor.close()
+
+    async def open(
+        self,
+        query: str,
+        parameters: Optional[Dict[str, Any]],
+        page_size: int,
+        execution_id: Optional[int] = None
+    ) -> QueryCursor:
+        """Start streaming a query and register a cursor for it."""
+        await self._expire()
+        cursor = QueryCursor(
+            neo4j_client.stream_query(query, parameters, fetch_size=max(page_size, 100)),
+            page_size,
+            execution_id=execution_id,
+            max_buffered_rows=settings.QUERY_CURSOR_MAX_BUFFERED_ROWS,
+            query=query
+        )
+        self._cursors[cursor.id] = cursor
+        return cursor
+
+    async def page(self, cursor_id: str, page: int) -> Dict[str, Any]:
+        """Return a page from an open cursor (raises CursorExpired if it is gone)."""
+        await self._expire()
+        cursor = self._cursors.get(cursor_id)
+        if cursor is None:
+            raise CursorExpired(f"Cursor {cursor_id} does not exist or has expired; re-run the query")
+        self._cursors.move_to_end(cursor_id)
+        return await cursor.page(page)
+
+    def get(self, cursor_id: str) -> Optional[QueryCursor]:
+        return self._cursors.get(cursor_id)
+
+    async def close(self, cursor_id: str) -> bool:
+        """Close a cursor. Returns False if it did not exist."""
+        cursor = self._cursors.pop(cursor_id, None)
+        if cursor is None:
+            return False
+        await cursor.close()
+        return True
+
+
+cursor_store = CursorStore(
+    max_open=settings.QUERY_MAX_OPEN_CURSORS,
+    ttl=settings.QUERY_CURSOR_TTL
+)
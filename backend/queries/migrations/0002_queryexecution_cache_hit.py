@@ -0,0 +1,18 @@
+# Generated by Django 5.2.10 on 2026-10-18 20:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('queries', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='queryexecution',
+            name='cache_hit',
+            field=models.BooleanField(default=False),
+        ),
+    ]
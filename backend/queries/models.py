@@ -95,6 +95,7 @@ class QueryExecution(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES)
     execution_time = models.FloatField(null=True, blank=True)  # in seconds
     rows_returned = models.IntegerField(null=True, blank=True)
+    cache_hit = models.BooleanField(default=False)  # Served from the query result cache
     
     # Error information
     error_message = models.TextField(blank=True, null=True)
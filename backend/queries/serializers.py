@@ -70,6 +70,7 @@ class QueryExecutionSerializer(serializers.ModelSerializer):
             'status',
             'execution_time',
             'rows_returned',
+            'cache_hit',
             'error_message',
             'executed_at',
         ]
@@ -86,6 +87,12 @@ class QueryExecuteSerializer(serializers.Serializer):
     parameters = serializers.DictField(required=False, default=dict)
     save_query = serializers.BooleanField(required=False, default=False)
     query_name = serializers.CharField(required=False, max_length=255)
+    mode = serializers.ChoiceField(
+        choices=['buffered', 'stream', 'cursor'],
+        required=False,
+        default='buffered'
+    )
+    page_size = serializers.IntegerField(required=False, default=100, min_value=1, max_value=5000)
     
     def validate(self, data):
         if not data.get('query') and not data.get('query_id'):
@@ -9,6 +9,7 @@ app_name = 'queries'
 urlpatterns = [
     # Query execution
     path('execute/', views.QueryExecuteView.as_view(), name='query-execute'),
+    path('cursors/<str:cursor_id>/', views.QueryCursorView.as_view(), name='query-cursor'),
     
     # Query management
     path('', views.QueryListView.as_view(), name='query-list'),
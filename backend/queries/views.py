@@ -1,10 +1,14 @@
 """Query API: execute, save, list, detail, history, schema."""
+import json
 import time
+from typing import Any, Dict, Optional
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
 from django.utils import timezone
 from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from asgiref.sync import async_to_sync
 
 from queries.models import SavedQuery, QueryExecution
 from queries.serializers import (
@@ -15,10 +19,34 @@ from queries.serializers import (
     QuerySaveSerializer,
 )
 from core.neo4j_client import neo4j_client
+from core.query_cache import query_cache
+from core.task_runner import run_sync
+from queries.cursors import cursor_store, CursorExpired
+
+
+class ResultJSONEncoder(DjangoJSONEncoder):
+    """JSON encoder for Neo4j result rows (temporal/spatial values fall back to str)."""
+
+    def default(self, o):
+        try:
+            return super().default(o)
+        except TypeError:
+            return str(o)
+
+
+def _ndjson_line(payload: Dict[str, Any]) -> bytes:
+    return (json.dumps(payload, cls=ResultJSONEncoder) + '\n').encode('utf-8')
 
 
 class QueryExecuteView(APIView):
-    """POST execute Cypher (query or query_id, parameters, optional save_query)."""
+    """
+    POST execute Cypher (query or query_id, parameters, optional save_query).
+
+    mode=buffered (default) returns up to QUERY_RESULT_MAX_ROWS rows in one JSON response
+    (read-only queries are served from the query result cache when possible),
+    mode=stream returns every row as NDJSON while it is read from Neo4j, and
+    mode=cursor returns the first page plus a cursor_id for QueryCursorView.
+    """
 
     def post(self, request):
         serializer = QueryExecuteSerializer(data=request.data)
@@ -31,6 +59,7 @@ class QueryExecuteView(APIView):
         query_id = data.get('query_id')
         parameters = data.get('parameters', {})
         save_query = data.get('save_query', False)
+        mode = data.get('mode', 'buffered')
         saved_query_obj = None
         if query_id:
             try:
@@ -47,16 +76,41 @@ class QueryExecuteView(APIView):
                 {'error': 'Query is required'},
                 status=status.HTTP_400_BAD_REQUEST
             )
+        
+        if mode == 'stream':
+            return self._stream(request, cypher_query, parameters, saved_query_obj, data)
+        if mode == 'cursor':
+            return self._open_cursor(request, cypher_query, parameters, saved_query_obj, data)
+        
         start_time = time.time()
         execution_status = 'success'
         error_message = None
         rows_returned = 0
         results = []
+        truncated = False
+        cache_hit = False
+        max_rows = settings.QUERY_RESULT_MAX_ROWS
         try:
             async def execute():
-                return await neo4j_client.execute_query(cypher_query, parameters)
+                # Pull incrementally and stop at the cap instead of buffering the whole result
+                rows = []
+                stream = neo4j_client.stream_query(cypher_query, parameters)
+                try:
+                    async for row in stream:
+                        if len(rows) >= max_rows:
+                            return rows, True
+                        rows.append(row)
+                finally:
+                    await stream.aclose()
+                return rows, False
             
-            results = async_to_sync(execute)()
+            cached = query_cache.get(cypher_query, parameters)
+            if cached is not None:
+                results, cache_hit = cached, True
+            else:
+                results, truncated = run_sync(execute)
+                if not truncated:
+                    query_cache.set(cypher_query, parameters, results)
             rows_returned = len(results)
             execution_status = 'success'
         
@@ -64,8 +118,39 @@ class QueryExecuteView(APIView):
             execution_status = 'error'
             error_message = str(e)
             results = []
+        # A writing query may have changed any dataset (also when it failed part-way)
+        query_cache.invalidate_after_write(cypher_query)
         
         execution_time = time.time() - start_time
+        execution = self._record_execution(
+            request, cypher_query, saved_query_obj, data,
+            execution_status, execution_time, rows_returned, error_message,
+            cache_hit=cache_hit
+        )
+        return Response({
+            'status': execution_status,
+            'execution_time': execution_time,
+            'rows_returned': rows_returned,
+            'results': results,
+            'truncated': truncated,
+            'cache_hit': cache_hit,
+            'error_message': error_message,
+            'execution_id': execution.id,
+        })
+
+    def _record_execution(
+        self,
+        request,
+        cypher_query: str,
+        saved_query_obj: Optional[SavedQuery],
+        data: Dict[str, Any],
+        execution_status: str,
+        execution_time: float,
+        rows_returned: int,
+        error_message: Optional[str],
+        cache_hit: bool = False
+    ) -> QueryExecution:
+        """Store the execution, update saved query statistics and optionally save the query."""
         execution = QueryExecution.objects.create(
             query=saved_query_obj,
             cypher_query=cypher_query,
@@ -73,6 +158,7 @@ class QueryExecuteView(APIView):
             status=execution_status,
             execution_time=execution_time,
             rows_returned=rows_returned if execution_status == 'success' else None,
+            cache_hit=cache_hit,
             error_message=error_message,
         )
         if saved_query_obj:
@@ -80,23 +166,148 @@ class QueryExecuteView(APIView):
             # Update execution record with query reference
             execution.query = saved_query_obj
             execution.save(update_fields=['query'])
-        if save_query and execution_status == 'success':
+        if data.get('save_query', False) and execution_status == 'success':
             query_name = data.get('query_name', f'Query {timezone.now().strftime("%Y-%m-%d %H:%M:%S")}')
             SavedQuery.objects.create(
                 name=query_name,
                 cypher_query=cypher_query,
                 created_by=request.user if request.user.is_authenticated else None,
             )
+        return execution
+
+    def _stream(self, request, cypher_query, parameters, saved_query_obj, data) -> StreamingHttpResponse:
+        """Stream rows as NDJSON: one {"type": "row"} line per record, then a summary line."""
+        chunk_size = settings.QUERY_STREAM_CHUNK_SIZE
+        stream = neo4j_client.stream_query(cypher_query, parameters, fetch_size=chunk_size)
+
+        async def next_chunk():
+            rows = []
+            while len(rows) < chunk_size:
+                try:
+                    rows.append(await stream.__anext__())
+                except StopAsyncIteration:
+                    return rows, True
+            return rows, False
+
+        def generate():
+            start_time = time.time()
+            rows_returned = 0
+            execution_status = 'success'
+            error_message = None
+            try:
+                done = False
+                while not done:
+                    rows, done = run_sync(next_chunk)
+                    rows_returned += len(rows)
+                    yield b''.join(_ndjson_line({'type': 'row', 'data': row}) for row in rows)
+            except Exception as e:
+                execution_status = 'error'
+                error_message = str(e)
+                yield _ndjson_line({'type': 'error', 'error_message': error_message})
+            finally:
+                # Also runs when the client disconnects mid-stream
+                run_sync(stream.aclose)
+                query_cache.invalidate_after_write(cypher_query)
+                execution_time = time.time() - start_time
+                execution = self._record_execution(
+                    request, cypher_query, saved_query_obj, data,
+                    execution_status, execution_time, rows_returned, error_message
+                )
+            yield _ndjson_line({
+                'type': 'summary',
+                'status': execution_status,
+                'execution_time': execution_time,
+                'rows_returned': rows_returned,
+                'error_message': error_message,
+                'execution_id': execution.id,
+            })
+
+        response = StreamingHttpResponse(generate(), content_type='application/x-ndjson')
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    def _open_cursor(self, request, cypher_query, parameters, saved_query_obj, data) -> Response:
+        """Open a server-side cursor and return its first page."""
+        page_size = data.get('page_size', 100)
+        start_time = time.time()
+
+        async def open_and_read():
+            cursor = await cursor_store.open(cypher_query, parameters, page_size)
+            try:
+                return cursor, await cursor.page(0)
+            except Exception:
+                await cursor_store.close(cursor.id)
+                raise
+
+        try:
+            cursor, first_page = run_sync(open_and_read)
+        except Exception as e:
+            execution_time = time.time() - start_time
+            execution = self._record_execution(
+                request, cypher_query, saved_query_obj, data, 'error', execution_time, 0, str(e)
+            )
+            return Response({
+                'status': 'error',
+                'execution_time': execution_time,
+                'rows_returned': 0,
+                'results': [],
+                'error_message': str(e),
+                'execution_id': execution.id,
+            })
+
+        execution_time = time.time() - start_time
+        execution = self._record_execution(
+            request, cypher_query, saved_query_obj, data,
+            'success', execution_time, first_page['rows_fetched'], None
+        )
+        cursor.execution_id = execution.id
         return Response({
-            'status': execution_status,
+            'status': 'success',
             'execution_time': execution_time,
-            'rows_returned': rows_returned,
-            'results': results,
-            'error_message': error_message,
+            'rows_returned': len(first_page['rows']),
+            'results': first_page['rows'],
+            'cursor_id': first_page['cursor_id'],
+            'page': 0,
+            'page_size': page_size,
+            'has_more': first_page['has_more'],
+            'error_message': None,
             'execution_id': execution.id,
         })
 
 
+class QueryCursorView(APIView):
+    """GET a page of an open query cursor (?page=N, zero-based); DELETE closes it."""
+
+    def get(self, request, cursor_id: str):
+        try:
+            page = max(int(request.query_params.get('page', 0)), 0)
+        except ValueError:
+            return Response({'error': 'page must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+
+        async def read_page():
+            result = await cursor_store.page(cursor_id, page)
+            cursor = cursor_store.get(cursor_id)
+            return result, cursor.execution_id if cursor else None
+
+        try:
+            result, execution_id = run_sync(read_page)
+        except CursorExpired as e:
+            return Response({'error': str(e)}, status=status.HTTP_410_GONE)
+        except Exception as e:
+            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        if execution_id:
+            # rows_returned reflects how many rows were actually read from Neo4j so far
+            QueryExecution.objects.filter(id=execution_id).update(rows_returned=result['rows_fetched'])
+        return Response(result)
+
+    def delete(self, request, cursor_id: str):
+        closed = run_sync(cursor_store.close, cursor_id)
+        if not closed:
+            return Response({'error': 'Cursor not found'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
 class QuerySaveView(APIView):
     """POST save a query (name, description, cypher_query, tags, is_favorite)."""
 
@@ -179,20 +390,14 @@ class SchemaView(APIView):
 
     def get(self, request):
         try:
+            schema_data = query_cache.get_value('schema')
+            if schema_data is not None:
+                return Response(schema_data)
+            
             async def get_schema():
-                schema = await neo4j_client.get_schema()
-                
-                # Get counts for each label
-                node_counts = {}
-                for label in schema['node_labels']:
-                    count = await neo4j_client.get_node_count(label)
-                    node_counts[label] = count
-                
-                # Get counts for each relationship type
-                rel_counts = {}
-                for rel_type in schema['relationship_types']:
-                    count = await neo4j_client.get_relationship_count(rel_type)
-                    rel_counts[rel_type] = count
+                schema = await neo4j_client.get_schema(include_counts=True)
+                node_counts = schema['node_counts']
+                rel_counts = schema['relationship_counts']
                 
                 return {
                     'node_labels': [
@@ -206,7 +411,8 @@ class SchemaView(APIView):
                     'relationship_types': [
                         {
                             'type': rel_type,
-                            'count': rel_counts.get(rel_type, 0)
+                            'count': rel_counts.get(rel_type, 0),
+                            'properties': schema['relationship_properties'].get(rel_type, [])
                         }
                         for rel_type in schema['relationship_types']
                     ],
@@ -214,7 +420,9 @@ class SchemaView(APIView):
                     'total_relationships': sum(rel_counts.values()),
                 }
             
-            schema_data = async_to_sync(get_schema)()
+            schema_data = run_sync(get_schema)
+            # Invalidated with all untagged query results whenever an upload finishes
+            query_cache.set_value('schema', schema_data)
             return Response(schema_data)
         
         except Exception as e:
@@ -47,6 +47,10 @@ except ImportError:
     print("ERROR: neo4j not installed. Install it with: pip install neo4j")
     sys.exit(1)
 
+# Chunked deletion engine shared with the backend (plain module, no Django needed)
+sys.path.insert(0, str(Path(__file__).parent / "backend"))
+from core.chunked_delete import DEFAULT_CHUNK_SIZE, delete_in_chunks, nodes_match, relationships_match
+
 
 def get_postgres_config():
     """Get PostgreSQL configuration from environment variables."""
@@ -65,6 +69,7 @@ def get_neo4j_config():
         'uri': os.getenv('NEO4J_URI', 'bolt://localhost:7687'),
         'user': os.getenv('NEO4J_USER', 'neo4j'),
         'password': os.getenv('NEO4J_PASSWORD', 'neo4jpass123'),
+        'chunk_size': int(os.getenv('NEO4J_DELETE_CHUNK_SIZE', str(DEFAULT_CHUNK_SIZE))),
     }
 
 
@@ -192,21 +197,33 @@ async def clear_neo4j():
             await driver.close()
             return
         
+        # Delete in chunks of chunk_size per transaction: one huge transaction runs out of
+        # transaction memory and locks the store on large graphs
+        async def execute(query, parameters):
+            async with driver.session() as session:
+                result = await session.run(query, parameters)
+                return await result.data()
+        
+        def progress(total, kind):
+            async def report(deleted):
+                print(f"\r  ... {deleted}/{total} {kind}", end='', flush=True)
+            return report
+        
         # Delete all relationships first (to avoid constraint issues)
-        print("\nDeleting all relationships...")
-        async with driver.session() as session:
-            result = await session.run("MATCH ()-[r]->() DELETE r")
-            summary = await result.consume()
-            deleted_rels = summary.counters.relationships_deleted
-            print(f"  ✓ Deleted {deleted_rels} relationships")
+        print(f"\nDeleting all relationships ({config['chunk_size']} per transaction)...")
+        deleted_rels = await delete_in_chunks(
+            execute, relationships_match(), chunk_size=config['chunk_size'],
+            on_progress=progress(rel_count, 'relationships')
+        )
+        print(f"\r  ✓ Deleted {deleted_rels} relationships")
         
         # Delete all nodes
-        print("Deleting all nodes...")
-        async with driver.session() as session:
-            result = await session.run("MATCH (n) DELETE n")
-            summary = await result.consume()
-            deleted_nodes = summary.counters.nodes_deleted
-            print(f"  ✓ Deleted {deleted_nodes} nodes")
+        print(f"Deleting all nodes ({config['chunk_size']} per transaction)...")
+        deleted_nodes = await delete_in_chunks(
+            execute, nodes_match(), detach=True, chunk_size=config['chunk_size'],
+            on_progress=progress(node_count, 'nodes')
+        )
+        print(f"\r  ✓ Deleted {deleted_nodes} nodes")
         
         # Verify deletion
         async with driver.session() as session:
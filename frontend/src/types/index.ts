@@ -8,7 +8,7 @@ export interface Dataset {
   id: number;
   name: string;
   description?: string;
-  status: 'pending' | 'processing' | 'completed' | 'failed';
+  status: 'pending' | 'processing' | 'completed' | 'failed' | 'deleting';
   created_at: string;
   updated_at: string;
   created_by?: number;
@@ -33,7 +33,7 @@ export interface Dataset {
 export interface UploadTask {
   id: number;
   file_name: string;
-  file_type: 'node' | 'relationship';
+  file_type: 'node' | 'relationship' | 'purge';
   status: 'pending' | 'processing' | 'completed' | 'failed';
   total_rows?: number;
   processed_rows?: number;